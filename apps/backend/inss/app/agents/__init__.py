@@ -1,6 +1,8 @@
 """Pacote de agentes conversacionais GuiasMEI."""
 
 from .base_agent import GuiasMEIAgent, UserType
+from .cache import RespostaCache
+from .memory import MemoriaConversa, MemoriaConversas
 
-__all__ = ["GuiasMEIAgent", "UserType"]
+__all__ = ["GuiasMEIAgent", "MemoriaConversa", "MemoriaConversas", "RespostaCache", "UserType"]
 
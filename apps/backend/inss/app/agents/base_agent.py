@@ -2,8 +2,14 @@
 
 from __future__ import annotations
 
-from typing import Any, Dict, Iterable, Literal, Optional
-
+import asyncio
+from contextlib import nullcontext, suppress
+from typing import Any, AsyncContextManager, AsyncIterator, Dict, Iterable, Literal, Optional
+
+from ..services.circuit_breaker import CircuitoAbertoError
+from .cache import RespostaCache
+from .memory import MemoriaConversa
+from .streaming import TAMANHO_MAXIMO_MENSAGEM, agrupar_paragrafos
 from .prompts.system_prompts import (
     AUTONOMO_SYSTEM_PROMPT,
     BASE_SYSTEM_PROMPT,
@@ -14,6 +20,7 @@ from .prompts.system_prompts import (
 )
 
 UserType = Literal["mei", "autonomo", "parceiro", "admin", "default"]
+_FIM = object()
 
 
 class GuiasMEIAgent:
@@ -24,9 +31,17 @@ class GuiasMEIAgent:
         user_type: UserType,
         llm: Any | None = None,
         extra_sections: Optional[Iterable[str]] = None,
+        cache: Optional[RespostaCache] = None,
+        circuito: Any | None = None,
+        orcamento_memoria: int = 1200,
+        limitador: Any | None = None,
     ) -> None:
         self.user_type = user_type
         self.llm = llm
+        self.cache = cache
+        self.circuito = circuito
+        self.limitador = limitador
+        self.orcamento_memoria = orcamento_memoria
         self.extra_sections = list(extra_sections or [])
         self.system_prompt = self._build_system_prompt()
 
@@ -62,24 +77,159 @@ class GuiasMEIAgent:
             f"{mensagem}\n"
         )
 
+    def _montar_mensagens(
+        self, mensagem: str, contexto: Dict[str, Any], memoria: Optional[MemoriaConversa] = None
+    ) -> list:
+        try:
+            from langchain.schema import AIMessage, HumanMessage, SystemMessage
+        except ImportError as exc:  # pragma: no cover - somente logamos em runtime
+            raise RuntimeError("Dependências LangChain indisponíveis.") from exc
+
+        messages = [SystemMessage(content=self.system_prompt)]
+        if memoria:
+            # Orçamento fixo de tokens: o prompt não cresce com o tamanho da conversa
+            resumo, turnos = memoria.janela(self.orcamento_memoria)
+            if resumo:
+                messages.append(SystemMessage(content=f"## RESUMO DA CONVERSA ATÉ AQUI\n{resumo}"))
+            for pergunta, resposta in turnos:
+                messages.append(HumanMessage(content=pergunta))
+                messages.append(AIMessage(content=resposta))
+        messages.append(HumanMessage(content=self._format_user_input(mensagem, contexto)))
+        return messages
+
+    def _usar_cache(self, mensagem: str, contexto: Dict[str, Any], memoria: Optional[MemoriaConversa]) -> bool:
+        # Com histórico a pergunta pode depender de turnos anteriores ("e quando vence?")
+        return self.cache is not None and not memoria and self.cache.pode_usar_cache(mensagem, contexto)
+
+    def _vaga_llm(self) -> AsyncContextManager[None]:
+        """Vaga no limitador de concorrência do LLM (sem limitador, não espera)."""
+        return self.limitador.slot() if self.limitador is not None else nullcontext()
+
     async def processar_mensagem(
         self,
         mensagem: str,
         contexto: Dict[str, Any],
+        memoria: Optional[MemoriaConversa] = None,
     ) -> str:
         if not self.llm:
             raise RuntimeError("LLM não configurado para GuiasMEIAgent.")
 
-        try:
-            from langchain.schema import HumanMessage, SystemMessage
-        except ImportError as exc:  # pragma: no cover - somente logamos em runtime
-            raise RuntimeError("Dependências LangChain indisponíveis.") from exc
-
-        messages = [
-            SystemMessage(content=self.system_prompt),
-            HumanMessage(content=self._format_user_input(mensagem, contexto)),
-        ]
-
-        resposta = await self.llm.ainvoke(messages)
-        return getattr(resposta, "content", str(resposta))
+        usar_cache = self._usar_cache(mensagem, contexto, memoria)
+        if usar_cache:
+            em_cache = self.cache.obter(self.user_type, PROMPT_VERSION, mensagem)
+            if em_cache is not None:
+                return em_cache
+
+        messages = self._montar_mensagens(mensagem, contexto, memoria)
+
+        async with self._vaga_llm():
+            if self.circuito is not None:
+                resposta = await self.circuito.chamar(lambda: self.llm.ainvoke(messages))
+            else:
+                resposta = await self.llm.ainvoke(messages)
+        texto = getattr(resposta, "content", str(resposta))
+        if usar_cache:
+            self.cache.guardar(self.user_type, PROMPT_VERSION, mensagem, texto)
+        return texto
+
+    async def processar_mensagem_stream(
+        self,
+        mensagem: str,
+        contexto: Dict[str, Any],
+        tamanho_minimo: int = 280,
+        tamanho_maximo: int = TAMANHO_MAXIMO_MENSAGEM,
+        memoria: Optional[MemoriaConversa] = None,
+    ) -> AsyncIterator[str]:
+        """
+        Versão em streaming de `processar_mensagem`.
+
+        Consome os tokens do LLM e emite cada bloco de parágrafos completos
+        (mínimo `tamanho_minimo` caracteres) assim que fica pronto. Com circuito,
+        a espera por cada pedaço do stream é limitada a `circuito.timeout`. A vaga
+        do limitador é devolvida quando o LLM termina, mesmo que o chamador ainda
+        esteja entregando os blocos.
+        """
+        if not self.llm:
+            raise RuntimeError("LLM não configurado para GuiasMEIAgent.")
 
+        usar_cache = self._usar_cache(mensagem, contexto, memoria)
+        if usar_cache:
+            em_cache = self.cache.obter(self.user_type, PROMPT_VERSION, mensagem)
+            if em_cache is not None:
+                async for bloco in agrupar_paragrafos(_um_token(em_cache), tamanho_minimo, tamanho_maximo):
+                    yield bloco
+                return
+
+        messages = self._montar_mensagens(mensagem, contexto, memoria)
+        partes: list[str] = []
+
+        limite = getattr(self.circuito, "timeout", None)
+
+        async def _tokens() -> AsyncIterator[str]:
+            fluxo = self.llm.astream(messages).__aiter__()
+            try:
+                while True:
+                    try:
+                        # Stream travado no provedor não pode segurar a vaga do LLM para sempre
+                        if limite:
+                            pedaco = await asyncio.wait_for(fluxo.__anext__(), timeout=limite)
+                        else:
+                            pedaco = await fluxo.__anext__()
+                    except StopAsyncIteration:
+                        return
+                    texto = getattr(pedaco, "content", str(pedaco))
+                    if texto:
+                        partes.append(texto)
+                        yield texto
+            finally:
+                fechar = getattr(fluxo, "aclose", None)
+                if fechar is not None:
+                    await fechar()
+
+        fila: asyncio.Queue = asyncio.Queue()
+
+        async def _produzir() -> None:
+            # A vaga vem antes do circuito: fila saturada não conta como falha do provedor
+            async with self._vaga_llm():
+                if self.circuito is not None and not self.circuito.permite():
+                    raise CircuitoAbertoError(self.circuito.nome)
+                registrado = False
+                try:
+                    async for bloco in agrupar_paragrafos(_tokens(), tamanho_minimo, tamanho_maximo):
+                        fila.put_nowait(bloco)
+                    if self.circuito is not None:
+                        self.circuito.registrar_sucesso()
+                    registrado = True
+                except Exception as exc:
+                    if self.circuito is not None:
+                        self.circuito.registrar_erro(exc)
+                    registrado = True
+                    raise
+                finally:
+                    # Cliente desconectado ou tarefa cancelada: devolve a sonda
+                    if self.circuito is not None and not registrado:
+                        self.circuito.liberar_sonda()
+
+        # Os tokens são consumidos em uma tarefa própria: a vaga do limitador e a latência
+        # medida cobrem só o LLM, não o tempo que o chamador leva para entregar cada bloco
+        produtor = asyncio.ensure_future(_produzir())
+        produtor.add_done_callback(lambda _: fila.put_nowait(_FIM))
+        try:
+            while True:
+                bloco = await fila.get()
+                if bloco is _FIM:
+                    break
+                yield bloco
+            produtor.result()  # levanta o erro do LLM, circuito ou limitador
+        finally:
+            if not produtor.done():
+                produtor.cancel()
+                with suppress(asyncio.CancelledError):
+                    await produtor
+
+        if usar_cache:
+            self.cache.guardar(self.user_type, PROMPT_VERSION, mensagem, "".join(partes))
+
+
+async def _um_token(texto: str) -> AsyncIterator[str]:
+    yield texto
@@ -0,0 +1,127 @@
+"""Cache de respostas do LLM para perguntas frequentes sem contexto."""
+
+from __future__ import annotations
+
+import re
+import time
+import unicodedata
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, FrozenSet, Optional, Tuple
+
+# Campos de contexto que nao alteram a resposta de uma pergunta generica
+CONTEXTO_NEUTRO = frozenset({"whatsapp", "tipo_contribuinte", "user_type", "perfil", "segmento"})
+TAMANHO_MAXIMO_PERGUNTA = 200
+
+_NAO_PALAVRA = re.compile(r"[^\w\s]")
+_ESPACOS = re.compile(r"\s+")
+_DIGITOS = re.compile(r"\d")
+
+
+def normalizar_mensagem(mensagem: str) -> str:
+    """Remove acentos, pontuação e caixa, colapsando espaços."""
+    decomposta = unicodedata.normalize("NFKD", mensagem)
+    sem_acento = "".join(ch for ch in decomposta if not unicodedata.combining(ch))
+    sem_pontuacao = _NAO_PALAVRA.sub(" ", sem_acento.casefold())
+    return _ESPACOS.sub(" ", sem_pontuacao).strip()
+
+
+def assinatura_ngramas(texto: str, n: int = 3) -> FrozenSet[str]:
+    """Conjunto de n-gramas de caracteres usado na comparação aproximada."""
+    base = f" {texto} "
+    if len(base) <= n:
+        return frozenset({base})
+    return frozenset(base[i : i + n] for i in range(len(base) - n + 1))
+
+
+def _jaccard(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+@dataclass
+class _Entrada:
+    resposta: str
+    expira_em: float
+    assinatura: FrozenSet[str]
+
+
+class RespostaCache:
+    """
+    Cache LRU com TTL para respostas do agente.
+
+    A chave é (tipo de usuário, versão do prompt, mensagem normalizada). Com
+    `similaridade_minima` definido, perguntas quase idênticas (Jaccard de
+    trigramas) também reaproveitam a resposta.
+    """
+
+    def __init__(
+        self,
+        ttl: float = 3600.0,
+        max_entradas: int = 512,
+        similaridade_minima: Optional[float] = None,
+        relogio: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.ttl = ttl
+        self.max_entradas = max(1, max_entradas)
+        self.similaridade_minima = similaridade_minima
+        self._relogio = relogio
+        self._entradas: "OrderedDict[Tuple[str, str, str], _Entrada]" = OrderedDict()
+        self.acertos = 0
+        self.falhas = 0
+
+    @staticmethod
+    def pode_usar_cache(mensagem: str, contexto: Dict[str, Any]) -> bool:
+        """Só perguntas genéricas: sem números (valores, datas, CPF) e sem contexto extra."""
+        if len(mensagem) > TAMANHO_MAXIMO_PERGUNTA or _DIGITOS.search(mensagem):
+            return False
+        return all(
+            chave in CONTEXTO_NEUTRO or valor in (None, "", [], {})
+            for chave, valor in contexto.items()
+        )
+
+    def obter(self, user_type: str, versao_prompt: str, mensagem: str) -> Optional[str]:
+        normalizada = normalizar_mensagem(mensagem)
+        chave = (user_type, versao_prompt, normalizada)
+        agora = self._relogio()
+
+        entrada = self._entradas.get(chave)
+        if entrada is None and self.similaridade_minima:
+            chave, entrada = self._buscar_similar(user_type, versao_prompt, normalizada, agora)
+
+        if entrada is None or entrada.expira_em <= agora:
+            if entrada is not None:
+                del self._entradas[chave]
+            self.falhas += 1
+            return None
+
+        self._entradas.move_to_end(chave)
+        self.acertos += 1
+        return entrada.resposta
+
+    def guardar(self, user_type: str, versao_prompt: str, mensagem: str, resposta: str) -> None:
+        normalizada = normalizar_mensagem(mensagem)
+        chave = (user_type, versao_prompt, normalizada)
+        self._entradas[chave] = _Entrada(
+            resposta=resposta,
+            expira_em=self._relogio() + self.ttl,
+            assinatura=assinatura_ngramas(normalizada),
+        )
+        self._entradas.move_to_end(chave)
+        while len(self._entradas) > self.max_entradas:
+            self._entradas.popitem(last=False)
+
+    def _buscar_similar(
+        self, user_type: str, versao_prompt: str, normalizada: str, agora: float
+    ) -> Tuple[Any, Optional[_Entrada]]:
+        assinatura = assinatura_ngramas(normalizada)
+        melhor: Tuple[Any, Optional[_Entrada]] = (None, None)
+        melhor_score = self.similaridade_minima or 1.0
+        for chave, entrada in self._entradas.items():
+            if chave[0] != user_type or chave[1] != versao_prompt or entrada.expira_em <= agora:
+                continue
+            score = _jaccard(assinatura, entrada.assinatura)
+            if score >= melhor_score:
+                melhor, melhor_score = (chave, entrada), score
+        return melhor
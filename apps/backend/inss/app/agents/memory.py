@@ -0,0 +1,126 @@
+"""Memória compacta por conversa: últimos turnos + resumo incremental."""
+
+from __future__ import annotations
+
+from collections import OrderedDict, deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+
+Turno = Tuple[str, str]
+CarregadorConversas = Callable[[str, int], Awaitable[List[Dict[str, Any]]]]
+
+CARACTERES_POR_TOKEN = 4
+TAMANHO_MAXIMO_TRECHO = 600
+TAMANHO_MAXIMO_RESUMO = 800
+TAMANHO_TOPICO = 80
+
+
+def estimar_tokens(texto: str) -> int:
+    """Estimativa barata (4 caracteres por token) usada no orçamento do prompt."""
+    return len(texto) // CARACTERES_POR_TOKEN + 1
+
+
+def _encurtar(texto: str, limite: int) -> str:
+    texto = " ".join(texto.split())
+    return texto if len(texto) <= limite else texto[: limite - 1].rstrip() + "…"
+
+
+class MemoriaConversa:
+    """Estado de uma conversa: janela de turnos recentes, fatos extraídos e resumo."""
+
+    __slots__ = ("turnos", "fatos", "topicos")
+
+    def __init__(self, max_turnos: int) -> None:
+        self.turnos: Deque[Turno] = deque(maxlen=max_turnos)
+        self.fatos: Dict[str, str] = {}
+        self.topicos: Deque[str] = deque()
+
+    def __bool__(self) -> bool:
+        return bool(self.turnos or self.fatos or self.topicos)
+
+    def adicionar(self, mensagem: str, resposta: str) -> None:
+        if len(self.turnos) == self.turnos.maxlen:
+            self._resumir(self.turnos[0])
+        self.turnos.append((mensagem, resposta))
+
+    def _resumir(self, turno: Turno) -> None:
+        from ..services.intent_router import extrair_competencia, extrair_tipo, extrair_valor
+        from .cache import normalizar_mensagem
+
+        mensagem = turno[0]
+        normalizada = normalizar_mensagem(mensagem)
+        tipo = extrair_tipo(normalizada)
+        valor = extrair_valor(mensagem)
+        competencia = extrair_competencia(mensagem, normalizada)
+        if tipo:
+            self.fatos["tipo_contribuinte"] = tipo
+        if valor:
+            self.fatos["ultimo_valor_informado"] = f"{valor:.2f}"
+        if competencia:
+            self.fatos["ultima_competencia"] = competencia
+
+        self.topicos.append(_encurtar(mensagem, TAMANHO_TOPICO))
+        while sum(len(topico) + 3 for topico in self.topicos) > TAMANHO_MAXIMO_RESUMO:
+            self.topicos.popleft()
+
+    @property
+    def resumo(self) -> str:
+        partes = [f"- {chave}: {valor}" for chave, valor in self.fatos.items()]
+        if self.topicos:
+            partes.append("- assuntos anteriores: " + "; ".join(self.topicos))
+        return "\n".join(partes)
+
+    def janela(self, orcamento_tokens: int) -> Tuple[str, List[Turno]]:
+        """Resumo + turnos mais recentes que cabem no orçamento de tokens."""
+        resumo = self.resumo
+        restante = orcamento_tokens - estimar_tokens(resumo)
+        selecionados: List[Turno] = []
+        for mensagem, resposta in reversed(self.turnos):
+            turno = (_encurtar(mensagem, TAMANHO_MAXIMO_TRECHO), _encurtar(resposta, TAMANHO_MAXIMO_TRECHO))
+            custo = estimar_tokens(turno[0]) + estimar_tokens(turno[1])
+            if custo > restante:
+                break
+            selecionados.append(turno)
+            restante -= custo
+        selecionados.reverse()
+        return resumo, selecionados
+
+
+class MemoriaConversas:
+    """
+    Store LRU em processo das memórias por número de WhatsApp.
+
+    Na primeira mensagem de um número os últimos turnos são carregados de
+    `conversas`; depois a memória é mantida apenas em processo.
+    """
+
+    def __init__(
+        self,
+        carregar: Optional[CarregadorConversas] = None,
+        max_turnos: int = 6,
+        max_conversas: int = 1000,
+    ) -> None:
+        self.carregar = carregar
+        self.max_turnos = max(1, max_turnos)
+        self.max_conversas = max(1, max_conversas)
+        self._memorias: "OrderedDict[str, MemoriaConversa]" = OrderedDict()
+
+    async def obter(self, whatsapp: str, usuario_id: Optional[str] = None) -> MemoriaConversa:
+        memoria = self._memorias.get(whatsapp)
+        if memoria is not None:
+            self._memorias.move_to_end(whatsapp)
+            return memoria
+
+        memoria = MemoriaConversa(self.max_turnos)
+        if usuario_id and self.carregar:
+            try:
+                linhas = await self.carregar(usuario_id, self.max_turnos)
+            except Exception as exc:  # pragma: no cover
+                print(f"[WARN] Nao foi possivel carregar conversas: {str(exc)[:60]}...")
+                linhas = []
+            for linha in linhas:
+                memoria.adicionar(linha.get("mensagem") or "", linha.get("resposta") or "")
+
+        self._memorias[whatsapp] = memoria
+        while len(self._memorias) > self.max_conversas:
+            self._memorias.popitem(last=False)
+        return memoria
@@ -0,0 +1,43 @@
+"""Agrupamento de tokens do LLM em mensagens de WhatsApp."""
+
+from __future__ import annotations
+
+from typing import AsyncIterator
+
+# Limite do corpo de mensagem do WhatsApp via Twilio é 1600 caracteres
+TAMANHO_MAXIMO_MENSAGEM = 1500
+
+
+def _ponto_de_corte(texto: str, tamanho_minimo: int, tamanho_maximo: int) -> int:
+    """Posição onde cortar `texto`, ou -1 se ainda não há bloco pronto."""
+    paragrafo = texto.rfind("\n\n", 0, tamanho_maximo)
+    if paragrafo >= tamanho_minimo:
+        return paragrafo
+    if len(texto) < tamanho_maximo:
+        return -1
+    # Sem quebra de parágrafo dentro do limite: corta na última frase ou espaço
+    for separador in (". ", "\n", " "):
+        posicao = texto.rfind(separador, tamanho_minimo, tamanho_maximo)
+        if posicao != -1:
+            return posicao + len(separador.rstrip())
+    return tamanho_maximo
+
+
+async def agrupar_paragrafos(
+    tokens: AsyncIterator[str],
+    tamanho_minimo: int = 280,
+    tamanho_maximo: int = TAMANHO_MAXIMO_MENSAGEM,
+) -> AsyncIterator[str]:
+    """Emite parágrafos completos assim que somam pelo menos `tamanho_minimo` caracteres."""
+    pendente = ""
+    async for token in tokens:
+        pendente += token
+        while True:
+            corte = _ponto_de_corte(pendente, tamanho_minimo, tamanho_maximo)
+            if corte == -1:
+                break
+            bloco, pendente = pendente[:corte].strip(), pendente[corte:].lstrip()
+            if bloco:
+                yield bloco
+    if pendente.strip():
+        yield pendente.strip()
@@ -25,12 +25,40 @@ class Settings(BaseSettings):
     # Twilio / WhatsApp
     twilio_account_sid: Optional[str] = Field(default=None, alias="TWILIO_ACCOUNT_SID")
     twilio_auth_token: Optional[str] = Field(default=None, alias="TWILIO_AUTH_TOKEN")
+    # Base alternativa da API do Twilio (sandbox/teste de carga); vazio usa api.twilio.com
+    twilio_api_url: Optional[str] = Field(default=None, alias="TWILIO_API_URL")
     twilio_whatsapp_number: Optional[str] = Field(default=None, alias="TWILIO_WHATSAPP_NUMBER")
     whatsapp_number: Optional[str] = Field(default=None, alias="WHATSAPP_NUMBER")
 
     # OpenAI / LangChain
     openai_api_key: Optional[str] = Field(default=None, alias="OPENAI_API_KEY")
     openai_chat_model: Optional[str] = Field(default="gpt-5", alias="OPENAI_CHAT_MODEL")
+    # Envia a resposta do LLM em várias mensagens conforme os parágrafos ficam prontos
+    whatsapp_streaming: bool = Field(default=False, alias="WHATSAPP_STREAMING")
+    whatsapp_bloco_minimo: int = Field(default=280, alias="WHATSAPP_BLOCO_MINIMO")
+    # Junta mensagens seguidas do mesmo número em uma só resposta (0 desabilita)
+    whatsapp_debounce_janela: float = Field(default=1.5, alias="WHATSAPP_DEBOUNCE_JANELA")
+    whatsapp_debounce_espera_maxima: float = Field(default=5.0, alias="WHATSAPP_DEBOUNCE_ESPERA_MAXIMA")
+    # Memória por conversa: últimos turnos + resumo, com orçamento fixo de tokens
+    memoria_max_turnos: int = Field(default=6, alias="MEMORIA_MAX_TURNOS")
+    memoria_max_conversas: int = Field(default=1000, alias="MEMORIA_MAX_CONVERSAS")
+    memoria_orcamento_tokens: int = Field(default=1200, alias="MEMORIA_ORCAMENTO_TOKENS")
+    # Limitador adaptativo (AIMD) de chamadas simultâneas ao LLM e fila com SLO de espera
+    llm_concorrencia_inicial: int = Field(default=8, alias="LLM_CONCORRENCIA_INICIAL")
+    llm_concorrencia_minima: int = Field(default=1, alias="LLM_CONCORRENCIA_MINIMA")
+    llm_concorrencia_maxima: int = Field(default=32, alias="LLM_CONCORRENCIA_MAXIMA")
+    llm_latencia_alvo: float = Field(default=8.0, alias="LLM_LATENCIA_ALVO")
+    llm_fila_maxima: int = Field(default=100, alias="LLM_FILA_MAXIMA")
+    llm_fila_espera_maxima: float = Field(default=5.0, alias="LLM_FILA_ESPERA_MAXIMA")
+    llm_cache_ttl: float = Field(default=3600.0, alias="LLM_CACHE_TTL")
+    llm_cache_max_entradas: int = Field(default=512, alias="LLM_CACHE_MAX_ENTRADAS")
+    # Jaccard mínimo (0-1) para reaproveitar perguntas quase idênticas; vazio desabilita
+    llm_cache_similaridade: Optional[float] = Field(default=None, alias="LLM_CACHE_SIMILARIDADE")
+
+    # Perfil de saída do PDF da guia ("whatsapp-compact" ou "print")
+    pdf_perfil: str = Field(default="whatsapp-compact", alias="PDF_PERFIL")
+    # Renderiza uma guia fictícia no startup para a primeira requisição não pagar o custo frio
+    pdf_aquecimento: bool = Field(default=True, alias="PDF_AQUECIMENTO")
 
     # Configurações INSS
     salario_minimo_2025: float = Field(default=1518.00, alias="SALARIO_MINIMO_2025")
@@ -38,6 +66,44 @@ class Settings(BaseSettings):
 
     # URLs auxiliares
     webhook_secret: Optional[str] = Field(default=None, alias="WHATSAPP_WEBHOOK_SECRET")
+    # URL pública configurada no Twilio (atrás de proxy a URL vista pela app é outra)
+    webhook_public_url: Optional[str] = Field(default=None, alias="WHATSAPP_WEBHOOK_URL")
+
+    # Registro de conversas em lote (write-behind)
+    conversas_lote_tamanho: int = Field(default=50, alias="CONVERSAS_LOTE_TAMANHO")
+    conversas_lote_intervalo: float = Field(default=2.0, alias="CONVERSAS_LOTE_INTERVALO")
+    conversas_spill_path: Optional[str] = Field(default=None, alias="CONVERSAS_SPILL_PATH")
+
+    # Inserts em lote (create_records_bulk): linhas por requisição e lotes simultâneos
+    supabase_lote_tamanho: int = Field(default=500, alias="SUPABASE_LOTE_TAMANHO")
+    supabase_lote_paralelismo: int = Field(default=4, alias="SUPABASE_LOTE_PARALELISMO")
+
+    # Outbox local para escritas em modo degradado (vazio desabilita)
+    outbox_path: Optional[str] = Field(default="data/outbox.sqlite3", alias="OUTBOX_PATH")
+    outbox_replay_intervalo: float = Field(default=30.0, alias="OUTBOX_REPLAY_INTERVALO")
+
+    # Circuit breakers e timeouts por backend (segundos)
+    circuito_limite_falhas: int = Field(default=5, alias="CIRCUITO_LIMITE_FALHAS")
+    circuito_tempo_reset: float = Field(default=30.0, alias="CIRCUITO_TEMPO_RESET")
+    supabase_timeout: float = Field(default=5.0, alias="SUPABASE_TIMEOUT")
+    storage_timeout: float = Field(default=15.0, alias="STORAGE_TIMEOUT")
+    # Arquivos acima deste tamanho (bytes) vão pelo upload resumable (TUS) em chunks
+    storage_resumable_limiar: int = Field(default=6 * 1024 * 1024, alias="STORAGE_RESUMABLE_LIMIAR")
+    # Retentativas com backoff exponencial (por requisição/chunk) e uploads simultâneos
+    storage_upload_tentativas: int = Field(default=4, alias="STORAGE_UPLOAD_TENTATIVAS")
+    storage_upload_espera_inicial: float = Field(default=0.5, alias="STORAGE_UPLOAD_ESPERA_INICIAL")
+    storage_upload_espera_maxima: float = Field(default=8.0, alias="STORAGE_UPLOAD_ESPERA_MAXIMA")
+    storage_upload_paralelismo: int = Field(default=4, alias="STORAGE_UPLOAD_PARALELISMO")
+    # HEAD de conferência (tamanho/MD5) após uploads resumable e de objetos já existentes;
+    # upload simples confirmado pelo Storage não passa por ele
+    storage_upload_verificar: bool = Field(default=True, alias="STORAGE_UPLOAD_VERIFICAR")
+    # max-age (s) gravado nos objetos; caminhos por hash de conteúdo nunca mudam de bytes
+    storage_cache_control: int = Field(default=31536000, alias="STORAGE_CACHE_CONTROL")
+    # Com o segredo JWT do projeto as URLs de mídia saem assinadas localmente (bucket privado)
+    supabase_jwt_secret: Optional[str] = Field(default=None, alias="SUPABASE_JWT_SECRET")
+    storage_url_assinada_ttl: int = Field(default=7 * 24 * 3600, alias="STORAGE_URL_ASSINADA_TTL")
+    twilio_timeout: float = Field(default=10.0, alias="TWILIO_TIMEOUT")
+    openai_timeout: float = Field(default=30.0, alias="OPENAI_TIMEOUT")
 
     @field_validator("twilio_whatsapp_number")
     @classmethod
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import asyncio
 import sys
 import traceback
 import logging
@@ -13,6 +14,12 @@ from starlette.middleware.base import BaseHTTPMiddleware
 
 from .config import get_settings
 from .routes import inss, users, webhook
+from .services.circuit_breaker import estado_circuitos
+from .services.conversa_buffer import get_conversa_buffer
+from .services.limitador import get_limitador_llm
+from .services.outbox import OutboxReplayer, get_offline_outbox
+from .services.supabase_service import SupabaseService
+from .utils.serializacao import RespostaJSON
 
 # Configure logging ANTES de tudo
 logging.basicConfig(
@@ -41,6 +48,25 @@ async def lifespan(app: FastAPI):
         settings = get_settings()
         logger.info(f"[OK] App Name: {settings.app_name}")
         logger.info(f"[OK] App Version: {settings.app_version}")
+
+        get_conversa_buffer().iniciar()
+        logger.info("[OK] Buffer de conversas iniciado")
+
+        outbox = get_offline_outbox()
+        if outbox:
+            app.state.outbox_replayer = OutboxReplayer(
+                outbox, SupabaseService(outbox=outbox), intervalo=settings.outbox_replay_intervalo
+            )
+            app.state.outbox_replayer.iniciar()
+            logger.info(
+                f"[OK] Outbox local em {outbox.caminho} ({outbox.total()} pendente(s), "
+                f"{outbox.total_mortos()} recusado(s) em outbox_mortos)"
+            )
+
+        if settings.pdf_aquecimento:
+            # Antes do yield: a instância só recebe tráfego com o ReportLab já carregado
+            tempos = await asyncio.to_thread(inss.pdf_generator.aquecer)
+            logger.info(f"[OK] Gerador de PDF aquecido (frio {tempos['frio_ms']} ms, quente {tempos['quente_ms']} ms)")
         
         logger.info("=" * 80)
         logger.info("[OK] LIFESPAN STARTUP COMPLETO - SERVIDOR PRONTO")
@@ -70,6 +96,10 @@ async def lifespan(app: FastAPI):
         logger.info("=" * 80)
         
         try:
+            await get_conversa_buffer().encerrar()
+            logger.info("[OK] Buffer de conversas descarregado")
+            if getattr(app.state, "outbox_replayer", None):
+                await app.state.outbox_replayer.encerrar()
             logger.info("[OK] SHUTDOWN COMPLETO")
             
         except Exception as e:
@@ -114,6 +144,7 @@ def create_app() -> FastAPI:
         title=settings.app_name, 
         version=settings.app_version, 
         lifespan=lifespan,
+        default_response_class=RespostaJSON,
         debug=True
     )
 
@@ -176,7 +207,10 @@ def create_app() -> FastAPI:
         logger.info("[ROUTE] Health check chamado")
         return {
             "status": "healthy",
-            "timestamp": time.time()
+            "timestamp": time.time(),
+            "circuitos": estado_circuitos(),
+            "llm": get_limitador_llm().metricas(),
+            "pdf": inss.pdf_generator.metricas(),
         }
 
     # ===== INCLUDE ROUTERS COM TRY-EXCEPT =====
@@ -187,10 +221,10 @@ def create_app() -> FastAPI:
         app.include_router(inss.router, tags=["INSS"])
         
         logger.info("   [OK] Incluindo router Webhook...")
-        app.include_router(webhook.router, prefix="/webhook", tags=["Webhook"])
+        app.include_router(webhook.router, tags=["Webhook"])
         
         logger.info("   [OK] Incluindo router Users...")
-        app.include_router(users.router, prefix="/api/v1", tags=["Users"])
+        app.include_router(users.router, tags=["Users"])
         
         logger.info("[OK] Todos os routers incluidos com sucesso")
         
@@ -0,0 +1,53 @@
+"""
+Linhas lidas do Supabase como dataclasses com `__slots__`.
+
+Mais leves que os dicts devolvidos pelo PostgREST e usadas também para montar a
+projeção (`select`) com exatamente as colunas do tipo.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, fields
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Type, TypeVar
+
+T = TypeVar("T")
+
+
+@dataclass(slots=True)
+class Usuario:
+    id: str
+    whatsapp: str
+    nome: Optional[str] = None
+    cpf: Optional[str] = None
+    nit: Optional[str] = None
+    tipo_contribuinte: Optional[str] = None
+    created_at: Optional[str] = None
+
+
+@dataclass(slots=True)
+class GuiaHistorico:
+    id: str
+    codigo_gps: Optional[str] = None
+    competencia: Optional[str] = None
+    valor: Optional[float] = None
+    status: Optional[str] = None
+    pdf_url: Optional[str] = None
+    data_vencimento: Optional[str] = None
+    created_at: Optional[str] = None
+
+
+@lru_cache(maxsize=None)
+def _campos(tipo: type) -> Tuple[str, ...]:
+    return tuple(campo.name for campo in fields(tipo))
+
+
+def colunas(tipo: type) -> str:
+    """Projeção PostgREST (`id,whatsapp,...`) com os campos do tipo."""
+    return ",".join(_campos(tipo))
+
+
+def decodificar(tipo: Type[T], linhas: Iterable[Dict[str, Any]]) -> List[T]:
+    """Converte linhas do PostgREST em `tipo`; colunas extras são ignoradas."""
+    campos = _campos(tipo)
+    return [tipo(*(linha.get(campo) for campo in campos)) for linha in linhas]
@@ -0,0 +1,60 @@
+"""Modelos de resposta das rotas (validação da saída e documentação OpenAPI)."""
+
+from typing import Any, Dict, List, Optional
+
+from pydantic import BaseModel, ConfigDict
+
+
+class EnvioWhatsApp(BaseModel):
+    sid: str
+    status: str
+    media_url: Optional[str] = None
+
+
+class GuiaSalva(BaseModel):
+    """
+    Linha de `guias_inss`: dict do PostgREST/outbox (colunas extras são mantidas) ou
+    `GuiaHistorico` (validada pelos atributos).
+    """
+
+    model_config = ConfigDict(extra="allow", from_attributes=True)
+
+    id: str
+    codigo_gps: Optional[str] = None
+    competencia: Optional[str] = None
+    valor: Optional[float] = None
+    status: Optional[str] = None
+    pdf_url: Optional[str] = None
+    data_vencimento: Optional[str] = None
+    created_at: Optional[str] = None
+
+
+class EmissaoResponse(BaseModel):
+    """
+    `status` é "emitida" quando o PDF serve para pagamento e "sem_valor_para_pagamento"
+    enquanto o código de barras não está homologado (o PDF é só demonstrativo).
+    """
+
+    guia: GuiaSalva
+    whatsapp: EnvioWhatsApp
+    status: str = "emitida"
+    aviso: Optional[str] = None
+    detalhes_calculo: Optional[Dict[str, Any]] = None
+
+
+class UsuarioResumo(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: str
+    whatsapp: str
+    nome: Optional[str] = None
+    cpf: Optional[str] = None
+    nit: Optional[str] = None
+    tipo_contribuinte: Optional[str] = None
+    created_at: Optional[str] = None
+
+
+class HistoricoResponse(BaseModel):
+    usuario: UsuarioResumo
+    historico: List[GuiaSalva]
+    proximo_cursor: Optional[str] = None
@@ -1,76 +1,57 @@
 from __future__ import annotations
 
 from datetime import datetime
-from typing import Any
 
 from fastapi import APIRouter, HTTPException, status
 from fastapi.responses import Response
 from pydantic import BaseModel, Field
 from starlette.concurrency import run_in_threadpool
 
+from ..config import get_settings
 from ..models.guia_inss import ComplementacaoRequest, EmitirGuiaRequest
+from ..models.respostas import EmissaoResponse, EnvioWhatsApp
 from ..services.inss_calculator import CalculoSAL, INSSCalculator
 from ..services.pdf_generator import GPSGenerator
 from ..services.supabase_service import SupabaseService
 from ..services.whatsapp_service import WhatsAppService
-from ..utils.constants import SAL_CLASSES, calcular_vencimento_padrao
-from ..utils.validators import normalizar_competencia, validar_whatsapp
+from ..utils import codigo_barras
+from ..utils.competencia import Competencia
+from ..utils.validators import validar_whatsapp
 
 router = APIRouter(prefix="/api/v1/guias", tags=["Guias INSS"])
 
+AVISO_SEM_VALOR = (
+    "Atenção: este PDF é um demonstrativo SEM VALOR PARA PAGAMENTO. "
+    "Para pagar, emita a GPS no SAL (sal.rfb.gov.br) ou no app Meu INSS com estes dados."
+)
+
 calculator = INSSCalculator()
 supabase_service = SupabaseService()
-pdf_generator = GPSGenerator()
+pdf_generator = GPSGenerator(perfil=get_settings().pdf_perfil)
 whatsapp_service = WhatsAppService(supabase_service=supabase_service)
 
 
-async def _obter_ou_criar_usuario(payload: dict[str, Any]) -> dict[str, Any]:
-    whatsapp = payload["whatsapp"]
-    usuario = await supabase_service.obter_usuario_por_whatsapp(whatsapp)
-    if usuario:
-        return usuario
-    return await supabase_service.criar_usuario(
-        {
-            "whatsapp": whatsapp,
-            "nome": payload.get("nome"),
-            "cpf": payload.get("cpf"),
-            "nit": payload.get("nit"),
-            "tipo_contribuinte": payload.get("tipo_contribuinte"),
-        }
-    )
-
-
-def _calcular_por_tipo(request: EmitirGuiaRequest) -> CalculoSAL:
-    if request.tipo_contribuinte in {"autonomo", "autonomo_simplificado"}:
-        plano = "simplificado" if request.tipo_contribuinte == "autonomo_simplificado" else request.plano
-        return calculator.calcular_contribuinte_individual(request.valor_base, plano)
-    if request.tipo_contribuinte == "domestico":
-        return calculator.calcular_domestico(request.valor_base)
-    if request.tipo_contribuinte == "produtor_rural":
-        return calculator.calcular_produtor_rural(request.valor_base, segurado_especial=False)
-    if request.tipo_contribuinte == "complementacao":
+def _status_emissao() -> tuple[str, str | None]:
+    """Status e aviso da emissão: sem código de barras homologado o PDF não é pagável."""
+    if codigo_barras.CAMPO_LIVRE_HOMOLOGADO:
+        return "emitida", None
+    return "sem_valor_para_pagamento", AVISO_SEM_VALOR
+
+
+def _com_aviso(mensagem: str, aviso: str | None) -> str:
+    return f"{mensagem}\n\n{aviso}" if aviso else mensagem
+
+
+def _calcular_por_tipo(tipo_contribuinte: str, valor_base: float, plano: str | None) -> CalculoSAL:
+    if tipo_contribuinte == "complementacao":
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Utilize o endpoint /api/v1/guias/complementacao para este tipo.",
         )
-    if request.tipo_contribuinte == "facultativo_baixa_renda":
-        valor = calculator.salario_minimo_2025 * SAL_CLASSES["facultativo_baixa_renda"]["aliquota"]
-        return CalculoSAL(
-            codigo_gps=SAL_CLASSES["facultativo_baixa_renda"]["codigo_gps"],
-            valor=round(valor, 2),
-            descricao=SAL_CLASSES["facultativo_baixa_renda"]["descricao"],
-            detalhes={"base_calculo": calculator.salario_minimo_2025, "aliquota": 0.05},
-        )
-    if request.tipo_contribuinte == "facultativo":
-        base = max(calculator.salario_minimo_2025, request.valor_base)
-        valor = base * SAL_CLASSES["facultativo"]["aliquota"]
-        return CalculoSAL(
-            codigo_gps=SAL_CLASSES["facultativo"]["codigo_gps"],
-            valor=round(valor, 2),
-            descricao=SAL_CLASSES["facultativo"]["descricao"],
-            detalhes={"base_calculo": base, "aliquota": 0.20},
-        )
-    raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Tipo de contribuinte não suportado.")
+    try:
+        return calculator.calcular_por_tipo(tipo_contribuinte, valor_base, plano or "normal")
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
 
 
 class GerarPDFRequest(BaseModel):
@@ -88,24 +69,7 @@ async def gerar_pdf(request: GerarPDFRequest) -> Response:
     Compatível com o teste de integração local.
     """
     try:
-        tipo = request.tipo_contribuinte
-        if tipo == "autonomo":
-            calculo = calculator.calcular_contribuinte_individual(request.valor_base, request.plano or "normal")
-        elif tipo == "domestico":
-            calculo = calculator.calcular_domestico(request.valor_base)
-        elif tipo == "produtor_rural":
-            calculo = calculator.calcular_produtor_rural(request.valor_base, segurado_especial=False)
-        elif tipo == "facultativo":
-            base = max(calculator.salario_minimo_2025, request.valor_base)
-            valor = base * SAL_CLASSES["facultativo"]["aliquota"]
-            calculo = CalculoSAL(
-                codigo_gps=SAL_CLASSES["facultativo"]["codigo_gps"],
-                valor=round(valor, 2),
-                descricao=SAL_CLASSES["facultativo"]["descricao"],
-                detalhes={"base_calculo": base, "aliquota": 0.20},
-            )
-        else:
-            raise HTTPException(status_code=400, detail="tipo_contribuinte não suportado")
+        calculo = _calcular_por_tipo(request.tipo_contribuinte, request.valor_base, request.plano)
 
         competencia = datetime.utcnow().strftime("%m/%Y")
         dados_contribuinte = {
@@ -126,7 +90,7 @@ async def gerar_pdf(request: GerarPDFRequest) -> Response:
         raise HTTPException(status_code=500, detail=f"Erro ao gerar PDF: {str(e)}")
 
 
-@router.post("/emitir")
+@router.post("/emitir", response_model=EmissaoResponse)
 async def emitir_guia(request: EmitirGuiaRequest):
     """
     Emite guia INSS e envia via WhatsApp.
@@ -135,14 +99,14 @@ async def emitir_guia(request: EmitirGuiaRequest):
         if not validar_whatsapp(request.whatsapp):
             raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="WhatsApp inválido.")
 
-        calculo = _calcular_por_tipo(request)
+        calculo = _calcular_por_tipo(request.tipo_contribuinte, request.valor_base, request.plano)
         
-        competencia = request.competencia or datetime.utcnow().strftime("%m/%Y")
-        competencia = normalizar_competencia(competencia)
-        vencimento = calcular_vencimento_padrao(competencia)
+        referencia = Competencia.parse(request.competencia or datetime.utcnow().strftime("%m/%Y"))
+        competencia = str(referencia)
+        vencimento = referencia.vencimento
 
-        usuario = await _obter_ou_criar_usuario(
-            {"whatsapp": request.whatsapp, "tipo_contribuinte": request.tipo_contribuinte}
+        usuario = await supabase_service.obter_ou_criar_usuario(
+            request.whatsapp, {"tipo_contribuinte": request.tipo_contribuinte}
         )
 
         dados_contribuinte = {
@@ -175,24 +139,34 @@ async def emitir_guia(request: EmitirGuiaRequest):
             },
         )
 
-        mensagem = (
-            f"Sua guia do INSS código {calculo.codigo_gps} no valor de R$ {calculo.valor:,.2f} está pronta. "
-            f"Vencimento em {vencimento.strftime('%d/%m/%Y')}."
-        )
-        
-        envio = await whatsapp_service.enviar_pdf_whatsapp(request.whatsapp, pdf_bytes, mensagem)
+        status_emissao, aviso = _status_emissao()
+        if aviso:
+            mensagem = (
+                f"Calculei sua contribuição ao INSS: código {calculo.codigo_gps}, valor R$ {calculo.valor:,.2f}, "
+                f"vencimento em {vencimento.strftime('%d/%m/%Y')}."
+            )
+        else:
+            mensagem = (
+                f"Sua guia do INSS código {calculo.codigo_gps} no valor de R$ {calculo.valor:,.2f} está pronta. "
+                f"Vencimento em {vencimento.strftime('%d/%m/%Y')}."
+            )
 
-        return {
-            "guia": guia_salva,
-            "whatsapp": {"sid": envio.sid, "status": envio.status, "media_url": envio.media_url},
-            "detalhes_calculo": calculo.detalhes,
-        }
+        envio = await whatsapp_service.enviar_pdf_whatsapp(request.whatsapp, pdf_bytes, _com_aviso(mensagem, aviso))
+
+        # guia_salva vem crua do PostgREST/outbox: o modelo valida, e a RespostaJSON (orjson) serializa
+        return EmissaoResponse(
+            guia=guia_salva,
+            whatsapp=EnvioWhatsApp(sid=envio.sid, status=envio.status, media_url=envio.media_url),
+            status=status_emissao,
+            aviso=aviso,
+            detalhes_calculo=calculo.detalhes,
+        )
     except Exception as e:
         import traceback
         raise HTTPException(status_code=500, detail=f"Erro: {str(e)}")
 
 
-@router.post("/complementacao")
+@router.post("/complementacao", response_model=EmissaoResponse)
 async def emitir_complementacao(request: ComplementacaoRequest):
     """
     Emite guia de complementação 11% → 20%.
@@ -201,12 +175,13 @@ async def emitir_complementacao(request: ComplementacaoRequest):
         if not validar_whatsapp(request.whatsapp):
             raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="WhatsApp inválido.")
 
-        competencias = [normalizar_competencia(item) for item in request.competencias]
+        referencias = [Competencia.parse(item) for item in request.competencias]
+        competencias = [str(item) for item in referencias]
         calculo = calculator.calcular_complementacao(competencias, request.valor_base)
         competencia_principal = competencias[-1]
-        vencimento = calcular_vencimento_padrao(competencia_principal)
+        vencimento = referencias[-1].vencimento
 
-        usuario = await _obter_ou_criar_usuario({"whatsapp": request.whatsapp, "tipo_contribuinte": "complementacao"})
+        usuario = await supabase_service.obter_ou_criar_usuario(request.whatsapp, {"tipo_contribuinte": "complementacao"})
 
         dados_contribuinte = {
             "nome": usuario.get("nome"),
@@ -234,18 +209,22 @@ async def emitir_complementacao(request: ComplementacaoRequest):
             },
         )
 
+        status_emissao, aviso = _status_emissao()
         mensagem = (
-            f"Complementação gerada (código {calculo.codigo_gps}). "
+            f"Complementação calculada (código {calculo.codigo_gps}). "
             f"Total com juros: R$ {calculo.valor:,.2f}. Vencimento {vencimento.strftime('%d/%m/%Y')}."
         )
-        
-        envio = await whatsapp_service.enviar_pdf_whatsapp(request.whatsapp, pdf_bytes, mensagem)
 
-        return {
-            "guia": guia_salva,
-            "whatsapp": {"sid": envio.sid, "status": envio.status, "media_url": envio.media_url},
-            "detalhes_calculo": calculo.detalhes,
-        }
+        envio = await whatsapp_service.enviar_pdf_whatsapp(request.whatsapp, pdf_bytes, _com_aviso(mensagem, aviso))
+
+        # guia_salva vem crua do PostgREST/outbox: o modelo valida, e a RespostaJSON (orjson) serializa
+        return EmissaoResponse(
+            guia=guia_salva,
+            whatsapp=EnvioWhatsApp(sid=envio.sid, status=envio.status, media_url=envio.media_url),
+            status=status_emissao,
+            aviso=aviso,
+            detalhes_calculo=calculo.detalhes,
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro: {str(e)}")
 
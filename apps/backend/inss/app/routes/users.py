@@ -1,8 +1,14 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, HTTPException, status
+from typing import Literal, Optional
 
-from ..services.supabase_service import SupabaseService
+from fastapi import APIRouter, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+
+from ..models.registros import GuiaHistorico
+from ..models.respostas import HistoricoResponse, UsuarioResumo
+from ..services.supabase_service import HISTORICO_LIMITE_MAXIMO, SupabaseService
+from ..utils.serializacao import dumps
 from ..utils.validators import validar_whatsapp
 
 router = APIRouter(prefix="/api/v1/usuarios", tags=["Usuários"])
@@ -10,19 +16,54 @@ router = APIRouter(prefix="/api/v1/usuarios", tags=["Usuários"])
 supabase_service = SupabaseService()
 
 
-@router.get("/{whatsapp}/historico")
-async def buscar_historico(whatsapp: str):
+@router.get("/{whatsapp}/historico", response_model=HistoricoResponse)
+async def buscar_historico(
+    whatsapp: str,
+    limite: int = Query(default=20, ge=1, le=HISTORICO_LIMITE_MAXIMO),
+    cursor: Optional[str] = Query(default=None, description="Cursor retornado em proximo_cursor"),
+    formato: Literal["json", "ndjson"] = Query(default="json"),
+):
     """
     Retorna histórico de guias do usuário.
+
+    Paginado por cursor; com formato=ndjson exporta o histórico completo em streaming,
+    uma guia por linha.
     """
 
     if not validar_whatsapp(whatsapp):
         raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="WhatsApp inválido.")
 
-    usuario = await supabase_service.obter_usuario_por_whatsapp(whatsapp)
+    usuario = await supabase_service.obter_usuario(whatsapp)
     if not usuario:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Usuário não encontrado.")
 
-    historico = await supabase_service.buscar_historico(usuario["id"])
-    return {"usuario": usuario, "historico": historico}
+    if formato == "ndjson":
+        guias = supabase_service.iterar_historico(usuario.id, tipo=GuiaHistorico)
+        try:
+            # Primeira página antes dos cabeçalhos: falha logo de início vira 503, não um 200 vazio
+            primeira = await anext(guias, None)
+        except Exception as exc:
+            raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Histórico indisponível.") from exc
+
+        async def _linhas():
+            if primeira is None:
+                return
+            yield dumps(primeira) + b"\n"
+            # Falha no meio da exportação aborta o stream (sem o chunk final), nunca a encerra limpa
+            async for guia in guias:
+                yield dumps(guia) + b"\n"
+
+        return StreamingResponse(_linhas(), media_type="application/x-ndjson")
 
+    try:
+        historico = await supabase_service.buscar_historico(
+            usuario.id, limite=limite, cursor=cursor, tipo=GuiaHistorico
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+    # GuiaHistorico (dataclass com slots) é validada pelos atributos, sem passar por dict
+    return HistoricoResponse(
+        usuario=UsuarioResumo.model_validate(usuario),
+        historico=historico["guias"],
+        proximo_cursor=historico["proximo_cursor"],
+    )
@@ -1,17 +1,90 @@
 from __future__ import annotations
 
+from typing import Dict
+from urllib.parse import parse_qsl
+
 from fastapi import APIRouter, HTTPException, Request, status
 
+from ..agents import MemoriaConversas
+from ..config import get_settings
+from ..models.guia_inss import EmitirGuiaRequest
 from ..services.ai_agent import INSSChatAgent
+from ..services.assinatura_twilio import CABECALHO_ASSINATURA, TAMANHO_MAXIMO_CORPO, get_validador_assinatura
+from ..services.debounce import DebounceMensagens
+from ..services.inss_calculator import INSSCalculator
+from ..services.intent_router import IntentRouter
 from ..services.supabase_service import SupabaseService
 from ..services.whatsapp_service import WhatsAppService
 from ..utils.validators import validar_whatsapp
+from . import inss
 
 router = APIRouter(tags=["Webhook WhatsApp"])
 
 supabase_service = SupabaseService()
 whatsapp_service = WhatsAppService(supabase_service=supabase_service)
 chat_agent = INSSChatAgent()
+memorias = MemoriaConversas(
+    carregar=supabase_service.buscar_conversas_recentes,
+    max_turnos=get_settings().memoria_max_turnos,
+    max_conversas=get_settings().memoria_max_conversas,
+)
+debounce = DebounceMensagens(
+    janela=get_settings().whatsapp_debounce_janela,
+    espera_maxima=get_settings().whatsapp_debounce_espera_maxima,
+)
+
+
+async def _emitir_pelo_whatsapp(
+    whatsapp: str, tipo_contribuinte: str, valor_base: float, plano: str, competencia: str | None
+) -> str | None:
+    """Emite a guia pelo mesmo fluxo de /emitir; o PDF já segue com a mensagem de confirmação."""
+    try:
+        await inss.emitir_guia(
+            EmitirGuiaRequest(
+                whatsapp=whatsapp,
+                tipo_contribuinte=tipo_contribuinte,
+                valor_base=valor_base,
+                plano=plano,
+                competencia=competencia,
+            )
+        )
+    except HTTPException as exc:
+        return f"Não consegui emitir a guia agora: {exc.detail}"
+    return None
+
+
+intent_router = IntentRouter(INSSCalculator(), supabase_service, emitir_guia=_emitir_pelo_whatsapp)
+
+
+async def _ler_payload_assinado(request: Request) -> Dict[str, str]:
+    """
+    Lê o formulário do Twilio validando a assinatura antes de qualquer I/O.
+
+    Requisições sem assinatura ou grandes demais são recusadas antes de ler o corpo;
+    sem Content-Length (chunked) o corpo é lido em partes e recusado assim que passa
+    do limite, sem chegar a ser lido inteiro.
+    """
+    validador = get_validador_assinatura()
+    assinatura = request.headers.get(CABECALHO_ASSINATURA)
+    if validador is not None and not assinatura:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Assinatura ausente.")
+
+    tamanho = request.headers.get("content-length")
+    if tamanho and tamanho.isdigit() and int(tamanho) > TAMANHO_MAXIMO_CORPO:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail="Corpo muito grande.")
+
+    corpo = bytearray()
+    async for pedaco in request.stream():
+        corpo += pedaco
+        if len(corpo) > TAMANHO_MAXIMO_CORPO:
+            raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail="Corpo muito grande.")
+    parametros = parse_qsl(corpo.decode("utf-8", "replace"), keep_blank_values=True)
+
+    if validador is not None:
+        url = get_settings().webhook_public_url or str(request.url)
+        if not validador.valida(url, parametros, assinatura):
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Assinatura inválida.")
+    return dict(parametros)
 
 
 @router.post("/webhook/whatsapp")
@@ -20,23 +93,46 @@ async def webhook_whatsapp(request: Request):
     Webhook para receber mensagens do WhatsApp.
     """
 
-    payload = await request.form()
+    payload = await _ler_payload_assinado(request)
     numero = payload.get("From", "").replace("whatsapp:", "")
     mensagem = payload.get("Body", "")
 
     if not validar_whatsapp(numero):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Origem inválida.")
 
+    mensagem = await debounce.agrupar(numero, mensagem)
+    if mensagem is None:
+        # Mensagem anexada a uma rajada; a primeira requisição responde por todas
+        return {"status": "ok", "agrupada": True}
+
     usuario = await supabase_service.obter_usuario_por_whatsapp(numero)
     contexto = {
         "whatsapp": numero,
         "tipo_contribuinte": usuario.get("tipo_contribuinte") if usuario else None,
     }
 
-    resposta = await chat_agent.processar_mensagem(mensagem, contexto)
-    if usuario:
-        await supabase_service.registrar_conversa(usuario["id"], mensagem, resposta)
+    roteada = await intent_router.responder(mensagem, contexto, usuario)
+    settings = get_settings()
+    memoria = await memorias.obter(numero, usuario["id"] if usuario else None)
+    if roteada is not None:
+        resposta = roteada.texto
+        if resposta:
+            await whatsapp_service.enviar_texto(numero, resposta)
+    elif settings.whatsapp_streaming:
+        blocos = []
+        async for bloco in chat_agent.processar_mensagem_stream(
+            mensagem, contexto, tamanho_minimo=settings.whatsapp_bloco_minimo, memoria=memoria
+        ):
+            blocos.append(bloco)
+            await whatsapp_service.enviar_texto(numero, bloco)
+        resposta = "\n\n".join(blocos)
+    else:
+        resposta = await chat_agent.processar_mensagem(mensagem, contexto, memoria=memoria)
+        await whatsapp_service.enviar_texto(numero, resposta)
 
-    await whatsapp_service.enviar_texto(numero, resposta)
+    memoria.adicionar(mensagem, resposta or "")
+
+    if usuario:
+        await supabase_service.registrar_conversa(usuario["id"], mensagem, resposta or "")
     return {"status": "ok"}
 
@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import Any, Dict
+from typing import Any, AsyncIterator, Dict, Optional
 
 try:
     from langchain_openai import ChatOpenAI
@@ -8,8 +8,10 @@ try:
 except ImportError:  # pragma: no cover - fallback em ambientes sem LangChain
     LANGCHAIN_AVAILABLE = False
 
-from ..agents import GuiasMEIAgent, UserType
+from ..agents import GuiasMEIAgent, MemoriaConversa, RespostaCache, UserType
 from ..config import get_settings
+from .circuit_breaker import get_circuit_breaker
+from .limitador import LimitadorSaturadoError, get_limitador_llm
 
 
 class INSSChatAgent:
@@ -18,6 +20,14 @@ class INSSChatAgent:
     def __init__(self) -> None:
         settings = get_settings()
         self.llm: Any | None = None
+        self._circuito = get_circuit_breaker("openai")
+        self._limitador = get_limitador_llm()
+        self.cache = RespostaCache(
+            ttl=settings.llm_cache_ttl,
+            max_entradas=settings.llm_cache_max_entradas,
+            similaridade_minima=settings.llm_cache_similaridade,
+        )
+        self.orcamento_memoria = settings.memoria_orcamento_tokens
 
         if LANGCHAIN_AVAILABLE and settings.openai_api_key and settings.openai_api_key != "sua-chave-openai":
             try:
@@ -62,6 +72,7 @@ class INSSChatAgent:
         self,
         mensagem_usuario: str,
         contexto_usuario: Dict[str, Any],
+        memoria: Optional[MemoriaConversa] = None,
     ) -> str:
         """Processa mensagem do usuário e retorna resposta personalizada."""
 
@@ -74,14 +85,61 @@ class INSSChatAgent:
             user_type=user_type,
             llm=self.llm,
             extra_sections=[self.conhecimento_sal],
+            cache=self.cache,
+            circuito=self._circuito,
+            orcamento_memoria=self.orcamento_memoria,
+            limitador=self._limitador,
         )
 
         try:
-            return await agente.processar_mensagem(mensagem_usuario, contexto_usuario)
+            return await agente.processar_mensagem(mensagem_usuario, contexto_usuario, memoria=memoria)
+        except LimitadorSaturadoError as exc:
+            print(f"[WARN] {exc} - usando resposta padrao")
+            return self._resposta_padrao(mensagem_usuario, contexto_usuario, user_type)
         except Exception as exc:  # pragma: no cover
             print(f"[WARN] Erro ao processar com IA: {str(exc)[:60]}...")
             return self._resposta_padrao(mensagem_usuario, contexto_usuario, user_type)
 
+    async def processar_mensagem_stream(
+        self,
+        mensagem_usuario: str,
+        contexto_usuario: Dict[str, Any],
+        tamanho_minimo: int = 280,
+        memoria: Optional[MemoriaConversa] = None,
+    ) -> AsyncIterator[str]:
+        """Como `processar_mensagem`, mas emite a resposta em blocos de parágrafos."""
+
+        user_type = self._mapear_tipo_usuario(contexto_usuario)
+
+        if not self.llm:
+            yield self._resposta_padrao(mensagem_usuario, contexto_usuario, user_type)
+            return
+
+        agente = GuiasMEIAgent(
+            user_type=user_type,
+            llm=self.llm,
+            extra_sections=[self.conhecimento_sal],
+            cache=self.cache,
+            circuito=self._circuito,
+            orcamento_memoria=self.orcamento_memoria,
+            limitador=self._limitador,
+        )
+
+        enviado = False
+        try:
+            async for bloco in agente.processar_mensagem_stream(
+                mensagem_usuario, contexto_usuario, tamanho_minimo=tamanho_minimo, memoria=memoria
+            ):
+                enviado = True
+                yield bloco
+        except LimitadorSaturadoError as exc:
+            print(f"[WARN] {exc} - usando resposta padrao")
+            yield self._resposta_padrao(mensagem_usuario, contexto_usuario, user_type)
+        except Exception as exc:  # pragma: no cover
+            print(f"[WARN] Erro ao processar com IA (streaming): {str(exc)[:60]}...")
+            if not enviado:
+                yield self._resposta_padrao(mensagem_usuario, contexto_usuario, user_type)
+
     def _mapear_tipo_usuario(self, contexto_usuario: Dict[str, Any]) -> UserType:
         bruto = (
             contexto_usuario.get("user_type")
@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+import base64
+import hashlib
+import hmac
+from functools import lru_cache
+from typing import Iterable, Optional, Tuple
+
+from ..config import get_settings
+
+CABECALHO_ASSINATURA = "X-Twilio-Signature"
+# Webhooks do Twilio têm poucos campos; corpos maiores são recusados sem leitura
+TAMANHO_MAXIMO_CORPO = 64 * 1024
+
+
+class ValidadorAssinaturaTwilio:
+    """
+    Valida o cabeçalho `X-Twilio-Signature` (HMAC-SHA1 em base64).
+
+    A assinatura cobre a URL pública do webhook seguida de cada parâmetro do
+    formulário (chave + valor) em ordem alfabética. O estado HMAC com a chave já
+    processada é montado uma vez e copiado a cada requisição.
+    """
+
+    def __init__(self, segredo: str) -> None:
+        self._hmac_base = hmac.new(segredo.encode("utf-8"), digestmod=hashlib.sha1)
+
+    def calcular(self, url: str, parametros: Iterable[Tuple[str, str]]) -> str:
+        assinatura = self._hmac_base.copy()
+        assinatura.update(url.encode("utf-8"))
+        for chave, valor in sorted(parametros):
+            assinatura.update(chave.encode("utf-8"))
+            assinatura.update(valor.encode("utf-8"))
+        return base64.b64encode(assinatura.digest()).decode("ascii")
+
+    def valida(self, url: str, parametros: Iterable[Tuple[str, str]], assinatura: str) -> bool:
+        esperada = self.calcular(url, parametros)
+        return hmac.compare_digest(esperada.encode("ascii"), assinatura.encode("ascii", "ignore"))
+
+
+@lru_cache
+def get_validador_assinatura() -> Optional[ValidadorAssinaturaTwilio]:
+    """Validador compartilhado; None quando WHATSAPP_WEBHOOK_SECRET não está configurado."""
+    segredo = get_settings().webhook_secret
+    if not segredo:
+        print("[WARN] WHATSAPP_WEBHOOK_SECRET ausente - assinatura do webhook nao sera validada")
+        return None
+    return ValidadorAssinaturaTwilio(segredo)
@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import Awaitable, Callable, Dict, Optional, TypeVar
+
+from ..config import get_settings
+
+T = TypeVar("T")
+
+FECHADO = "fechado"
+ABERTO = "aberto"
+MEIO_ABERTO = "meio_aberto"
+
+
+class CircuitoAbertoError(RuntimeError):
+    """Chamada recusada porque o circuito do backend esta aberto."""
+
+    def __init__(self, nome: str) -> None:
+        super().__init__(f"Circuito '{nome}' aberto - backend indisponivel")
+        self.nome = nome
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker assincrono com timeout por chamada.
+
+    Depois de `limite_falhas` falhas consecutivas o circuito abre e as chamadas
+    falham na hora com `CircuitoAbertoError`. Passado `tempo_reset`, ate
+    `sondas_meio_aberto` chamadas passam como sonda: sucesso fecha o circuito,
+    falha reabre.
+    """
+
+    def __init__(
+        self,
+        nome: str,
+        limite_falhas: int = 5,
+        tempo_reset: float = 30.0,
+        timeout: Optional[float] = None,
+        sondas_meio_aberto: int = 1,
+        e_falha: Optional[Callable[[BaseException], bool]] = None,
+        relogio: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.nome = nome
+        self.limite_falhas = max(1, limite_falhas)
+        self.tempo_reset = tempo_reset
+        self.timeout = timeout
+        self.sondas_meio_aberto = max(1, sondas_meio_aberto)
+        self.e_falha = e_falha or (lambda exc: True)
+        self._relogio = relogio
+        self.estado = FECHADO
+        self.falhas_consecutivas = 0
+        self._aberto_em = 0.0
+        self._sondas_em_andamento = 0
+
+    def permite(self) -> bool:
+        """Indica se uma chamada pode seguir agora (reservando vaga de sonda se preciso)."""
+        if self.estado == ABERTO:
+            if self._relogio() - self._aberto_em < self.tempo_reset:
+                return False
+            self.estado = MEIO_ABERTO
+            self._sondas_em_andamento = 0
+            print(f"[INFO] Circuito '{self.nome}' meio-aberto - enviando sonda")
+        if self.estado == MEIO_ABERTO:
+            if self._sondas_em_andamento >= self.sondas_meio_aberto:
+                return False
+            self._sondas_em_andamento += 1
+        return True
+
+    def registrar_sucesso(self) -> None:
+        if self.estado != FECHADO:
+            print(f"[OK] Circuito '{self.nome}' fechado - backend recuperado")
+        self.estado = FECHADO
+        self.falhas_consecutivas = 0
+        self._sondas_em_andamento = 0
+
+    def registrar_falha(self) -> None:
+        self.falhas_consecutivas += 1
+        if self.estado == MEIO_ABERTO or self.falhas_consecutivas >= self.limite_falhas:
+            if self.estado != ABERTO:
+                print(f"[WARN] Circuito '{self.nome}' aberto apos {self.falhas_consecutivas} falha(s)")
+            self.estado = ABERTO
+            self._aberto_em = self._relogio()
+            self._sondas_em_andamento = 0
+
+    def liberar_sonda(self) -> None:
+        """Devolve a vaga de sonda de uma chamada interrompida sem resultado (cancelada)."""
+        if self.estado == MEIO_ABERTO:
+            self._sondas_em_andamento = max(0, self._sondas_em_andamento - 1)
+
+    def registrar_erro(self, exc: BaseException) -> None:
+        """Timeout e erros que `e_falha` reconhece contam como falha; os demais, como sucesso."""
+        if isinstance(exc, asyncio.TimeoutError) or self.e_falha(exc):
+            self.registrar_falha()
+        else:
+            self.registrar_sucesso()
+
+    async def chamar(self, func: Callable[[], Awaitable[T]], timeout: Optional[float] = None) -> T:
+        """Executa `func()` respeitando o estado do circuito e o timeout configurado."""
+        if not self.permite():
+            raise CircuitoAbertoError(self.nome)
+
+        limite = timeout if timeout is not None else self.timeout
+        try:
+            if limite:
+                resultado = await asyncio.wait_for(func(), timeout=limite)
+            else:
+                resultado = await func()
+        except asyncio.CancelledError:
+            self.liberar_sonda()
+            raise
+        except Exception as exc:
+            self.registrar_erro(exc)
+            raise
+
+        self.registrar_sucesso()
+        return resultado
+
+
+_CIRCUITOS: Dict[str, CircuitBreaker] = {}
+
+TIMEOUTS_PADRAO = {
+    "supabase_rest": "supabase_timeout",
+    "supabase_storage": "storage_timeout",
+    "twilio": "twilio_timeout",
+    "openai": "openai_timeout",
+}
+
+
+def get_circuit_breaker(
+    nome: str, e_falha: Optional[Callable[[BaseException], bool]] = None
+) -> CircuitBreaker:
+    """Retorna o circuit breaker compartilhado do backend `nome`."""
+    if nome not in _CIRCUITOS:
+        settings = get_settings()
+        campo_timeout = TIMEOUTS_PADRAO.get(nome)
+        _CIRCUITOS[nome] = CircuitBreaker(
+            nome,
+            limite_falhas=settings.circuito_limite_falhas,
+            tempo_reset=settings.circuito_tempo_reset,
+            timeout=getattr(settings, campo_timeout) if campo_timeout else None,
+            e_falha=e_falha,
+        )
+    return _CIRCUITOS[nome]
+
+
+def estado_circuitos() -> Dict[str, str]:
+    """Estado atual de todos os circuitos registrados (para health check)."""
+    return {nome: circuito.estado for nome, circuito in _CIRCUITOS.items()}
@@ -0,0 +1,191 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+from datetime import datetime, timezone
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from ..config import get_settings
+from .outbox import erro_permanente
+from .supabase_service import SupabaseService
+
+TABELA_CONVERSAS = "conversas"
+
+
+class ConversaBuffer:
+    """
+    Buffer write-behind para a tabela `conversas`.
+
+    As linhas ficam em memoria e sao gravadas em insert multi-linha quando o lote
+    enche ou quando o intervalo expira. Se o Supabase estiver fora, o lote vai para
+    um arquivo JSONL append-only (quando configurado) e e reenviado depois.
+    Linhas que o banco recusa de vez (FK, check...) sao descartadas uma a uma,
+    sem travar o restante do lote.
+    """
+
+    def __init__(
+        self,
+        supabase_service: SupabaseService,
+        tamanho_lote: int = 50,
+        intervalo: float = 2.0,
+        arquivo_spill: Optional[str] = None,
+        max_pendentes: int = 10_000,
+    ) -> None:
+        self.supabase_service = supabase_service
+        self.tamanho_lote = max(1, tamanho_lote)
+        self.intervalo = intervalo
+        self.arquivo_spill = Path(arquivo_spill) if arquivo_spill else None
+        self.max_pendentes = max_pendentes
+        self._pendentes: List[Dict[str, Any]] = []
+        self._lote_cheio = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+        self.descartadas = 0
+
+    def registrar(self, usuario_id: str, mensagem: str, resposta: str) -> None:
+        """Enfileira uma linha de conversa sem I/O no caminho da resposta."""
+        self._pendentes.append(
+            {
+                "usuario_id": usuario_id,
+                "mensagem": mensagem,
+                "resposta": resposta,
+                "created_at": datetime.now(timezone.utc).isoformat(),
+            }
+        )
+        if len(self._pendentes) > self.max_pendentes:
+            descartadas = len(self._pendentes) - self.max_pendentes
+            del self._pendentes[:descartadas]
+            print(f"[WARN] Buffer de conversas cheio - {descartadas} linha(s) descartada(s)")
+        if len(self._pendentes) >= self.tamanho_lote:
+            self._lote_cheio.set()
+        self.iniciar()
+
+    def iniciar(self) -> None:
+        """Inicia a tarefa de flush periodico (idempotente)."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._loop())
+
+    async def encerrar(self) -> None:
+        """Para a tarefa periodica e grava o que restou no buffer."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+        if self._pendentes:
+            print(
+                f"[ERROR] {len(self._pendentes)} conversa(s) perdida(s) no encerramento - "
+                "Supabase indisponivel e CONVERSAS_SPILL_PATH vazio"
+            )
+            self._pendentes = []
+
+    async def _loop(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._lote_cheio.wait(), timeout=self.intervalo)
+            except asyncio.TimeoutError:
+                pass
+            self._lote_cheio.clear()
+            await self.flush()
+
+    async def flush(self) -> int:
+        """Grava todas as linhas pendentes; retorna quantas foram persistidas."""
+        async with self._lock:
+            if not self._pendentes:
+                return 0
+            lote, self._pendentes = self._pendentes, []
+
+            gravadas, restantes = await self._gravar_lote(lote)
+            if not restantes:
+                await self._reenviar_spill()
+                return gravadas
+
+            if self.arquivo_spill:
+                await asyncio.to_thread(self._gravar_spill, restantes)
+            else:
+                # Sem arquivo de spill, mantem as linhas para a proxima tentativa
+                self._pendentes[:0] = restantes
+            return gravadas
+
+    async def _gravar_lote(self, linhas: List[Dict[str, Any]]) -> Tuple[int, List[Dict[str, Any]]]:
+        """
+        Grava o lote; retorna (linhas gravadas, linhas que ficam para depois).
+
+        Falha transitoria devolve o lote inteiro. Se o banco recusa o lote, ele e
+        regravado linha a linha e so as linhas recusadas sao descartadas.
+        """
+        try:
+            await self._inserir(linhas)
+            return len(linhas), []
+        except Exception as exc:
+            if not erro_permanente(exc):
+                print(f"[ERROR] Erro ao gravar lote de conversas: {str(exc)[:60]}...")
+                return 0, linhas
+
+        gravadas = 0
+        for indice, linha in enumerate(linhas):
+            try:
+                await self._inserir([linha])
+            except Exception as exc:
+                if not erro_permanente(exc):
+                    print(f"[ERROR] Erro ao gravar lote de conversas: {str(exc)[:60]}...")
+                    return gravadas, linhas[indice:]
+                self.descartadas += 1
+                print(f"[ERROR] Conversa de {linha.get('usuario_id')} recusada pelo banco ({str(exc)[:60]}) - descartada")
+                continue
+            gravadas += 1
+        return gravadas, []
+
+    async def _inserir(self, linhas: List[Dict[str, Any]]) -> None:
+        client = self.supabase_service.client
+        if not client:
+            raise ConnectionError("Supabase nao conectado")
+
+        def _insert():
+            return client.table(TABELA_CONVERSAS).insert(linhas, returning="minimal").execute()
+
+        await self.supabase_service._circuito_rest.chamar(lambda: asyncio.to_thread(_insert))
+
+    def _gravar_spill(self, linhas: List[Dict[str, Any]]) -> None:
+        self.arquivo_spill.parent.mkdir(parents=True, exist_ok=True)
+        with self.arquivo_spill.open("a", encoding="utf-8") as arquivo:
+            for linha in linhas:
+                arquivo.write(json.dumps(linha, ensure_ascii=False) + "\n")
+            arquivo.flush()
+            os.fsync(arquivo.fileno())
+        print(f"[WARN] Supabase indisponivel - {len(linhas)} conversa(s) gravada(s) em {self.arquivo_spill}")
+
+    async def _reenviar_spill(self) -> None:
+        if not self.arquivo_spill or not self.arquivo_spill.exists():
+            return
+
+        processando = self.arquivo_spill.with_suffix(self.arquivo_spill.suffix + ".processando")
+        self.arquivo_spill.replace(processando)
+        with processando.open(encoding="utf-8") as arquivo:
+            linhas = [json.loads(linha) for linha in arquivo if linha.strip()]
+
+        for inicio in range(0, len(linhas), self.tamanho_lote):
+            fim = inicio + self.tamanho_lote
+            _, restantes = await self._gravar_lote(linhas[inicio:fim])
+            if restantes:
+                await asyncio.to_thread(self._gravar_spill, restantes + linhas[fim:])
+                break
+        processando.unlink()
+
+
+@lru_cache()
+def get_conversa_buffer() -> ConversaBuffer:
+    """Retorna o buffer de conversas compartilhado pelas rotas."""
+    settings = get_settings()
+    return ConversaBuffer(
+        SupabaseService(),
+        tamanho_lote=settings.conversas_lote_tamanho,
+        intervalo=settings.conversas_lote_intervalo,
+        arquivo_spill=settings.conversas_spill_path,
+    )
@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+
+@dataclass
+class _Rajada:
+    mensagens: List[str]
+    inicio: float
+    ultima: float = field(default=0.0)
+
+
+class DebounceMensagens:
+    """
+    Junta rajadas de mensagens do mesmo número em uma única invocação do agente.
+
+    A primeira mensagem de uma rajada fica aguardando até passar `janela` segundos
+    sem mensagens novas (ou `espera_maxima` desde o início da rajada) e então
+    devolve o texto combinado. As mensagens seguintes são anexadas à rajada e
+    recebem None, indicando que outra requisição vai responder por elas.
+    """
+
+    def __init__(
+        self,
+        janela: float = 1.5,
+        espera_maxima: float = 5.0,
+        relogio: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.janela = janela
+        self.espera_maxima = max(espera_maxima, janela)
+        self.relogio = relogio
+        self._rajadas: Dict[str, _Rajada] = {}
+
+    async def agrupar(self, chave: str, mensagem: str) -> Optional[str]:
+        if self.janela <= 0:
+            return mensagem
+
+        agora = self.relogio()
+        rajada = self._rajadas.get(chave)
+        if rajada is not None:
+            rajada.mensagens.append(mensagem)
+            rajada.ultima = agora
+            return None
+
+        rajada = _Rajada(mensagens=[mensagem], inicio=agora, ultima=agora)
+        self._rajadas[chave] = rajada
+        try:
+            while True:
+                prazo = min(rajada.ultima + self.janela, rajada.inicio + self.espera_maxima)
+                restante = prazo - self.relogio()
+                if restante <= 0:
+                    break
+                await asyncio.sleep(restante)
+        finally:
+            self._rajadas.pop(chave, None)
+
+        if len(rajada.mensagens) > 1:
+            print(f"[OK] {len(rajada.mensagens)} mensagens agrupadas para {chave}")
+        return "\n".join(mensagem for mensagem in rajada.mensagens if mensagem.strip())
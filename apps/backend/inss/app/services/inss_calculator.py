@@ -6,7 +6,7 @@ from typing import Literal
 
 from ..config import get_settings
 from ..utils.constants import SAL_CLASSES, TABELA_PROGRESSIVA_DOMESTICO
-from ..utils.validators import normalizar_competencia
+from ..utils.competencia import Competencia
 
 Plano = Literal["normal", "simplificado"]
 
@@ -28,6 +28,39 @@ class INSSCalculator:
         self.salario_minimo_2025 = settings.salario_minimo_2025
         self.teto_inss_2025 = settings.teto_inss_2025
 
+    def calcular_por_tipo(self, tipo_contribuinte: str, valor_base: float, plano: Plano = "normal") -> CalculoSAL:
+        """
+        Calcula a guia mensal conforme o tipo de contribuinte.
+
+        Complementação tem endpoint próprio (várias competências) e não é aceita aqui.
+        """
+
+        if tipo_contribuinte in {"autonomo", "autonomo_simplificado"}:
+            plano_efetivo = "simplificado" if tipo_contribuinte == "autonomo_simplificado" else plano
+            return self.calcular_contribuinte_individual(valor_base, plano_efetivo)
+        if tipo_contribuinte == "domestico":
+            return self.calcular_domestico(valor_base)
+        if tipo_contribuinte == "produtor_rural":
+            return self.calcular_produtor_rural(valor_base, segurado_especial=False)
+        if tipo_contribuinte == "facultativo_baixa_renda":
+            valor = self.salario_minimo_2025 * SAL_CLASSES["facultativo_baixa_renda"]["aliquota"]
+            return CalculoSAL(
+                codigo_gps=SAL_CLASSES["facultativo_baixa_renda"]["codigo_gps"],
+                valor=round(valor, 2),
+                descricao=SAL_CLASSES["facultativo_baixa_renda"]["descricao"],
+                detalhes={"base_calculo": self.salario_minimo_2025, "aliquota": 0.05},
+            )
+        if tipo_contribuinte == "facultativo":
+            base = max(self.salario_minimo_2025, valor_base)
+            valor = base * SAL_CLASSES["facultativo"]["aliquota"]
+            return CalculoSAL(
+                codigo_gps=SAL_CLASSES["facultativo"]["codigo_gps"],
+                valor=round(valor, 2),
+                descricao=SAL_CLASSES["facultativo"]["descricao"],
+                detalhes={"base_calculo": base, "aliquota": 0.20},
+            )
+        raise ValueError(f"Tipo de contribuinte não suportado: {tipo_contribuinte}")
+
     def calcular_contribuinte_individual(self, valor_base: float, plano: Plano) -> CalculoSAL:
         """
         Calcula contribuição para autônomo.
@@ -72,18 +105,17 @@ class INSSCalculator:
         A taxa SELIC é aproximada por 0,5% ao mês para ilustração.
         """
 
-        competencias_normalizadas = [normalizar_competencia(item) for item in competencias]
+        competencias_parseadas = [Competencia.parse(item) for item in competencias]
+        competencias_normalizadas = [str(item) for item in competencias_parseadas]
         aliquota_diferenca = SAL_CLASSES["complementacao"]["aliquota"]
         diferenca = round(valor_base * aliquota_diferenca, 2)
 
         # Juros SELIC simplificados
         taxa_mensal = 0.005
-        hoje = date.today()
+        atual = Competencia.de_data(date.today())
         total_juros = 0.0
-        for competencia in competencias_normalizadas:
-            mes, ano = competencia.split("/")
-            meses_atraso = (hoje.year - int(ano)) * 12 + (hoje.month - int(mes))
-            meses_atraso = max(meses_atraso, 0)
+        for competencia in competencias_parseadas:
+            meses_atraso = max(competencia.meses_ate(atual), 0)
             juros = diferenca * ((1 + taxa_mensal) ** meses_atraso - 1)
             total_juros += juros
 
@@ -0,0 +1,270 @@
+from __future__ import annotations
+
+import re
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from ..agents.cache import normalizar_mensagem
+from ..utils.constants import calcular_vencimento_padrao
+from .inss_calculator import INSSCalculator
+
+MESES = {
+    "janeiro": 1, "fevereiro": 2, "marco": 3, "abril": 4, "maio": 5, "junho": 6,
+    "julho": 7, "agosto": 8, "setembro": 9, "outubro": 10, "novembro": 11, "dezembro": 12,
+}
+
+_COMPETENCIA_NUMERICA = re.compile(r"\b(0?[1-9]|1[0-2])\s*/\s*(\d{4})\b")
+_COMPETENCIA_EXTENSO = re.compile(r"\b(" + "|".join(MESES) + r")(?:\s+de\s+|\s*/\s*|\s+)(\d{4})\b", re.IGNORECASE)
+_ANO_SOLTO = re.compile(r"\b(?:em|ano(?: de)?)\s+(?:19|20)\d{2}\b", re.IGNORECASE)
+# Só aceita número ancorado em "R$" ou em palavra de renda ("ganho 3000", "renda de 2 mil"):
+# idade, quantidade de meses etc. não viram salário de contribuição
+_VALOR = re.compile(
+    r"(?:r\$|\b(?:ganh[oa]\w*|renda|sal[aá]rio|recebo|faturo|faturamento|sobre)"
+    r"(?:\s+(?:de|mensal|bruta|m[eé]dia|uns|cerca de|em torno de))*\s*(?:r\$)?)"
+    r"\s*(\d{1,3}(?:\.\d{3})+|\d+)(?:,(\d{1,2}))?(\s*mil\b)?",
+    re.IGNORECASE,
+)
+
+# Só o histórico de guias: "histórico de contribuições" (CNIS) segue para o agente
+_HISTORICO = re.compile(
+    r"\b(minhas (?:guias|gps)|guias (?:emitidas|anteriores|geradas)|ultimas guias"
+    r"|historico (?:de|das|dos) (?:minhas )?(?:guias|gps|emiss\w*))\b"
+)
+_EMISSAO = re.compile(r"\b(emit\w*|emita|gera|gerar|gere)\b.*\b(guia|gps|inss)\b")
+# Negação ou pergunta sobre o processo ("como gerar a guia?") não é pedido de emissão
+_NAO_EMISSAO = re.compile(
+    r"\b(nao|nunca|jamais)\b|\b(como|onde|posso|consigo|da pra)\s+(?:eu\s+|a gente\s+)?(?:emit|ger)"
+)
+_CALCULO = re.compile(r"\b(quanto|calcul\w*|valor)\b")
+# "vencida"/"vencido" (atraso) não pede data de vencimento
+_VENCIMENTO = re.compile(r"\b(vence|vencem|vencimento|prazo|ate quando|data limite)\b")
+_CONTEXTO_GUIA = re.compile(r"\b(guias?|gps|boleto|carne|contribuic\w*)\b")
+_CONFIRMACAO = re.compile(r"^(sim|confirmar|confirmo|confirma)( pode emitir| emitir)?$")
+_RECUSA = re.compile(r"^(nao|cancelar|cancela)\b")
+
+# Ordem importa: expressões mais específicas primeiro
+_TIPOS = (
+    ("facultativo_baixa_renda", re.compile(r"\bbaixa renda\b|\bcadunico\b")),
+    ("facultativo", re.compile(r"\bfacultativ\w*")),
+    ("produtor_rural", re.compile(r"\bprodutor\b|\brural\b")),
+    ("domestico", re.compile(r"\bdomestic\w*")),
+    ("autonomo_simplificado", re.compile(r"\bsimplificad\w*")),
+    ("autonomo", re.compile(r"\bautonom\w*|\bcontribuinte individual\b")),
+)
+
+# Emissões propostas aguardam "sim" por até 10 minutos
+CONFIRMACAO_TTL = 600.0
+MAX_PENDENTES = 1000
+
+EmissorGuia = Callable[[str, str, float, str, Optional[str]], Awaitable[Optional[str]]]
+
+
+@dataclass
+class Intencao:
+    nome: str
+    slots: Dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass
+class RespostaRoteada:
+    intencao: Intencao
+    texto: Optional[str]
+
+
+def _moeda(valor: float) -> str:
+    return f"R$ {valor:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
+
+
+def extrair_competencia(mensagem: str, normalizada: str) -> Optional[str]:
+    encontrada = _COMPETENCIA_NUMERICA.search(mensagem)
+    if encontrada:
+        return f"{int(encontrada.group(1)):02d}/{encontrada.group(2)}"
+    encontrada = _COMPETENCIA_EXTENSO.search(normalizada)
+    if encontrada:
+        return f"{MESES[encontrada.group(1)]:02d}/{encontrada.group(2)}"
+    return None
+
+
+def extrair_valor(mensagem: str) -> Optional[float]:
+    """
+    Primeiro valor monetário junto de "R$"/"ganho"/"renda"/"sobre" (aceita 3.000,50,
+    3000 e 3 mil); números soltos são ignorados.
+    """
+    texto = _COMPETENCIA_NUMERICA.sub(" ", mensagem)
+    texto = _ANO_SOLTO.sub(" ", texto)
+    texto = _COMPETENCIA_EXTENSO.sub(" ", texto)
+    texto = re.sub(r"\b\d{1,2}\s*%", " ", texto)
+    for encontrado in _VALOR.finditer(texto):
+        inteiro, centavos, mil = encontrado.groups()
+        valor = float(inteiro.replace(".", "")) + (float(f"0.{centavos}") if centavos else 0.0)
+        if mil:
+            valor *= 1000
+        if valor > 0:
+            return valor
+    return None
+
+
+def extrair_tipo(normalizada: str) -> Optional[str]:
+    for tipo, padrao in _TIPOS:
+        if padrao.search(normalizada):
+            return tipo
+    return None
+
+
+class IntentRouter:
+    """
+    Roteador determinístico de intenções do WhatsApp.
+
+    Reconhece emissão, cálculo, vencimento e histórico por regras/regex e responde
+    com a calculadora, `calcular_vencimento_padrao` ou a consulta de histórico,
+    deixando o LLM apenas para perguntas abertas.
+
+    Emitir gera e envia o PDF, então o pedido só registra a emissão pendente e
+    pede confirmação; a guia sai no turno seguinte, se a resposta for "sim".
+    """
+
+    def __init__(
+        self,
+        calculator: INSSCalculator,
+        supabase_service: Any,
+        emitir_guia: Optional[EmissorGuia] = None,
+        confirmacao_ttl: float = CONFIRMACAO_TTL,
+    ) -> None:
+        self.calculator = calculator
+        self.supabase_service = supabase_service
+        self.emitir_guia = emitir_guia
+        self.confirmacao_ttl = confirmacao_ttl
+        self._pendentes: "OrderedDict[str, tuple[Dict[str, Any], float]]" = OrderedDict()
+
+    def classificar(self, mensagem: str, contexto: Optional[Dict[str, Any]] = None) -> Optional[Intencao]:
+        """Identifica intenção e slots; retorna None quando a mensagem é aberta."""
+        contexto = contexto or {}
+        normalizada = normalizar_mensagem(mensagem)
+
+        if _HISTORICO.search(normalizada):
+            return Intencao("historico")
+
+        competencia = extrair_competencia(mensagem, normalizada)
+        valor = extrair_valor(mensagem)
+        tipo = extrair_tipo(normalizada) or contexto.get("tipo_contribuinte")
+        slots = {"competencia": competencia, "valor_base": valor, "tipo_contribuinte": tipo}
+
+        if _EMISSAO.search(normalizada) and not _NAO_EMISSAO.search(normalizada) and valor and tipo:
+            return Intencao("emissao", slots)
+        if _CALCULO.search(normalizada) and valor and tipo:
+            return Intencao("calculo", slots)
+        if _VENCIMENTO.search(normalizada) and (competencia or _CONTEXTO_GUIA.search(normalizada)):
+            return Intencao("vencimento", slots)
+        return None
+
+    def _pendente(self, whatsapp: Optional[str]) -> Optional[Dict[str, Any]]:
+        """Retira a emissão pendente do número (vale só para o turno seguinte)."""
+        if not whatsapp:
+            return None
+        pendente = self._pendentes.pop(whatsapp, None)
+        if pendente is None:
+            return None
+        slots, expira = pendente
+        return slots if time.monotonic() < expira else None
+
+    def _propor_emissao(self, whatsapp: str, slots: Dict[str, Any]) -> None:
+        self._pendentes[whatsapp] = (dict(slots), time.monotonic() + self.confirmacao_ttl)
+        self._pendentes.move_to_end(whatsapp)
+        while len(self._pendentes) > MAX_PENDENTES:
+            self._pendentes.popitem(last=False)
+
+    async def responder(
+        self,
+        mensagem: str,
+        contexto: Dict[str, Any],
+        usuario: Optional[Dict[str, Any]] = None,
+    ) -> Optional[RespostaRoteada]:
+        whatsapp = contexto.get("whatsapp")
+        pendente = self._pendente(whatsapp)
+        if pendente is not None and self.emitir_guia:
+            normalizada = normalizar_mensagem(mensagem)
+            if _CONFIRMACAO.match(normalizada):
+                texto = await self._emissao(pendente, contexto)
+                return RespostaRoteada(intencao=Intencao("confirmacao", pendente), texto=texto)
+            if _RECUSA.match(normalizada):
+                return RespostaRoteada(intencao=Intencao("cancelamento", pendente), texto="Tudo bem, não emiti a guia.")
+
+        intencao = self.classificar(mensagem, contexto)
+        if intencao is None:
+            return None
+
+        try:
+            if intencao.nome == "historico":
+                texto = await self._historico(usuario)
+            elif intencao.nome == "vencimento":
+                texto = self._vencimento(intencao.slots)
+            elif intencao.nome == "calculo":
+                texto = self._calculo(intencao.slots)
+                if self.emitir_guia and whatsapp:
+                    self._propor_emissao(whatsapp, intencao.slots)
+            elif intencao.nome == "emissao" and self.emitir_guia and whatsapp:
+                texto = self._confirmar_emissao(intencao.slots)
+                self._propor_emissao(whatsapp, intencao.slots)
+            else:
+                return None
+        except ValueError:
+            # Slots fora do domínio (tipo/competência inválidos): deixa o LLM conduzir
+            return None
+        return RespostaRoteada(intencao=intencao, texto=texto)
+
+    def _competencia_ou_atual(self, slots: Dict[str, Any]) -> str:
+        return slots.get("competencia") or date.today().strftime("%m/%Y")
+
+    def _vencimento(self, slots: Dict[str, Any]) -> str:
+        competencia = self._competencia_ou_atual(slots)
+        vencimento = calcular_vencimento_padrao(competencia)
+        return (
+            f"A GPS da competência {competencia} vence em {vencimento.strftime('%d/%m/%Y')}. "
+            "A data já considera fins de semana e feriados nacionais (prorrogação para o próximo dia útil)."
+        )
+
+    def _resumo_calculo(self, slots: Dict[str, Any]) -> str:
+        calculo = self.calculator.calcular_por_tipo(slots["tipo_contribuinte"], slots["valor_base"])
+        competencia = self._competencia_ou_atual(slots)
+        vencimento = calcular_vencimento_padrao(competencia)
+        return (
+            f"{calculo.descricao}: código GPS {calculo.codigo_gps}, "
+            f"valor {_moeda(calculo.valor)} sobre {_moeda(slots['valor_base'])}. "
+            f"Competência {competencia}, vencimento {vencimento.strftime('%d/%m/%Y')}."
+        )
+
+    def _calculo(self, slots: Dict[str, Any]) -> str:
+        texto = self._resumo_calculo(slots)
+        if self.emitir_guia:
+            texto += "\nQuer que eu emita a guia? Responda \"sim\" para emitir."
+        return texto
+
+    def _confirmar_emissao(self, slots: Dict[str, Any]) -> str:
+        return (
+            f"Vou emitir a GPS com estes dados:\n{self._resumo_calculo(slots)}\n"
+            "Confirma? Responda \"sim\" para emitir ou \"não\" para cancelar."
+        )
+
+    async def _emissao(self, slots: Dict[str, Any], contexto: Dict[str, Any]) -> Optional[str]:
+        tipo = slots["tipo_contribuinte"]
+        plano = "simplificado" if tipo == "autonomo_simplificado" else "normal"
+        return await self.emitir_guia(
+            contexto["whatsapp"], tipo, slots["valor_base"], plano, slots.get("competencia")
+        )
+
+    async def _historico(self, usuario: Optional[Dict[str, Any]]) -> str:
+        if not usuario:
+            return "Ainda não encontrei guias emitidas para este número."
+        pagina = await self.supabase_service.buscar_historico(usuario["id"], limite=5)
+        guias = pagina["guias"]
+        if not guias:
+            return "Você ainda não tem guias emitidas."
+        linhas = [
+            f"- {guia.get('competencia')} | código {guia.get('codigo_gps')} | "
+            f"{_moeda(float(guia.get('valor') or 0))} | {guia.get('status')}"
+            for guia in guias
+        ]
+        return "Suas últimas guias:\n" + "\n".join(linhas)
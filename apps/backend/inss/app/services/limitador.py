@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from functools import lru_cache
+from typing import AsyncIterator, Callable, Deque, Dict, Optional
+
+from ..config import get_settings
+from .circuit_breaker import CircuitoAbertoError
+
+
+class LimitadorSaturadoError(RuntimeError):
+    """Chamada recusada porque a fila do limitador estourou o tamanho ou o tempo de espera."""
+
+    def __init__(self, nome: str, motivo: str) -> None:
+        super().__init__(f"Limitador '{nome}' saturado - {motivo}")
+        self.nome = nome
+        self.motivo = motivo
+
+
+def _e_sobrecarga_padrao(exc: BaseException) -> bool:
+    # Circuito aberto falha sem chegar ao provedor: não diz nada sobre a capacidade dele
+    return not isinstance(exc, CircuitoAbertoError)
+
+
+class LimitadorAdaptativo:
+    """
+    Limitador de concorrência AIMD com fila de espera limitada.
+
+    O limite sobe 1/limite a cada chamada concluída dentro de `latencia_alvo` e
+    cai multiplicando por `fator_reducao` quando a chamada demora mais que o alvo
+    ou falha (ex.: 429 do provedor). Quem não consegue vaga espera em uma fila de
+    até `fila_maxima` posições por no máximo `espera_maxima` segundos; acima disso
+    recebe `LimitadorSaturadoError` para responder pelo caminho de contingência.
+    """
+
+    def __init__(
+        self,
+        nome: str,
+        limite_inicial: float = 8,
+        limite_minimo: int = 1,
+        limite_maximo: int = 32,
+        latencia_alvo: float = 8.0,
+        fila_maxima: int = 100,
+        espera_maxima: float = 5.0,
+        fator_reducao: float = 0.5,
+        e_sobrecarga: Optional[Callable[[BaseException], bool]] = None,
+        relogio: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.nome = nome
+        self.limite_minimo = max(1, limite_minimo)
+        self.limite_maximo = max(self.limite_minimo, limite_maximo)
+        self.limite = min(max(float(limite_inicial), self.limite_minimo), self.limite_maximo)
+        self.latencia_alvo = latencia_alvo
+        self.fila_maxima = max(0, fila_maxima)
+        self.espera_maxima = espera_maxima
+        self.fator_reducao = fator_reducao
+        self.e_sobrecarga = e_sobrecarga or _e_sobrecarga_padrao
+        self._relogio = relogio
+        self.em_uso = 0
+        self._fila: Deque[asyncio.Future] = deque()
+        self.chamadas = 0
+        self.rejeitadas = 0
+        self._esperas = 0
+        self._espera_total = 0.0
+        self._espera_maxima_observada = 0.0
+
+    @property
+    def vagas(self) -> int:
+        return int(self.limite)
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """Reserva uma vaga de chamada ao LLM, esperando na fila se preciso."""
+        await self._adquirir()
+        inicio = self._relogio()
+        try:
+            yield
+        except Exception as exc:
+            if self.e_sobrecarga(exc):
+                self._liberar(self._relogio() - inicio, sobrecarga=True)
+            else:
+                self._liberar(None)
+            raise
+        except BaseException:
+            # Cancelamento ou gerador fechado no meio: devolve a vaga sem ajustar o limite
+            self._liberar(None)
+            raise
+        self._liberar(self._relogio() - inicio)
+
+    async def _adquirir(self) -> None:
+        chegada = self._relogio()
+        if self.em_uso < self.vagas and not self._fila:
+            self.em_uso += 1
+            self._registrar_espera(0.0)
+            return
+
+        if len(self._fila) >= self.fila_maxima:
+            self.rejeitadas += 1
+            raise LimitadorSaturadoError(self.nome, "fila cheia")
+
+        vez = asyncio.get_running_loop().create_future()
+        self._fila.append(vez)
+        try:
+            await asyncio.wait_for(vez, timeout=self.espera_maxima)
+        except asyncio.TimeoutError:
+            if vez.done() and not vez.cancelled():
+                # A vaga chegou junto com o timeout: devolve para o próximo da fila
+                self._liberar(None)
+            self.rejeitadas += 1
+            raise LimitadorSaturadoError(self.nome, f"espera acima de {self.espera_maxima:.1f}s")
+        except asyncio.CancelledError:
+            if vez.done() and not vez.cancelled():
+                self._liberar(None)
+            raise
+        self._registrar_espera(self._relogio() - chegada)
+
+    def _registrar_espera(self, espera: float) -> None:
+        self.chamadas += 1
+        if espera > 0:
+            self._esperas += 1
+            self._espera_total += espera
+            self._espera_maxima_observada = max(self._espera_maxima_observada, espera)
+
+    def _liberar(self, duracao: Optional[float], sobrecarga: bool = False) -> None:
+        self.em_uso -= 1
+        if duracao is not None:
+            if sobrecarga or duracao > self.latencia_alvo:
+                self.limite = max(float(self.limite_minimo), self.limite * self.fator_reducao)
+            else:
+                self.limite = min(float(self.limite_maximo), self.limite + 1 / self.limite)
+        # Passa as vagas livres direto para quem está na fila (FIFO)
+        while self._fila and self.em_uso < self.vagas:
+            vez = self._fila.popleft()
+            if vez.done():
+                continue
+            self.em_uso += 1
+            vez.set_result(None)
+
+    def metricas(self) -> Dict[str, float]:
+        """Estado e tempos de fila do limitador (para health check)."""
+        return {
+            "limite": round(self.limite, 2),
+            "em_uso": self.em_uso,
+            "na_fila": sum(1 for vez in self._fila if not vez.done()),
+            "chamadas": self.chamadas,
+            "rejeitadas": self.rejeitadas,
+            "esperaram": self._esperas,
+            "espera_media_ms": round(1000 * self._espera_total / self.chamadas, 1) if self.chamadas else 0.0,
+            "espera_maxima_ms": round(1000 * self._espera_maxima_observada, 1),
+        }
+
+
+@lru_cache
+def get_limitador_llm() -> LimitadorAdaptativo:
+    settings = get_settings()
+    return LimitadorAdaptativo(
+        "openai",
+        limite_inicial=settings.llm_concorrencia_inicial,
+        limite_minimo=settings.llm_concorrencia_minima,
+        limite_maximo=settings.llm_concorrencia_maxima,
+        latencia_alvo=settings.llm_latencia_alvo,
+        fila_maxima=settings.llm_fila_maxima,
+        espera_maxima=settings.llm_fila_espera_maxima,
+    )
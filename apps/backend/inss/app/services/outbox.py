@@ -0,0 +1,279 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import sqlite3
+import threading
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from ..config import get_settings
+
+# Tabelas com chave natural: no replay o registro offline pode colidir com um ja
+# existente no Supabase, entao o id definitivo e resolvido pela chave.
+CHAVES_NATURAIS = {"usuarios": "whatsapp"}
+COLUNAS_REFERENCIA = ("usuario_id", "user_id")
+# SQLSTATE de conexão, concorrência e recursos (08, 40, 53, 57, 58, XX) e PGRST0xx
+# (PostgREST sem conexão com o banco) são transitórios
+_CODIGOS_TRANSITORIOS = ("PGRST0", "08", "40", "53", "57", "58", "XX")
+
+
+def erro_permanente(exc: BaseException) -> bool:
+    """
+    Erro que uma nova tentativa não resolve: 4xx do PostgREST/Storage, como violação
+    de FK, NOT NULL ou check. Rede, timeout, 408/429 e 5xx são transitórios.
+    """
+    status = getattr(exc, "status", None)
+    codigo = str(getattr(exc, "code", None) or "")
+    if not isinstance(status, int) and type(exc).__name__ == "APIError" and codigo.isdigit() and len(codigo) == 3:
+        status = int(codigo)  # resposta sem corpo JSON: o postgrest usa o status HTTP como código
+    if isinstance(status, int):
+        return 400 <= status < 500 and status not in (408, 429)
+    if type(exc).__name__ != "APIError":
+        return False
+    return not codigo.startswith(_CODIGOS_TRANSITORIOS)
+
+
+class OfflineOutbox:
+    """
+    Outbox persistente (SQLite) para escritas feitas em modo degradado.
+
+    Cada escrita que nao chegou ao Supabase e gravada com o id gerado localmente;
+    o `OutboxReplayer` reenvia tudo em lote, na ordem original, quando a conexao volta.
+    Registros recusados pelo banco de forma permanente vao para `outbox_mortos`.
+    """
+
+    def __init__(self, caminho: str) -> None:
+        self.caminho = Path(caminho)
+        self.caminho.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.caminho), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS outbox ("
+            " seq INTEGER PRIMARY KEY AUTOINCREMENT,"
+            " tabela TEXT NOT NULL,"
+            " payload TEXT NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS outbox_ids (id_offline TEXT PRIMARY KEY, id_definitivo TEXT NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS outbox_mortos ("
+            " seq INTEGER PRIMARY KEY,"
+            " tabela TEXT NOT NULL,"
+            " payload TEXT NOT NULL,"
+            " erro TEXT NOT NULL,"
+            " descartado_em TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP)"
+        )
+
+    def registrar(self, tabela: str, dados: Dict[str, Any]) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO outbox (tabela, payload) VALUES (?, ?)",
+                (tabela, json.dumps(dados, ensure_ascii=False, default=str)),
+            )
+
+    def pendentes(self, limite: int = 500) -> List[Tuple[int, str, Dict[str, Any]]]:
+        with self._lock:
+            linhas = self._conn.execute(
+                "SELECT seq, tabela, payload FROM outbox ORDER BY seq LIMIT ?", (limite,)
+            ).fetchall()
+        return [(seq, tabela, json.loads(payload)) for seq, tabela, payload in linhas]
+
+    def remover(self, seqs: List[int]) -> None:
+        if not seqs:
+            return
+        with self._lock:
+            self._conn.executemany("DELETE FROM outbox WHERE seq = ?", [(seq,) for seq in seqs])
+
+    def total(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM outbox").fetchone()[0]
+
+    def descartar(self, seq: int, tabela: str, dados: Dict[str, Any], erro: str) -> None:
+        """Move o registro para `outbox_mortos` (para análise manual) e o tira da fila."""
+        with self._lock:
+            with self._conn:
+                self._conn.execute("BEGIN")
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO outbox_mortos (seq, tabela, payload, erro) VALUES (?, ?, ?, ?)",
+                    (seq, tabela, json.dumps(dados, ensure_ascii=False, default=str), erro),
+                )
+                self._conn.execute("DELETE FROM outbox WHERE seq = ?", (seq,))
+
+    def total_mortos(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM outbox_mortos").fetchone()[0]
+
+    def salvar_ids(self, mapa: Dict[str, str]) -> None:
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO outbox_ids (id_offline, id_definitivo) VALUES (?, ?)",
+                list(mapa.items()),
+            )
+
+    def ids_definitivos(self) -> Dict[str, str]:
+        with self._lock:
+            return dict(self._conn.execute("SELECT id_offline, id_definitivo FROM outbox_ids").fetchall())
+
+    def podar_ids(self) -> int:
+        """Remove os mapeamentos de id que nenhum registro pendente ainda referencia."""
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM outbox_ids WHERE NOT EXISTS"
+                " (SELECT 1 FROM outbox WHERE instr(outbox.payload, outbox_ids.id_offline) > 0)"
+            )
+            return cursor.rowcount
+
+
+class OutboxReplayer:
+    """Reenvia periodicamente o outbox para o Supabase em inserts multi-linha."""
+
+    def __init__(self, outbox: OfflineOutbox, supabase_service: Any, intervalo: float = 30.0, lote: int = 500) -> None:
+        self.outbox = outbox
+        self.supabase_service = supabase_service
+        self.intervalo = intervalo
+        self.lote = lote
+        self._task: Optional[asyncio.Task] = None
+
+    def iniciar(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._loop())
+
+    async def encerrar(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _loop(self) -> None:
+        while True:
+            try:
+                await self.reenviar()
+            except Exception as exc:  # pragma: no cover
+                print(f"[ERROR] Erro no replay do outbox: {str(exc)[:60]}...")
+            await asyncio.sleep(self.intervalo)
+
+    async def reenviar(self) -> int:
+        """
+        Reenvia o outbox inteiro; retorna quantos registros foram gravados.
+
+        Falha transitória interrompe o replay (o restante fica para a próxima rodada).
+        Se o banco recusa um lote, ele é regravado linha a linha: as linhas recusadas
+        vão para `outbox_mortos` e as demais seguem, então uma linha ruim não trava a fila.
+        """
+        total = 0
+        while True:
+            pendentes = await asyncio.to_thread(self.outbox.pendentes, self.lote)
+            if not pendentes:
+                await asyncio.to_thread(self.outbox.podar_ids)
+                return total
+            client = self.supabase_service.client
+            if not client:
+                self.supabase_service.tentar_reconectar()
+                return total
+
+            ids = await asyncio.to_thread(self.outbox.ids_definitivos)
+            for tabela, grupo in _agrupar_por_tabela(pendentes):
+                linhas = [_remapear(dados, ids) for _, dados in grupo]
+                try:
+                    novos_ids = await asyncio.to_thread(_gravar_lote, client, tabela, linhas)
+                except Exception as exc:
+                    if not erro_permanente(exc):
+                        print(f"[WARN] Supabase ainda indisponivel para o outbox: {str(exc)[:60]}...")
+                        return total
+                    gravados = await self._reenviar_linha_a_linha(client, tabela, grupo, linhas, ids)
+                    if gravados is None:
+                        return total
+                    total += gravados
+                    continue
+                if novos_ids:
+                    ids.update(novos_ids)
+                    await asyncio.to_thread(self.outbox.salvar_ids, novos_ids)
+                await asyncio.to_thread(self.outbox.remover, [seq for seq, _ in grupo])
+                total += len(grupo)
+            print(f"[OK] Outbox: {total} registro(s) reenviado(s) ao Supabase")
+
+    async def _reenviar_linha_a_linha(
+        self,
+        client: Any,
+        tabela: str,
+        grupo: List[Tuple[int, Dict[str, Any]]],
+        linhas: List[Dict[str, Any]],
+        ids: Dict[str, str],
+    ) -> Optional[int]:
+        """Regrava o lote recusado uma linha por vez; None se o Supabase cair no meio."""
+        gravados = 0
+        for (seq, dados), linha in zip(grupo, linhas):
+            try:
+                novos_ids = await asyncio.to_thread(_gravar_lote, client, tabela, [linha])
+            except Exception as exc:
+                if not erro_permanente(exc):
+                    print(f"[WARN] Supabase ainda indisponivel para o outbox: {str(exc)[:60]}...")
+                    return None
+                print(f"[ERROR] Outbox: registro {seq} de {tabela} recusado ({str(exc)[:60]}) - movido para outbox_mortos")
+                await asyncio.to_thread(self.outbox.descartar, seq, tabela, dados, str(exc))
+                continue
+            if novos_ids:
+                ids.update(novos_ids)
+                await asyncio.to_thread(self.outbox.salvar_ids, novos_ids)
+            await asyncio.to_thread(self.outbox.remover, [seq])
+            gravados += 1
+        return gravados
+
+
+def _agrupar_por_tabela(
+    pendentes: List[Tuple[int, str, Dict[str, Any]]]
+) -> List[Tuple[str, List[Tuple[int, Dict[str, Any]]]]]:
+    """Agrupa sequencias consecutivas da mesma tabela, preservando a ordem de escrita."""
+    grupos: List[Tuple[str, List[Tuple[int, Dict[str, Any]]]]] = []
+    for seq, tabela, dados in pendentes:
+        if grupos and grupos[-1][0] == tabela:
+            grupos[-1][1].append((seq, dados))
+        else:
+            grupos.append((tabela, [(seq, dados)]))
+    return grupos
+
+
+def _remapear(dados: Dict[str, Any], ids: Dict[str, str]) -> Dict[str, Any]:
+    linha = dict(dados)
+    for coluna in COLUNAS_REFERENCIA:
+        if linha.get(coluna) in ids:
+            linha[coluna] = ids[linha[coluna]]
+    return linha
+
+
+def _gravar_lote(client: Any, tabela: str, linhas: List[Dict[str, Any]]) -> Dict[str, str]:
+    """Grava o lote de forma idempotente; retorna id_offline -> id definitivo."""
+    chave = CHAVES_NATURAIS.get(tabela)
+    if not chave:
+        client.table(tabela).upsert(linhas, on_conflict="id", ignore_duplicates=True, returning="minimal").execute()
+        return {}
+
+    # A mesma chave pode aparecer com ids offline diferentes (várias escritas com o circuito aberto)
+    ids_offline: Dict[str, List[str]] = {}
+    for linha in linhas:
+        ids_offline.setdefault(linha[chave], []).append(linha["id"])
+    client.table(tabela).upsert(linhas, on_conflict=chave, ignore_duplicates=True, returning="minimal").execute()
+    existentes = client.table(tabela).select(f"id,{chave}").in_(chave, list(ids_offline)).execute()
+    return {
+        id_offline: registro["id"]
+        for registro in existentes.data or []
+        for id_offline in ids_offline[registro[chave]]
+        if id_offline != registro["id"]
+    }
+
+
+@lru_cache()
+def get_offline_outbox() -> Optional[OfflineOutbox]:
+    """Retorna o outbox compartilhado, ou None quando OUTBOX_PATH esta vazio."""
+    settings = get_settings()
+    if not settings.outbox_path:
+        return None
+    return OfflineOutbox(settings.outbox_path)
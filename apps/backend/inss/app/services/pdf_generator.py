@@ -1,39 +1,154 @@
 from __future__ import annotations
 
-import tempfile
-from io import BytesIO
-from pathlib import Path
-from typing import Any
+import time
+from dataclasses import dataclass
+from typing import Any, BinaryIO, Dict, List, Optional, Union
 
+from reportlab import rl_config
 from reportlab.lib.pagesizes import A4
 from reportlab.lib.units import mm
+from reportlab.pdfbase.pdfdoc import PDFDictionary, PDFInfo, PDFString
 from reportlab.pdfgen import canvas
 
+from ..utils import codigo_barras as layout_barras
+from ..utils.codigo_barras import barras_itf, linha_digitavel, montar_codigo_barras
 from ..utils.constants import calcular_vencimento_padrao
 
-try:
-    import barcode
-    from barcode.writer import ImageWriter
-except ImportError:  # pragma: no cover
-    barcode = None  # type: ignore
-    ImageWriter = None  # type: ignore
+# Dimensões FEBRABAN: módulo fino de 0,254 mm (largura total ~103 mm) e 13 mm de altura
+MODULO_BARRA = 0.254 * mm
+ALTURA_BARRA = 13 * mm
+TITULO_PDF = "Guia da Previdência Social"
+
+# Streams só com Flate, sem a camada ASCII85 (+25%); o PDF trafega por HTTP, que é binário.
+# A opção do ReportLab é global ao processo, por isso vale para todos os perfis.
+rl_config.useA85 = 0
+
+
+@dataclass(frozen=True)
+class PerfilPDF:
+    """
+    Opções de saída do PDF.
+
+    As fontes usadas são sempre as standard-14 (Helvetica), que não são
+    embutidas no arquivo; o perfil controla compressão e metadados.
+    """
+
+    nome: str
+    compressao: bool = True
+    # Sem timestamp e com /ID derivado do conteúdo: mesma guia gera os mesmos bytes
+    invariante: bool = True
+    metadados_completos: bool = False
+
+
+PERFIS_PDF: Dict[str, PerfilPDF] = {
+    perfil.nome: perfil
+    for perfil in (
+        # Mídia do WhatsApp: menor arquivo possível, dicionário /Info só com o título
+        PerfilPDF("whatsapp-compact"),
+        # Impressão/arquivo: autor, assunto, produtor e datas de criação preservados
+        PerfilPDF("print", invariante=False, metadados_completos=True),
+    )
+}
+PERFIL_PADRAO = "whatsapp-compact"
+# Guia fictícia usada só para aquecer o ReportLab no startup
+GUIA_AQUECIMENTO = ({"nome": "Aquecimento", "nit": "170.33259.50-4", "whatsapp": "+5500000000000"}, 1.0, "1007", "01/2025")
+
+
+def obter_perfil_pdf(nome: str) -> PerfilPDF:
+    try:
+        return PERFIS_PDF[nome]
+    except KeyError:
+        raise ValueError(f"Perfil de PDF desconhecido: {nome} (opcoes: {', '.join(PERFIS_PDF)})") from None
+
+
+class _InfoEnxuta(PDFInfo):
+    """/Info apenas com o título (sem Producer, Creator, datas, Subject, Keywords)."""
+
+    def format(self, document):
+        return PDFDictionary({"Title": PDFString(self.title)}).format(document)
+
+
+class _SaidaPDF:
+    """
+    Destino de escrita que guarda os buffers recebidos sem copiá-los.
+
+    O ReportLab serializa o documento inteiro em um único `write` no `save()`;
+    com um BytesIO esse buffer seria copiado na escrita e de novo no `read()`.
+    """
+
+    def __init__(self) -> None:
+        self._partes: List[bytes] = []
+
+    def write(self, dados: Union[bytes, bytearray]) -> int:
+        self._partes.append(dados)
+        return len(dados)
+
+    def conteudo(self) -> bytes:
+        if len(self._partes) == 1 and isinstance(self._partes[0], bytes):
+            return self._partes[0]
+        return b"".join(self._partes)
 
 
 class GPSGenerator:
     """Responsável por gerar o PDF da guia GPS."""
 
-    def gerar_guia(self, dados_contribuinte: dict[str, Any], valor: float, codigo: str, competencia: str) -> bytes:
+    def __init__(self, perfil: str = PERFIL_PADRAO) -> None:
+        self.perfil = obter_perfil_pdf(perfil)
+        self.aquecimento: Optional[Dict[str, float]] = None
+
+    def aquecer(self) -> Dict[str, float]:
+        """
+        Renderiza uma guia fictícia em cada perfil para carregar módulos e métricas
+        de fonte do ReportLab (cache global do processo, vale para todas as threads).
+
+        Mede a primeira renderização (fria) e uma repetição (quente).
+        """
+        inicio = time.perf_counter()
+        self.gerar_guia(*GUIA_AQUECIMENTO)
+        frio = time.perf_counter() - inicio
+
+        for nome in PERFIS_PDF:
+            self.gerar_guia(*GUIA_AQUECIMENTO, perfil=nome)
+
+        inicio = time.perf_counter()
+        self.gerar_guia(*GUIA_AQUECIMENTO)
+        quente = time.perf_counter() - inicio
+
+        self.aquecimento = {"frio_ms": round(frio * 1000, 2), "quente_ms": round(quente * 1000, 2)}
+        return self.aquecimento
+
+    def metricas(self) -> Dict[str, Any]:
+        return {"perfil": self.perfil.nome, "aquecido": self.aquecimento is not None, "aquecimento": self.aquecimento}
+
+    def gerar_guia(
+        self,
+        dados_contribuinte: dict[str, Any],
+        valor: float,
+        codigo: str,
+        competencia: str,
+        perfil: Optional[str] = None,
+    ) -> bytes:
         """
         Gera PDF da guia GPS e retorna bytes.
         """
-
-        buffer = BytesIO()
-        pdf = canvas.Canvas(buffer, pagesize=A4)
+        saida = _SaidaPDF()
+        self.gerar_guia_em(saida, dados_contribuinte, valor, codigo, competencia, perfil=perfil)
+        return saida.conteudo()
+
+    def gerar_guia_em(
+        self,
+        destino: BinaryIO,
+        dados_contribuinte: dict[str, Any],
+        valor: float,
+        codigo: str,
+        competencia: str,
+        perfil: Optional[str] = None,
+    ) -> None:
+        """Gera o PDF da guia GPS escrevendo em `destino` (qualquer objeto com `write`)."""
+        pdf = self._novo_canvas(destino, obter_perfil_pdf(perfil) if perfil else self.perfil)
         largura, altura = A4
         margem = 20 * mm
 
-        pdf.setTitle("Guia da Previdência Social")
-
         # Cabeçalho
         pdf.setFont("Helvetica-Bold", 16)
         pdf.drawString(margem, altura - margem, "GUIA DA PREVIDÊNCIA SOCIAL (GPS)")
@@ -62,21 +177,60 @@ class GPSGenerator:
             y -= 8 * mm
 
         pdf.setFont("Helvetica", 9)
-        pdf.drawString(
-            margem,
-            y,
-            "Pague a GPS em bancos, casas lotéricas ou via internet banking até a data de vencimento.",
-        )
-
-        y -= 15 * mm
-
-        # Simples representação do código em vez de gerar barcode
-        pdf.setFont("Helvetica-Bold", 11)
-        codigo_texto = f"{codigo}{competencia.replace('/', '')}{int(valor*100):011d}"
-        pdf.drawString(margem, y, f"Código de Barras: {codigo_texto}")
+        # Lido do módulo a cada guia: a rota usa a mesma flag para o status da emissão
+        if not layout_barras.CAMPO_LIVRE_HOMOLOGADO:
+            # Campo livre ainda não conferido com o layout oficial: nada que um banco possa ler
+            pdf.drawString(
+                margem,
+                y,
+                "Documento de conferência. Para pagar, gere a GPS oficial no SAL da Receita Federal ou no Meu INSS.",
+            )
+            y -= 15 * mm
+            pdf.setFont("Helvetica-Bold", 14)
+            pdf.drawString(margem, y, "SEM VALOR PARA PAGAMENTO")
+        else:
+            pdf.drawString(
+                margem,
+                y,
+                "Pague a GPS em bancos, casas lotéricas ou via internet banking até a data de vencimento.",
+            )
+            y -= 15 * mm
+            codigo_barras = montar_codigo_barras(
+                codigo,
+                competencia,
+                valor,
+                identificador=dados_contribuinte.get("nit") or dados_contribuinte.get("cpf") or "",
+            )
+            pdf.setFont("Helvetica-Bold", 11)
+            pdf.drawString(margem, y, linha_digitavel(codigo_barras))
+            y -= 3 * mm + ALTURA_BARRA
+            _desenhar_itf(pdf, margem, y, codigo_barras)
 
         pdf.showPage()
         pdf.save()
-        buffer.seek(0)
-        return buffer.read()
 
+    @staticmethod
+    def _novo_canvas(destino: BinaryIO, perfil: PerfilPDF) -> canvas.Canvas:
+        pdf = canvas.Canvas(
+            destino,
+            pagesize=A4,
+            pageCompression=int(perfil.compressao),
+            invariant=int(perfil.invariante),
+        )
+        if perfil.metadados_completos:
+            pdf.setAuthor("GuiasMEI")
+            pdf.setSubject("Guia de recolhimento do contribuinte individual")
+            pdf.setCreator("GuiasMEI - Backend INSS")
+        else:
+            pdf._doc.info = _InfoEnxuta()
+        pdf.setTitle(TITULO_PDF)
+        return pdf
+
+
+def _desenhar_itf(pdf: canvas.Canvas, x: float, y: float, codigo_barras: str) -> None:
+    """Desenha o ITF como retângulos vetoriais em um único path (sem imagem raster)."""
+    barras, _ = barras_itf(codigo_barras)
+    caminho = pdf.beginPath()
+    for deslocamento, largura in barras:
+        caminho.rect(x + deslocamento * MODULO_BARRA, y, largura * MODULO_BARRA, ALTURA_BARRA)
+    pdf.drawPath(caminho, stroke=0, fill=1)
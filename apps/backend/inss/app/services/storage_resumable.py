@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+import base64
+from typing import AsyncIterator, Dict, Optional, Union
+
+import httpx
+
+from .storage_upload import PoliticaRetentativa, com_retentativas
+
+# O Supabase Storage exige chunks de exatamente 6 MiB no upload resumable (exceto o último)
+TAMANHO_CHUNK_TUS = 6 * 1024 * 1024
+VERSAO_TUS = "1.0.0"
+# Tamanho de cada escrita no socket dentro de um chunk
+TAMANHO_ESCRITA = 64 * 1024
+
+
+def _metadados_tus(metadados: Dict[str, str]) -> str:
+    return ",".join(
+        f"{chave} {base64.b64encode(valor.encode('utf-8')).decode('ascii')}" for chave, valor in metadados.items()
+    )
+
+
+async def _fatias(visao: memoryview) -> AsyncIterator[memoryview]:
+    for inicio in range(0, visao.nbytes, TAMANHO_ESCRITA):
+        yield visao[inicio : inicio + TAMANHO_ESCRITA]
+
+
+class UploadResumable:
+    """
+    Upload resumable (protocolo TUS) para o Supabase Storage.
+
+    O conteúdo é enviado em fatias de `memoryview` sobre o mesmo buffer, então o
+    upload não cria uma segunda cópia do arquivo em memória.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        chave: str,
+        timeout: float = 15.0,
+        tamanho_chunk: int = TAMANHO_CHUNK_TUS,
+        cliente: Optional[httpx.AsyncClient] = None,
+        politica: Optional[PoliticaRetentativa] = None,
+    ) -> None:
+        self.endpoint = f"{url.rstrip('/')}/storage/v1/upload/resumable"
+        self.chave = chave
+        self.timeout = timeout
+        self.tamanho_chunk = tamanho_chunk
+        self._cliente = cliente
+        # Sem política: uma tentativa por chunk (comportamento anterior)
+        self.politica = politica or PoliticaRetentativa(tentativas=1)
+
+    def _headers(self) -> Dict[str, str]:
+        return {
+            "authorization": f"Bearer {self.chave}",
+            "apikey": self.chave,
+            "tus-resumable": VERSAO_TUS,
+        }
+
+    async def enviar(
+        self,
+        bucket: str,
+        caminho: str,
+        conteudo: Union[bytes, memoryview],
+        content_type: str = "application/pdf",
+        upsert: bool = True,
+        cache_control: Optional[str] = None,
+    ) -> None:
+        visao = memoryview(conteudo).cast("B")
+        total = visao.nbytes
+        cliente = self._cliente or httpx.AsyncClient(timeout=self.timeout)
+        try:
+            metadados = {"bucketName": bucket, "objectName": caminho, "contentType": content_type}
+            if cache_control:
+                metadados["cacheControl"] = cache_control
+            criacao = await cliente.post(
+                self.endpoint,
+                headers={
+                    **self._headers(),
+                    "upload-length": str(total),
+                    "x-upsert": "true" if upsert else "false",
+                    "upload-metadata": _metadados_tus(metadados),
+                },
+            )
+            if criacao.status_code == 409 and not upsert:
+                return  # objeto já existe
+            criacao.raise_for_status()
+            destino = httpx.URL(self.endpoint).join(criacao.headers["location"])
+
+            deslocamento = 0
+            while deslocamento < total:
+                retomar = False
+
+                async def _chunk() -> int:
+                    nonlocal retomar
+                    # Só a partir da segunda tentativa consulta o offset gravado no servidor
+                    consultar, retomar = retomar, True
+                    return await self._enviar_chunk(cliente, destino, visao, deslocamento, consultar)
+
+                deslocamento = await com_retentativas(_chunk, self.politica)
+        finally:
+            if self._cliente is None:
+                await cliente.aclose()
+
+    async def _enviar_chunk(
+        self, cliente: httpx.AsyncClient, destino: httpx.URL, visao: memoryview, deslocamento: int, retomar: bool
+    ) -> int:
+        if retomar:
+            # Depois de uma falha o servidor pode ter gravado parte do chunk: retoma do offset dele
+            atual = await cliente.head(destino, headers=self._headers())
+            atual.raise_for_status()
+            deslocamento = int(atual.headers.get("upload-offset", deslocamento))
+            if deslocamento >= visao.nbytes:
+                return deslocamento
+        fatia = visao[deslocamento : deslocamento + self.tamanho_chunk]
+        resposta = await cliente.patch(
+            destino,
+            content=_fatias(fatia),
+            headers={
+                **self._headers(),
+                "content-length": str(fatia.nbytes),
+                "upload-offset": str(deslocamento),
+                "content-type": "application/offset+octet-stream",
+            },
+        )
+        resposta.raise_for_status()
+        return int(resposta.headers.get("upload-offset", deslocamento + fatia.nbytes))
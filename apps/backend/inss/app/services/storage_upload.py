@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import random
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Optional, TypeVar, Union
+from urllib.parse import quote
+
+import httpx
+
+from .circuit_breaker import CircuitoAbertoError
+
+T = TypeVar("T")
+
+
+class UploadStorageError(RuntimeError):
+    """Upload não concluído (ou conteúdo divergente) depois de todas as tentativas."""
+
+    def __init__(self, caminho: str, motivo: str) -> None:
+        super().__init__(f"Falha no upload de '{caminho}': {motivo}")
+        self.caminho = caminho
+        self.motivo = motivo
+
+
+def e_retentavel(exc: BaseException) -> bool:
+    """Rede, timeout, 429 e 5xx valem nova tentativa; demais 4xx e circuito aberto não."""
+    if isinstance(exc, (CircuitoAbertoError, UploadStorageError)):
+        return False
+    if isinstance(exc, (httpx.TransportError, asyncio.TimeoutError, TimeoutError)):
+        return True
+    resposta = getattr(exc, "response", None)
+    status = getattr(resposta, "status_code", None) or getattr(exc, "status", None)
+    try:
+        status = int(status)
+    except (TypeError, ValueError):
+        return True
+    return status == 429 or status >= 500
+
+
+@dataclass
+class PoliticaRetentativa:
+    """Backoff exponencial com jitter completo (espera sorteada entre 0 e o teto)."""
+
+    tentativas: int = 4
+    espera_inicial: float = 0.5
+    fator: float = 2.0
+    espera_maxima: float = 8.0
+
+    def espera(self, tentativa: int, sorteio: Callable[[], float] = random.random) -> float:
+        teto = min(self.espera_maxima, self.espera_inicial * self.fator ** (tentativa - 1))
+        return teto * sorteio()
+
+
+async def com_retentativas(
+    func: Callable[[], Awaitable[T]],
+    politica: PoliticaRetentativa,
+    dormir: Callable[[float], Awaitable[None]] = asyncio.sleep,
+) -> T:
+    """Executa `func` até `politica.tentativas` vezes, esperando entre falhas retentáveis."""
+    tentativa = 1
+    while True:
+        try:
+            return await func()
+        except Exception as exc:
+            if tentativa >= politica.tentativas or not e_retentavel(exc):
+                raise
+            espera = politica.espera(tentativa)
+            print(f"[WARN] Storage falhou ({type(exc).__name__}), tentativa {tentativa + 1} em {espera:.2f}s")
+            await dormir(espera)
+            tentativa += 1
+
+
+async def verificar_objeto(
+    cliente: httpx.AsyncClient,
+    url: str,
+    chave: str,
+    bucket: str,
+    caminho: str,
+    conteudo: Union[bytes, memoryview],
+    publico: bool = False,
+) -> None:
+    """
+    Confere o objeto gravado com um HEAD: tamanho sempre e MD5 quando o ETag é
+    simples (uploads em partes têm ETag composto "<hash>-<partes>", sem MD5 do todo).
+
+    Em bucket público o HEAD vai pela URL pública, que não depende de RLS de SELECT.
+    """
+    acesso = "public" if publico else "authenticated"
+    resposta = await cliente.head(
+        f"{url.rstrip('/')}/storage/v1/object/{acesso}/{bucket}/{quote(caminho)}",
+        headers={"authorization": f"Bearer {chave}", "apikey": chave},
+    )
+    resposta.raise_for_status()
+    tamanho = memoryview(conteudo).nbytes
+    tamanho_gravado = resposta.headers.get("content-length")
+    if tamanho_gravado is not None and int(tamanho_gravado) != tamanho:
+        raise UploadStorageError(caminho, f"tamanho gravado {tamanho_gravado} != {tamanho}")
+    etag = resposta.headers.get("etag", "").removeprefix("W/").strip('"')
+    if len(etag) == 32 and "-" not in etag and etag != hashlib.md5(conteudo).hexdigest():
+        raise UploadStorageError(caminho, "ETag diverge do MD5 do conteudo")
+
+
+class MotorUpload:
+    """
+    Retentativas e verificação de integridade dos uploads, com paralelismo limitado
+    entre arquivos (o upload resumable do Supabase aceita só chunks sequenciais).
+    """
+
+    def __init__(
+        self,
+        url: str,
+        chave: str,
+        politica: Optional[PoliticaRetentativa] = None,
+        paralelismo: int = 4,
+        timeout: float = 15.0,
+        cliente: Optional[httpx.AsyncClient] = None,
+    ) -> None:
+        self.url = url
+        self.chave = chave
+        self.politica = politica or PoliticaRetentativa()
+        self.paralelismo = max(1, paralelismo)
+        self.timeout = timeout
+        self._cliente = cliente
+        self._vagas: Optional[asyncio.Semaphore] = None
+
+    @property
+    def vagas(self) -> asyncio.Semaphore:
+        # Criado sob demanda: o semáforo fica preso ao loop em que é usado
+        if self._vagas is None:
+            self._vagas = asyncio.Semaphore(self.paralelismo)
+        return self._vagas
+
+    async def executar(self, func: Callable[[], Awaitable[T]]) -> T:
+        return await com_retentativas(func, self.politica)
+
+    async def verificar(
+        self, bucket: str, caminho: str, conteudo: Union[bytes, memoryview], publico: bool = False
+    ) -> None:
+        async def _verificar() -> None:
+            cliente = self._cliente or httpx.AsyncClient(timeout=self.timeout)
+            try:
+                await verificar_objeto(cliente, self.url, self.chave, bucket, caminho, conteudo, publico)
+            finally:
+                if self._cliente is None:
+                    await cliente.aclose()
+
+        await self.executar(_verificar)
@@ -1,19 +1,144 @@
 from __future__ import annotations
 
 import asyncio
-from typing import Any, Dict, List, Optional
+import base64
+import hashlib
+import hmac
+import json
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Tuple, Type, TypeVar, Union
+from urllib.parse import quote
 
 from ..config import get_settings
+from ..models.registros import GuiaHistorico, Usuario, colunas as colunas_de, decodificar
+from .circuit_breaker import get_circuit_breaker
+from .outbox import CHAVES_NATURAIS, erro_permanente
+from .storage_resumable import TAMANHO_CHUNK_TUS, UploadResumable
+from .storage_upload import MotorUpload, PoliticaRetentativa, UploadStorageError
+
+TABELA_GUIAS = "guias_inss"
+HISTORICO_COLUNAS = colunas_de(GuiaHistorico)
+USUARIO_COLUNAS = colunas_de(Usuario)
+
+T = TypeVar("T")
+HISTORICO_LIMITE_MAXIMO = 100
+
+
+class LoteRecusadoError(RuntimeError):
+    """
+    Lotes de `create_records_bulk` recusados pelo banco (FK, NOT NULL, check...).
+
+    `falhas` traz, por lote recusado, os índices das linhas de entrada e o erro;
+    `registros` segue a ordem da entrada, com None nas linhas não gravadas.
+    """
+
+    def __init__(
+        self,
+        tabela: str,
+        falhas: List[Tuple[List[int], Exception]],
+        registros: List[Optional[Dict[str, Any]]],
+    ) -> None:
+        linhas = sum(len(indices) for indices, _ in falhas)
+        super().__init__(f"{len(falhas)} lote(s) ({linhas} linha(s)) recusado(s) em '{tabela}': {falhas[0][1]}")
+        self.tabela = tabela
+        self.falhas = falhas
+        self.registros = registros
+
+
+def _falha_supabase(exc: BaseException) -> bool:
+    """Erros de negocio (PostgREST/Storage 4xx) nao indicam backend fora do ar."""
+    status = getattr(exc, "status", None)
+    if isinstance(status, int) and status < 500:
+        return False
+    return type(exc).__name__ != "APIError"
+
+
+def _objeto_duplicado(exc: BaseException) -> bool:
+    """Storage responde 409/Duplicate quando o objeto já existe (sem upsert)."""
+    return str(getattr(exc, "status", "")) == "409" or getattr(exc, "code", None) == "Duplicate"
+
+
+def _b64url(dados: bytes) -> str:
+    return base64.urlsafe_b64encode(dados).decode("ascii").rstrip("=")
+
+
+def caminho_por_conteudo(conteudo: Union[bytes, memoryview], prefixo: str, extensao: str = "pdf") -> str:
+    """
+    Caminho determinístico derivado do SHA-256 do conteúdo.
+
+    O mesmo arquivo sempre cai no mesmo objeto, então reenvios não duplicam dados
+    e a URL continua válida no cache da CDN.
+    """
+    digest = hashlib.sha256(conteudo).hexdigest()
+    return f"{prefixo}/{digest[:2]}/{digest}.{extensao}"
+
+
+def codificar_cursor(created_at: str, registro_id: str) -> str:
+    """Codifica a posicao (created_at, id) de uma pagina em um cursor opaco."""
+    bruto = json.dumps([created_at, registro_id], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(bruto).decode("ascii").rstrip("=")
+
+
+def decodificar_cursor(cursor: str) -> tuple[str, str]:
+    """
+    Decodifica um cursor gerado por `codificar_cursor`.
+
+    Os campos vão para o filtro `or` do PostgREST, então só passam um timestamp
+    ISO 8601 e um UUID; qualquer outro conteúdo é recusado com ValueError.
+    """
+    try:
+        preenchido = cursor + "=" * (-len(cursor) % 4)
+        created_at, registro_id = json.loads(base64.urlsafe_b64decode(preenchido))
+        datetime.fromisoformat(created_at)
+        registro_id = str(uuid.UUID(registro_id))
+    except Exception as exc:
+        raise ValueError("Cursor de paginacao invalido") from exc
+    return created_at, registro_id
 
 
 class SupabaseService:
     """Servicos utilitarios para acesso ao Supabase com fallback offline."""
 
-    def __init__(self, url: Optional[str] = None, key: Optional[str] = None) -> None:
+    def __init__(
+        self,
+        url: Optional[str] = None,
+        key: Optional[str] = None,
+        outbox: Optional[Any] = None,
+    ) -> None:
         settings = get_settings()
         self.url = url or str(settings.supabase_url)
         self.key = key or settings.supabase_key
         self._client: Any = None
+        self._outbox = outbox
+        self._circuito_rest = get_circuit_breaker("supabase_rest", e_falha=_falha_supabase)
+        self._circuito_storage = get_circuit_breaker("supabase_storage", e_falha=_falha_supabase)
+        self.limiar_resumable = settings.storage_resumable_limiar
+        politica = PoliticaRetentativa(
+            tentativas=settings.storage_upload_tentativas,
+            espera_inicial=settings.storage_upload_espera_inicial,
+            espera_maxima=settings.storage_upload_espera_maxima,
+        )
+        self._upload_resumable = UploadResumable(
+            self.url, self.key, timeout=settings.storage_timeout, politica=politica
+        )
+        self._motor_upload = MotorUpload(
+            self.url,
+            self.key,
+            politica=politica,
+            paralelismo=settings.storage_upload_paralelismo,
+            timeout=settings.storage_timeout,
+        )
+        self.cache_control = str(settings.storage_cache_control)
+        self.verificar_upload = settings.storage_upload_verificar
+        self.lote_tamanho = settings.supabase_lote_tamanho
+        self.lote_paralelismo = settings.supabase_lote_paralelismo
+        # Single-flight: requisições simultâneas do mesmo número compartilham a mesma ida ao banco
+        self._usuarios_em_voo: Dict[str, asyncio.Future] = {}
+        self._rpc_usuario_disponivel = True
+        self.jwt_secret = settings.supabase_jwt_secret
+        self.url_assinada_ttl = settings.storage_url_assinada_ttl
 
     @property
     def client(self):
@@ -30,108 +155,505 @@ class SupabaseService:
 
         return self._client if self._client else None
 
+    def tentar_reconectar(self) -> None:
+        """Permite nova tentativa de criar o cliente apos uma falha anterior."""
+        if self._client is False:
+            self._client = None
+
+    @property
+    def outbox(self):
+        """Outbox local usado em modo degradado (None quando desabilitado)."""
+        if self._outbox is None:
+            from .outbox import get_offline_outbox
+
+            self._outbox = get_offline_outbox() or False
+        return self._outbox or None
+
+    async def _registrar_offline(self, table: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Gera id/created_at locais e grava a escrita no outbox para replay posterior."""
+        registro = {
+            "id": str(uuid.uuid4()),
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            **data,
+        }
+        if self.outbox:
+            try:
+                await asyncio.to_thread(self.outbox.registrar, table, registro)
+            except Exception as exc:  # pragma: no cover
+                print(f"[ERROR] Erro ao gravar outbox local: {str(exc)[:60]}...")
+        return registro
+
     async def create_record(self, table: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Insere `data` e retorna o registro gravado.
+
+        Falhas transitórias (rede, timeout, 5xx, circuito aberto) vão para o outbox
+        local; erros permanentes do banco (FK, NOT NULL, check) são relançados.
+
+        O `id` é gerado aqui, antes da primeira tentativa: um insert abandonado pelo
+        timeout ainda pode ser gravado pela thread, e o replay do outbox com o mesmo
+        `id` (upsert ignorando duplicados) não cria a linha de novo. Quando o PostgREST
+        não devolve a linha (RLS sem SELECT), retorna os dados enviados, com esse `id`.
+        """
+        if not data.get("id"):
+            data = {"id": str(uuid.uuid4()), **data}
         if not self.client:
-            print("[WARN] Supabase indisponivel - criando registro em memoria")
-            return data
+            print("[WARN] Supabase indisponivel - registro gravado no outbox local")
+            return await self._registrar_offline(table, data)
 
         def _create():
             return self.client.table(table).insert(data).execute()
 
         try:
-            result = await asyncio.to_thread(_create)
-            return result.data[0] if result.data else {}
-        except Exception as exc:  # pragma: no cover
-            print(f"[ERROR] Erro ao criar registro: {str(exc)[:60]}...")
-            return data
+            result = await self._circuito_rest.chamar(lambda: asyncio.to_thread(_create))
+            return result.data[0] if result.data else data
+        except Exception as exc:
+            print(f"[ERROR] Erro ao criar registro em {table}: {str(exc)[:60]}...")
+            if erro_permanente(exc):
+                raise
+            return await self._registrar_offline(table, data)
 
-    async def get_records(
-        self, table: str, filters: Optional[Dict[str, Any]] = None
+    async def create_records_bulk(
+        self,
+        table: str,
+        rows: Sequence[Dict[str, Any]],
+        chunk_size: Optional[int] = None,
+        on_conflict: Optional[str] = None,
     ) -> List[Dict[str, Any]]:
+        """
+        Insere `rows` em inserts multi-linha de até `chunk_size` linhas, com no máximo
+        `supabase_lote_paralelismo` lotes simultâneos.
+
+        Retorna um registro por linha de entrada, na mesma ordem. Em tabelas com chave
+        natural (ou com `on_conflict`) grava via upsert ignore-duplicates pela chave:
+        linhas já existentes não são alteradas e voltam como estão no banco (um merge
+        por lote gravaria NULL nas colunas que faltam em parte das linhas). Nas demais
+        o `id` é gerado aqui e serve para casar o retorno. Lotes com
+        falha transitória vão para o outbox local, como em `create_record`; lotes
+        recusados pelo banco levantam `LoteRecusadoError` depois que os demais terminam.
+        """
+        if not rows:
+            return []
+        chave = on_conflict or CHAVES_NATURAIS.get(table)
+        if chave:
+            if any(linha.get(chave) is None for linha in rows):
+                raise ValueError(f"Todas as linhas de '{table}' precisam de '{chave}'")
+            # Um upsert não pode tocar a mesma linha duas vezes: repetidas são mescladas
+            unicas: Dict[Any, Dict[str, Any]] = {}
+            for linha in rows:
+                unicas[linha[chave]] = {**unicas.get(linha[chave], {}), **linha}
+            preparadas = list(unicas.values())
+        else:
+            chave = "id"
+            preparadas = [linha if linha.get("id") else {"id": str(uuid.uuid4()), **linha} for linha in rows]
+
+        tamanho = chunk_size or self.lote_tamanho
+        lotes = [preparadas[inicio : inicio + tamanho] for inicio in range(0, len(preparadas), tamanho)]
+        vagas = asyncio.Semaphore(self.lote_paralelismo)
+        upsert = chave != "id"
+
+        async def _gravar(lote: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+            if not self.client:
+                return [await self._registrar_offline(table, linha) for linha in lote]
+
+            def _insert():
+                tabela = self.client.table(table)
+                if not upsert:
+                    return tabela.insert(lote, default_to_null=False).execute().data or []
+                inseridos = (
+                    tabela.upsert(lote, on_conflict=chave, ignore_duplicates=True, default_to_null=False).execute().data
+                    or []
+                )
+                # Linhas que já existiam não voltam no ignore-duplicates: busca como estão no banco
+                novas = {registro.get(chave) for registro in inseridos}
+                existentes = [linha[chave] for linha in lote if linha[chave] not in novas]
+                if not existentes:
+                    return inseridos
+                return inseridos + (self.client.table(table).select("*").in_(chave, existentes).execute().data or [])
+
+            async with vagas:
+                try:
+                    result = await self._circuito_rest.chamar(lambda: asyncio.to_thread(_insert))
+                except Exception as exc:
+                    print(f"[ERROR] Erro no lote de {len(lote)} registro(s) em {table}: {str(exc)[:60]}...")
+                    if erro_permanente(exc):
+                        raise
+                    return [await self._registrar_offline(table, linha) for linha in lote]
+            return result
+
+        gravados: Dict[Any, Dict[str, Any]] = {}
+        recusados: List[Tuple[set, Exception]] = []
+        resultados = await asyncio.gather(*(_gravar(lote) for lote in lotes), return_exceptions=True)
+        for lote, registros in zip(lotes, resultados):
+            if isinstance(registros, BaseException):
+                if not isinstance(registros, Exception):
+                    raise registros
+                recusados.append(({linha[chave] for linha in lote}, registros))
+                continue
+            por_chave = {registro.get(chave): registro for registro in registros}
+            for linha in lote:
+                gravados[linha[chave]] = por_chave.get(linha[chave], linha)
+
+        entradas = rows if upsert else preparadas
+        saida = [gravados.get(linha[chave]) for linha in entradas]
+        if recusados:
+            falhas = [
+                ([indice for indice, linha in enumerate(entradas) if linha[chave] in chaves], exc)
+                for chaves, exc in recusados
+            ]
+            raise LoteRecusadoError(table, falhas, saida)
+        return saida
+
+    async def get_records(
+        self,
+        table: str,
+        filters: Optional[Dict[str, Any]] = None,
+        colunas: Optional[str] = None,
+        tipo: Optional[Type[T]] = None,
+        limite: Optional[int] = None,
+    ) -> List[Any]:
+        """
+        Busca registros com `eq` em cada filtro.
+
+        `colunas` restringe o `select` (padrão `*`; com `tipo`, os campos do tipo) e
+        `tipo` decodifica as linhas na dataclass em vez de devolver dicts.
+        """
         if not self.client:
             return []
+        projecao = colunas or (colunas_de(tipo) if tipo is not None else "*")
 
         def _get():
-            query = self.client.table(table).select("*")
+            query = self.client.table(table).select(projecao)
             if filters:
                 for key, value in filters.items():
                     query = query.eq(key, value)
+            if limite is not None:
+                query = query.limit(limite)
             return query.execute()
 
         try:
-            result = await asyncio.to_thread(_get)
-            return result.data or []
+            result = await self._circuito_rest.chamar(lambda: asyncio.to_thread(_get))
         except Exception as exc:  # pragma: no cover
             print(f"[ERROR] Erro ao buscar registros: {str(exc)[:60]}...")
             return []
+        linhas = result.data or []
+        return decodificar(tipo, linhas) if tipo is not None else linhas
+
+    def url_publica(self, bucket: str, caminho: str) -> str:
+        """URL pública do objeto, montada localmente (sem chamada ao Storage)."""
+        return f"{self.url.rstrip('/')}/storage/v1/object/public/{bucket}/{quote(caminho)}"
+
+    def url_assinada(self, bucket: str, caminho: str, agora: Optional[float] = None) -> str:
+        """
+        URL assinada do objeto, com o JWT assinado localmente com o segredo do projeto.
+
+        A emissão é alinhada em janelas de `storage_url_assinada_ttl`: dentro da mesma
+        janela a URL é idêntica (cacheável pela CDN) e vale por mais um TTL inteiro.
+        """
+        if not self.jwt_secret:
+            raise RuntimeError("SUPABASE_JWT_SECRET nao configurado")
+        ttl = self.url_assinada_ttl
+        emitido = int(agora if agora is not None else time.time()) // ttl * ttl
+        cabecalho = _b64url(b'{"alg":"HS256","typ":"JWT"}')
+        carga = _b64url(
+            json.dumps({"url": f"{bucket}/{caminho}", "iat": emitido, "exp": emitido + 2 * ttl}, separators=(",", ":")).encode()
+        )
+        assinatura = _b64url(hmac.new(self.jwt_secret.encode(), f"{cabecalho}.{carga}".encode(), hashlib.sha256).digest())
+        return (
+            f"{self.url.rstrip('/')}/storage/v1/object/sign/{bucket}/{quote(caminho)}"
+            f"?token={cabecalho}.{carga}.{assinatura}"
+        )
+
+    def url_midia(self, bucket: str, caminho: str) -> str:
+        """URL assinada quando há segredo JWT configurado (bucket privado); senão, pública."""
+        if self.jwt_secret:
+            return self.url_assinada(bucket, caminho)
+        return self.url_publica(bucket, caminho)
 
     async def upload_file(
         self,
         bucket: str,
         file_path: str,
-        file_data: bytes,
+        file_data: Union[bytes, memoryview],
         content_type: str = "application/pdf",
     ) -> str:
+        """
+        Envia o arquivo com retentativas e retorna a URL de mídia. Levanta
+        `UploadStorageError` em vez de devolver uma URL que o destinatário não
+        conseguiria baixar.
+
+        Tamanho/hash do objeto gravado são conferidos (HEAD) só quando o Storage não
+        confirmou o upload: caminho resumable e objeto que já existia.
+        """
         if not self.client:
-            print("[WARN] Supabase indisponivel - arquivo nao sera armazenado")
-            return f"temp://{file_path}"
+            raise UploadStorageError(file_path, "Supabase indisponivel")
 
         try:
-            def _upload():
-                return self.client.storage.from_(bucket).upload(
-                    file_path, file_data, {"content-type": content_type}
+            tamanho = memoryview(file_data).nbytes
+            if tamanho > self.limiar_resumable:
+                # Chunks sobre o mesmo buffer, cada um com suas retentativas
+                chunks = -(-tamanho // TAMANHO_CHUNK_TUS)
+                timeout = self._circuito_storage.timeout
+                await self._circuito_storage.chamar(
+                    lambda: self._upload_resumable.enviar(
+                        bucket, file_path, file_data, content_type, upsert=False, cache_control=self.cache_control
+                    ),
+                    timeout=timeout and timeout * chunks * self._motor_upload.politica.tentativas,
                 )
+                confirmado = False
+            else:
+                conteudo = file_data if isinstance(file_data, bytes) else bytes(file_data)
 
-            await asyncio.to_thread(_upload)
+                def _upload() -> bool:
+                    try:
+                        self.client.storage.from_(bucket).upload(
+                            file_path,
+                            conteudo,
+                            {"content-type": content_type, "cache-control": self.cache_control, "upsert": "false"},
+                        )
+                    except Exception as exc:
+                        if not _objeto_duplicado(exc):
+                            raise
+                        # Objeto existente: este upload não confirma o conteúdo gravado
+                        return False
+                    return True
 
-            def _get_public_url():
-                return self.client.storage.from_(bucket).get_public_url(file_path)
+                confirmado = await self._motor_upload.executar(
+                    lambda: self._circuito_storage.chamar(lambda: asyncio.to_thread(_upload))
+                )
 
-            public_url = await asyncio.to_thread(_get_public_url)
-            if not public_url:
-                raise RuntimeError("Nao foi possivel obter URL publica do arquivo")
-            return public_url
-        except Exception as exc:  # pragma: no cover
+            if self.verificar_upload and not confirmado:
+                await self._motor_upload.verificar(bucket, file_path, file_data, publico=not self.jwt_secret)
+            return self.url_midia(bucket, file_path)
+        except UploadStorageError as exc:
+            print(f"[ERROR] {exc}")
+            raise
+        except Exception as exc:
             print(f"[ERROR] Erro ao fazer upload: {str(exc)[:60]}...")
-            return f"temp://{file_path}"
+            raise UploadStorageError(file_path, f"{type(exc).__name__}: {str(exc)[:120]}") from exc
+
+    async def upload_varios(
+        self,
+        bucket: str,
+        arquivos: Sequence[Tuple[str, Union[bytes, memoryview]]],
+        content_type: str = "application/pdf",
+    ) -> List[str]:
+        """Envia vários arquivos (ex.: lote de guias, DANFSe) com paralelismo limitado."""
+
+        async def _enviar(caminho: str, dados: Union[bytes, memoryview]) -> str:
+            async with self._motor_upload.vagas:
+                return await self.upload_file(bucket, caminho, dados, content_type)
+
+        return list(await asyncio.gather(*(_enviar(caminho, dados) for caminho, dados in arquivos)))
 
     async def obter_usuario_por_whatsapp(self, whatsapp: str) -> Optional[Dict[str, Any]]:
-        """Obtem usuario pelo numero de WhatsApp."""
+        """Obtem usuario pelo numero de WhatsApp (apenas as colunas usadas pela aplicacao)."""
         if not self.client:
             print("[WARN] Supabase indisponivel - retornando None")
             return None
 
         try:
-            records = await self.get_records("usuarios", {"whatsapp": whatsapp})
+            records = await self.get_records("usuarios", {"whatsapp": whatsapp}, colunas=USUARIO_COLUNAS, limite=1)
             return records[0] if records else None
         except Exception as exc:  # pragma: no cover
             print(f"[ERROR] Erro ao obter usuario: {str(exc)[:60]}...")
             return None
 
+    async def obter_usuario(self, whatsapp: str) -> Optional[Usuario]:
+        """Como `obter_usuario_por_whatsapp`, decodificado em `Usuario`."""
+        if not self.client:
+            print("[WARN] Supabase indisponivel - retornando None")
+            return None
+        records = await self.get_records("usuarios", {"whatsapp": whatsapp}, tipo=Usuario, limite=1)
+        return records[0] if records else None
+
     async def criar_usuario(self, data: Dict[str, Any]) -> Dict[str, Any]:
-        """Cria novo usuario."""
+        """
+        Cria novo usuario (no outbox local quando o Supabase esta indisponivel).
+
+        Dados recusados pelo banco levantam o erro do PostgREST.
+        """
+        return await self.create_record("usuarios", data)
+
+    async def obter_ou_criar_usuario(self, whatsapp: str, dados: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Retorna o usuario do número, criando-o se não existir, em uma única ida ao
+        banco (função `obter_ou_criar_usuario`: INSERT ... ON CONFLICT (whatsapp)).
+
+        Campos já preenchidos do usuario existente não são sobrescritos por `dados`.
+        """
+        em_voo = self._usuarios_em_voo.get(whatsapp)
+        if em_voo is None:
+            em_voo = asyncio.ensure_future(self._obter_ou_criar_usuario(whatsapp, dados or {}))
+            self._usuarios_em_voo[whatsapp] = em_voo
+            em_voo.add_done_callback(lambda _: self._usuarios_em_voo.pop(whatsapp, None))
+        # shield: o cancelamento de uma requisição não derruba as que esperam o mesmo resultado
+        return await asyncio.shield(em_voo)
+
+    async def _obter_ou_criar_usuario(self, whatsapp: str, dados: Dict[str, Any]) -> Dict[str, Any]:
+        novo = {"whatsapp": whatsapp, **{campo: dados.get(campo) for campo in ("nome", "cpf", "nit", "tipo_contribuinte")}}
+        if not self.client:
+            return await self.criar_usuario(novo)
+
+        if self._rpc_usuario_disponivel:
+            parametros = {f"p_{campo}": valor for campo, valor in novo.items()}
+
+            def _rpc():
+                return self.client.rpc("obter_ou_criar_usuario", parametros).execute()
+
+            try:
+                result = await self._circuito_rest.chamar(lambda: asyncio.to_thread(_rpc))
+                registro = result.data[0] if isinstance(result.data, list) else result.data
+                if registro:
+                    return registro
+            except Exception as exc:
+                if getattr(exc, "code", None) != "PGRST202":
+                    print(f"[ERROR] Erro ao obter/criar usuario: {str(exc)[:60]}...")
+                    return await self.criar_usuario(novo)
+                # Função ainda não criada no banco: segue com select + insert
+                print("[WARN] Funcao obter_ou_criar_usuario ausente no banco - usando select/insert")
+                self._rpc_usuario_disponivel = False
+
+        usuario = await self.obter_usuario_por_whatsapp(whatsapp)
+        return usuario or await self.criar_usuario(novo)
+
+    async def criar_usuarios_lote(self, usuarios: Sequence[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Cria em lote os usuarios que ainda não existem (por whatsapp); um registro por
+        entrada. Usuarios existentes não são alterados.
+        """
+        return await self.create_records_bulk("usuarios", usuarios)
+
+    async def salvar_guias_lote(self, guias: Sequence[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Salva guias em lote (cada uma com `usuario_id`); um registro por entrada."""
+        if any(not guia.get("usuario_id") for guia in guias):
+            raise ValueError("Todas as guias precisam de 'usuario_id'")
+        return await self.create_records_bulk(TABELA_GUIAS, guias)
+
+    async def salvar_guia(self, user_id: str, guia_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Salva guia no banco de dados (no outbox local quando o Supabase esta indisponivel).
+
+        Dados recusados pelo banco levantam o erro do PostgREST.
+        """
+        return await self.create_record(TABELA_GUIAS, {**guia_data, "usuario_id": user_id})
+
+    async def registrar_conversa(self, usuario_id: str, mensagem: str, resposta: str) -> None:
+        """Enfileira a conversa no buffer write-behind (sem I/O no caminho da resposta)."""
+        from .conversa_buffer import get_conversa_buffer
+
+        get_conversa_buffer().registrar(usuario_id, mensagem, resposta)
+
+    async def buscar_conversas_recentes(self, usuario_id: str, limite: int = 6) -> List[Dict[str, Any]]:
+        """Ultimos turnos de conversa do usuario, do mais antigo para o mais recente."""
         if not self.client:
-            print("[WARN] Supabase indisponivel - retornando dados em memoria")
-            return {**data, "id": f"mock-{data.get('whatsapp', 'unknown')}"}
+            return []
+
+        def _buscar():
+            return (
+                self.client.table("conversas")
+                .select("mensagem,resposta,created_at")
+                .eq("usuario_id", usuario_id)
+                .order("created_at", desc=True)
+                .limit(limite)
+                .execute()
+            )
 
         try:
-            return await self.create_record("usuarios", data)
+            result = await self._circuito_rest.chamar(lambda: asyncio.to_thread(_buscar))
         except Exception as exc:  # pragma: no cover
-            print(f"[ERROR] Erro ao criar usuario: {str(exc)[:60]}...")
-            return {**data, "id": f"error-{data.get('whatsapp', 'unknown')}"}
+            print(f"[ERROR] Erro ao buscar conversas: {str(exc)[:60]}...")
+            return []
+        return list(reversed(result.data or []))
+
+    async def buscar_historico(
+        self,
+        usuario_id: str,
+        limite: int = 20,
+        cursor: Optional[str] = None,
+        tipo: Optional[Type[Any]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Retorna uma pagina do historico de guias do usuario.
+
+        Usa paginacao por chave (keyset) sobre (usuario_id, created_at, id), apoiada
+        pelo indice idx_guias_usuario_created, e seleciona apenas as colunas exibidas.
+        Com `tipo` (ex.: `GuiaHistorico`) as guias vem decodificadas na dataclass.
+        Erros de leitura viram uma pagina vazia; `iterar_historico` os propaga.
+        """
+        limite = max(1, min(limite, HISTORICO_LIMITE_MAXIMO))
+        posicao = decodificar_cursor(cursor) if cursor else None
 
-    async def salvar_guia(self, user_id: str, guia_data: Dict[str, Any]) -> Dict[str, Any]:
-        """Salva guia no banco de dados."""
         if not self.client:
-            print("[WARN] Supabase indisponivel - guia nao sera persistida")
-            return {**guia_data, "id": "mock-guia", "user_id": user_id}
+            print("[WARN] Supabase indisponivel - historico vazio")
+            return {"guias": [], "proximo_cursor": None}
 
         try:
-            data = {**guia_data, "user_id": user_id}
-            return await self.create_record("guias", data)
+            return await self._pagina_historico(usuario_id, limite, posicao, tipo)
         except Exception as exc:  # pragma: no cover
-            print(f"[ERROR] Erro ao salvar guia: {str(exc)[:60]}...")
-            return {**guia_data, "id": "error-guia", "user_id": user_id}
+            print(f"[ERROR] Erro ao buscar historico: {str(exc)[:60]}...")
+            return {"guias": [], "proximo_cursor": None}
+
+    async def _pagina_historico(
+        self,
+        usuario_id: str,
+        limite: int,
+        posicao: Optional[Tuple[str, str]],
+        tipo: Optional[Type[Any]],
+    ) -> Dict[str, Any]:
+        if not self.client:
+            raise RuntimeError("Supabase indisponivel")
+
+        def _buscar():
+            query = (
+                self.client.table(TABELA_GUIAS)
+                .select(HISTORICO_COLUNAS)
+                .eq("usuario_id", usuario_id)
+            )
+            if posicao:
+                created_at, registro_id = posicao
+                query = query.or_(
+                    f'created_at.lt."{created_at}",'
+                    f'and(created_at.eq."{created_at}",id.lt.{registro_id})'
+                )
+            # Busca um registro a mais para saber se existe proxima pagina
+            return (
+                query.order("created_at", desc=True)
+                .order("id", desc=True)
+                .limit(limite + 1)
+                .execute()
+            )
+
+        result = await self._circuito_rest.chamar(lambda: asyncio.to_thread(_buscar))
+        guias = result.data or []
+        proximo_cursor = None
+        if len(guias) > limite:
+            guias = guias[:limite]
+            ultima = guias[-1]
+            proximo_cursor = codificar_cursor(str(ultima["created_at"]), str(ultima["id"]))
+        if tipo is not None:
+            guias = decodificar(tipo, guias)
+        return {"guias": guias, "proximo_cursor": proximo_cursor}
+
+    async def iterar_historico(
+        self, usuario_id: str, tamanho_pagina: int = HISTORICO_LIMITE_MAXIMO, tipo: Optional[Type[Any]] = None
+    ) -> AsyncIterator[Any]:
+        """
+        Percorre todo o historico pagina a pagina, sem carregar tudo em memoria.
+
+        Ao contrario de `buscar_historico`, falhas de leitura sao propagadas: uma
+        exportacao interrompida nao pode parecer completa.
+        """
+        limite = max(1, min(tamanho_pagina, HISTORICO_LIMITE_MAXIMO))
+        posicao: Optional[Tuple[str, str]] = None
+        while True:
+            pagina = await self._pagina_historico(usuario_id, limite, posicao, tipo)
+            for guia in pagina["guias"]:
+                yield guia
+            cursor = pagina["proximo_cursor"]
+            if not cursor:
+                break
+            posicao = decodificar_cursor(cursor)
 
     async def subir_pdf(self, bucket: str, caminho: str, conteudo: bytes) -> str:
         """Alias para upload_file - mantem compatibilidade retroativa."""
@@ -1,16 +1,38 @@
 from __future__ import annotations
 
 import asyncio
-import uuid
 from dataclasses import dataclass
 from typing import Optional
 
 from twilio.base.exceptions import TwilioRestException
+from twilio.http.http_client import TwilioHttpClient
 from twilio.rest import Client as TwilioClient
 
 from ..config import get_settings
 from ..utils.validators import validar_whatsapp
-from .supabase_service import SupabaseService
+from .circuit_breaker import get_circuit_breaker
+from .storage_upload import UploadStorageError
+from .supabase_service import SupabaseService, caminho_por_conteudo
+
+
+def _falha_twilio(exc: BaseException) -> bool:
+    """Erros 4xx do Twilio (numero invalido, midia recusada) nao abrem o circuito."""
+    return not (isinstance(exc, TwilioRestException) and exc.status < 500)
+
+
+class _TwilioHttpClientRedirecionado(TwilioHttpClient):
+    """Envia as chamadas de api.twilio.com para outra base (ex.: servidor falso do teste de carga)."""
+
+    ORIGEM = "https://api.twilio.com"
+
+    def __init__(self, base_url: str) -> None:
+        super().__init__()
+        self.base_url = base_url.rstrip("/")
+
+    def request(self, method, url, *args, **kwargs):  # type: ignore[override]
+        if url.startswith(self.ORIGEM):
+            url = self.base_url + url[len(self.ORIGEM):]
+        return super().request(method, url, *args, **kwargs)
 
 
 @dataclass
@@ -24,12 +46,14 @@ class WhatsAppService:
     """Integracao com WhatsApp Business API via Twilio."""
 
     def __init__(self, supabase_service: Optional[SupabaseService] = None) -> None:
+        self._circuito = get_circuit_breaker("twilio", e_falha=_falha_twilio)
         try:
             settings = get_settings()
             self.supabase_service = supabase_service or SupabaseService()
             self.account_sid = settings.twilio_account_sid
             self.auth_token = settings.twilio_auth_token
             self.remetente = settings.twilio_whatsapp_number
+            self.api_url = settings.twilio_api_url
             self.bucket_pdf = "guias"
             self._twilio_client: Optional[TwilioClient] = None
 
@@ -61,7 +85,8 @@ class WhatsAppService:
         """Lazy initialization do cliente Twilio."""
         if self._twilio_client is None and self.account_sid and self.auth_token:
             try:
-                self._twilio_client = TwilioClient(self.account_sid, self.auth_token)
+                http_client = _TwilioHttpClientRedirecionado(self.api_url) if self.api_url else None
+                self._twilio_client = TwilioClient(self.account_sid, self.auth_token, http_client=http_client)
                 print("[OK] Cliente Twilio inicializado com sucesso")
             except Exception as exc:  # pragma: no cover
                 print(f"[WARN] Problema ao conectar Twilio: {str(exc)[:60]}...")
@@ -79,21 +104,27 @@ class WhatsAppService:
             print("[WARN] WhatsApp client indisponivel - retornando mock")
             return WhatsAppMessageResult(sid="mock-sid", status="mock", media_url="mock-url")
 
-        arquivo_id = uuid.uuid4()
-        caminho_pdf = f"guias/{arquivo_id}.pdf"
-        media_url = await self.supabase_service.subir_pdf(
-            bucket=self.bucket_pdf,
-            caminho=caminho_pdf,
-            conteudo=pdf_bytes,
-        )
+        caminho_pdf = caminho_por_conteudo(pdf_bytes, prefixo="guias")
+        try:
+            media_url = await self.supabase_service.subir_pdf(
+                bucket=self.bucket_pdf,
+                caminho=caminho_pdf,
+                conteudo=pdf_bytes,
+            )
+        except UploadStorageError as exc:
+            # Sem arquivo no Storage o Twilio não teria o que baixar: não envia mídia quebrada
+            print(f"[ERROR] PDF nao enviado por WhatsApp: {exc.motivo[:60]}")
+            return WhatsAppMessageResult(sid="erro-upload", status="failed", media_url=None)
 
         try:
-            message = await asyncio.to_thread(
-                self.twilio_client.messages.create,
-                from_=self.remetente,
-                to=f"whatsapp:{numero}",
-                body=mensagem,
-                media_url=[media_url],
+            message = await self._circuito.chamar(
+                lambda: asyncio.to_thread(
+                    self.twilio_client.messages.create,
+                    from_=self.remetente,
+                    to=f"whatsapp:{numero}",
+                    body=mensagem,
+                    media_url=[media_url],
+                )
             )
         except TwilioRestException as exc:  # pragma: no cover
             print(f"[WARN] Falha ao enviar via Twilio, retornando mock: {exc.msg}")
@@ -114,11 +145,13 @@ class WhatsAppService:
             return WhatsAppMessageResult(sid="mock-sid", status="mock", media_url=None)
 
         try:
-            message = await asyncio.to_thread(
-                self.twilio_client.messages.create,
-                from_=self.remetente,
-                to=f"whatsapp:{numero}",
-                body=mensagem,
+            message = await self._circuito.chamar(
+                lambda: asyncio.to_thread(
+                    self.twilio_client.messages.create,
+                    from_=self.remetente,
+                    to=f"whatsapp:{numero}",
+                    body=mensagem,
+                )
             )
         except TwilioRestException as exc:  # pragma: no cover
             print(f"[WARN] Falha ao enviar via Twilio, retornando mock: {exc.msg}")
@@ -0,0 +1,130 @@
+"""
+Código de barras de arrecadação FEBRABAN (44 dígitos) e linha digitável da GPS.
+
+Layout usado (padrão FEBRABAN para arrecadação):
+
+    1      produto "8" (arrecadação)
+    2      segmento "5" (órgãos governamentais)
+    3      "6" = valor efetivo em reais, dígitos verificadores em módulo 10
+    4      dígito verificador geral
+    5-15   valor em centavos (11 dígitos)
+    16-19  identificação do órgão (Previdência Social)
+    20-44  campo livre: código de pagamento (4) + identificador NIT/CPF (11)
+           + competência MMAAAA (6) + zeros (4)
+
+Os dígitos verificadores (módulo 10), a linha digitável e a simbolização ITF
+(intercalado 2 de 5, razão fina:larga de 1:3) seguem o padrão FEBRABAN. O campo
+livre acima, porém, é provisório: ainda não foi conferido com o layout oficial da
+GPS nem com um código de barras real. Enquanto `CAMPO_LIVRE_HOMOLOGADO` for False
+a guia sai marcada "SEM VALOR PARA PAGAMENTO", sem barras nem linha digitável.
+"""
+
+from __future__ import annotations
+
+from typing import Dict, Tuple
+
+PRODUTO_ARRECADACAO = "8"
+SEGMENTO_GOVERNO = "5"
+VALOR_EFETIVO_MODULO_10 = "6"
+ORGAO_PREVIDENCIA = "0270"
+# Só passa a True com o layout oficial do campo livre e um teste contra GPS real
+CAMPO_LIVRE_HOMOLOGADO = False
+TAMANHO_IDENTIFICADOR = 11
+
+# Padrões ITF por dígito (0 = módulo fino, 1 = módulo largo)
+PADROES_ITF = (
+    "00110",
+    "10001",
+    "01001",
+    "11000",
+    "00101",
+    "10100",
+    "01100",
+    "00011",
+    "10010",
+    "01010",
+)
+LARGO = 3
+# Início: barra fina, espaço fino, barra fina, espaço fino; fim: barra larga, espaço fino, barra fina
+INICIO_ITF: Tuple[Tuple[int, int], ...] = ((0, 1), (2, 1))
+LARGURA_INICIO = 4
+FIM_ITF: Tuple[Tuple[int, int], ...] = ((0, LARGO), (LARGO + 1, 1))
+LARGURA_FIM = LARGO + 2
+
+
+def _montar_tabela_pares() -> Dict[str, Tuple[Tuple[Tuple[int, int], ...], int]]:
+    """Para cada par "00".."99": barras (deslocamento, largura) em módulos e largura total."""
+    tabela = {}
+    for primeiro in range(10):
+        for segundo in range(10):
+            barras = []
+            posicao = 0
+            for barra, espaco in zip(PADROES_ITF[primeiro], PADROES_ITF[segundo]):
+                largura_barra = LARGO if barra == "1" else 1
+                barras.append((posicao, largura_barra))
+                posicao += largura_barra + (LARGO if espaco == "1" else 1)
+            tabela[f"{primeiro}{segundo}"] = (tuple(barras), posicao)
+    return tabela
+
+
+TABELA_PARES_ITF = _montar_tabela_pares()
+
+
+def modulo10(numeros: str) -> int:
+    """Dígito verificador módulo 10 (pesos 2,1,2,1... da direita para a esquerda)."""
+    soma = 0
+    peso = 2
+    for caractere in reversed(numeros):
+        produto = (ord(caractere) - 48) * peso
+        soma += produto - 9 if produto > 9 else produto
+        peso = 3 - peso
+    return (10 - soma % 10) % 10
+
+
+def _somente_digitos(texto: str) -> str:
+    return "".join(caractere for caractere in texto if "0" <= caractere <= "9")
+
+
+def montar_codigo_barras(codigo_pagamento: str, competencia: str, valor: float, identificador: str = "") -> str:
+    """Monta os 44 dígitos do código de barras de arrecadação da GPS."""
+    centavos = int(round(valor * 100))
+    if not 0 <= centavos < 10**11:
+        raise ValueError("Valor fora do limite do código de barras")
+    identificador = _somente_digitos(identificador)
+    if len(identificador) > TAMANHO_IDENTIFICADOR:
+        # CNPJ/CEI (14 dígitos) não cabem no campo: truncar mudaria o contribuinte
+        raise ValueError("Identificador com mais de 11 dígitos não cabe no código de barras")
+    mes, _, ano = competencia.partition("/")
+    campo_livre = (
+        _somente_digitos(codigo_pagamento).zfill(4)[-4:]
+        + identificador.zfill(TAMANHO_IDENTIFICADOR)
+        + f"{int(mes):02d}{int(ano):04d}"
+    ).ljust(25, "0")
+    sem_dv = PRODUTO_ARRECADACAO + SEGMENTO_GOVERNO + VALOR_EFETIVO_MODULO_10 + f"{centavos:011d}" + ORGAO_PREVIDENCIA + campo_livre
+    return sem_dv[:3] + str(modulo10(sem_dv)) + sem_dv[3:]
+
+
+def linha_digitavel(codigo_barras: str) -> str:
+    """Quatro blocos de 11 dígitos, cada um seguido do seu DV módulo 10."""
+    if len(codigo_barras) != 44 or not codigo_barras.isdigit():
+        raise ValueError("Código de barras deve ter 44 dígitos")
+    blocos = (codigo_barras[inicio : inicio + 11] for inicio in range(0, 44, 11))
+    return " ".join(f"{bloco}-{modulo10(bloco)}" for bloco in blocos)
+
+
+def barras_itf(codigo: str) -> Tuple[Tuple[Tuple[int, int], ...], int]:
+    """
+    Barras ITF de `codigo` como (deslocamento, largura) em módulos finos, e a largura total.
+
+    Cada par de dígitos vem da tabela pré-calculada; só os deslocamentos são somados.
+    """
+    if len(codigo) % 2 or not codigo.isdigit():
+        raise ValueError("ITF exige quantidade par de dígitos")
+    barras = list(INICIO_ITF)
+    posicao = LARGURA_INICIO
+    for inicio in range(0, len(codigo), 2):
+        barras_par, largura_par = TABELA_PARES_ITF[codigo[inicio : inicio + 2]]
+        barras.extend((posicao + deslocamento, largura) for deslocamento, largura in barras_par)
+        posicao += largura_par
+    barras.extend((posicao + deslocamento, largura) for deslocamento, largura in FIM_ITF)
+    return tuple(barras), posicao + LARGURA_FIM
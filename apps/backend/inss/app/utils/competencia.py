@@ -0,0 +1,144 @@
+"""Competência (MM/AAAA) como valor imutável e tabela de vencimentos da GPS."""
+
+from __future__ import annotations
+
+from datetime import date, timedelta
+from functools import lru_cache
+from typing import Tuple, Union
+
+DIA_VENCIMENTO = 15
+ERRO_FORMATO = "Competência deve estar no formato MM/AAAA"
+
+# Feriados nacionais de data fixa (mês, dia); 20/11 é nacional desde a Lei 14.759/2023
+FERIADOS_FIXOS: Tuple[Tuple[int, int], ...] = (
+    (1, 1),
+    (4, 21),
+    (5, 1),
+    (9, 7),
+    (10, 12),
+    (11, 2),
+    (11, 15),
+    (11, 20),
+    (12, 25),
+)
+# Dias sem expediente bancário relativos à Páscoa: Carnaval (seg/ter),
+# Sexta-feira Santa e Corpus Christi
+DESLOCAMENTOS_PASCOA = (-48, -47, -2, 60)
+
+
+class Competencia:
+    """
+    Mês/ano de referência de uma contribuição.
+
+    Imutável e hashable; use `Competencia.parse` para converter "MM/AAAA" (o
+    resultado fica em cache, então repetir a mesma string não refaz o parse).
+    """
+
+    __slots__ = ("ano", "mes")
+
+    ano: int
+    mes: int
+
+    def __init__(self, ano: int, mes: int) -> None:
+        if not 1 <= mes <= 12 or not 1 <= ano <= 9998:
+            raise ValueError(ERRO_FORMATO)
+        object.__setattr__(self, "ano", ano)
+        object.__setattr__(self, "mes", mes)
+
+    def __setattr__(self, nome: str, valor: object) -> None:
+        raise AttributeError("Competencia é imutável")
+
+    @classmethod
+    def parse(cls, texto: Union[str, "Competencia"]) -> "Competencia":
+        if isinstance(texto, Competencia):
+            return texto
+        return _parse_competencia(texto)
+
+    @classmethod
+    def de_data(cls, dia: date) -> "Competencia":
+        return cls(dia.year, dia.month)
+
+    @property
+    def vencimento(self) -> date:
+        """Dia 15 do mês seguinte, prorrogado para o próximo dia útil bancário."""
+        return _vencimentos_do_ano(self.ano)[self.mes - 1]
+
+    def seguinte(self) -> "Competencia":
+        return Competencia(self.ano + 1, 1) if self.mes == 12 else Competencia(self.ano, self.mes + 1)
+
+    def meses_ate(self, outra: "Competencia") -> int:
+        return (outra.ano - self.ano) * 12 + (outra.mes - self.mes)
+
+    def _chave(self) -> Tuple[int, int]:
+        return (self.ano, self.mes)
+
+    def __eq__(self, outra: object) -> bool:
+        if not isinstance(outra, Competencia):
+            return NotImplemented
+        return self._chave() == outra._chave()
+
+    def __lt__(self, outra: "Competencia") -> bool:
+        return self._chave() < outra._chave()
+
+    def __le__(self, outra: "Competencia") -> bool:
+        return self._chave() <= outra._chave()
+
+    def __hash__(self) -> int:
+        return hash(self._chave())
+
+    def __str__(self) -> str:
+        return f"{self.mes:02d}/{self.ano:04d}"
+
+    def __repr__(self) -> str:
+        return f"Competencia('{self}')"
+
+
+@lru_cache(maxsize=2048)
+def _parse_competencia(texto: str) -> Competencia:
+    limpo = texto.strip()
+    if len(limpo) != 7 or limpo[2] != "/":
+        raise ValueError(ERRO_FORMATO)
+    mes, ano = limpo[:2], limpo[3:]
+    if not (mes.isascii() and mes.isdigit() and ano.isascii() and ano.isdigit()):
+        raise ValueError(ERRO_FORMATO)
+    return Competencia(int(ano), int(mes))
+
+
+def _pascoa(ano: int) -> date:
+    """Domingo de Páscoa (algoritmo de Meeus/Jones/Butcher, calendário gregoriano)."""
+    a = ano % 19
+    b, c = divmod(ano, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    mes, dia = divmod(h + l - 7 * m + 114, 31)
+    return date(ano, mes, dia + 1)
+
+
+@lru_cache(maxsize=256)
+def feriados_bancarios(ano: int) -> frozenset:
+    """Feriados nacionais e dias sem expediente bancário do ano."""
+    pascoa = _pascoa(ano)
+    fixos = {date(ano, mes, dia) for mes, dia in FERIADOS_FIXOS}
+    moveis = {pascoa + timedelta(days=deslocamento) for deslocamento in DESLOCAMENTOS_PASCOA}
+    return frozenset(fixos | moveis)
+
+
+def proximo_dia_util(dia: date) -> date:
+    while dia.weekday() >= 5 or dia in feriados_bancarios(dia.year):
+        dia += timedelta(days=1)
+    return dia
+
+
+@lru_cache(maxsize=256)
+def _vencimentos_do_ano(ano: int) -> Tuple[date, ...]:
+    """Vencimentos das 12 competências do ano, calculados uma vez por ano."""
+    vencimentos = []
+    for mes in range(1, 13):
+        ano_venc, mes_venc = (ano + 1, 1) if mes == 12 else (ano, mes + 1)
+        vencimentos.append(proximo_dia_util(date(ano_venc, mes_venc, DIA_VENCIMENTO)))
+    return tuple(vencimentos)
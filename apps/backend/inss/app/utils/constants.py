@@ -1,6 +1,9 @@
 """Constantes do sistema SAL e metadados padrões."""
 
 from datetime import date
+from typing import Union
+
+from .competencia import Competencia
 
 SAL_CLASSES = {
     "autonomo": {
@@ -53,17 +56,7 @@ TABELA_PROGRESSIVA_DOMESTICO = [
 ]
 
 
-def calcular_vencimento_padrao(competencia: str) -> date:
-    """Retorna data de vencimento padrão (15 do mês seguinte)."""
-
-    mes, ano = competencia.split("/")
-    mes_int = int(mes)
-    ano_int = int(ano)
-    if mes_int == 12:
-        mes_vencimento = 1
-        ano_vencimento = ano_int + 1
-    else:
-        mes_vencimento = mes_int + 1
-        ano_vencimento = ano_int
-    return date(ano_vencimento, mes_vencimento, 15)
+def calcular_vencimento_padrao(competencia: Union[str, Competencia]) -> date:
+    """Retorna data de vencimento padrão (15 do mês seguinte, ou o próximo dia útil bancário)."""
 
+    return Competencia.parse(competencia).vencimento
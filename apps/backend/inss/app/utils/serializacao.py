@@ -0,0 +1,43 @@
+"""Serialização JSON das respostas com orjson."""
+
+from __future__ import annotations
+
+from decimal import Decimal
+from typing import Any
+
+import orjson
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel
+
+from .competencia import Competencia
+
+OPCOES_ORJSON = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+
+def _converter(valor: Any) -> Any:
+    """Tipos que o orjson não conhece; datas, UUID, dataclasses e enums ele já trata."""
+    if isinstance(valor, BaseModel):
+        return valor.model_dump(mode="json")
+    if isinstance(valor, Decimal):
+        return float(valor)
+    if isinstance(valor, (set, frozenset)):
+        return list(valor)
+    if isinstance(valor, Competencia):
+        return str(valor)
+    raise TypeError(f"Tipo nao serializavel em JSON: {type(valor).__name__}")
+
+
+def dumps(conteudo: Any) -> bytes:
+    return orjson.dumps(conteudo, default=_converter, option=OPCOES_ORJSON)
+
+
+class RespostaJSON(ORJSONResponse):
+    """
+    Resposta padrão da API (`default_response_class`), serializada com orjson.
+
+    As rotas devolvem o modelo do `response_model`; o FastAPI valida e converte a
+    saída com o pydantic e esta classe só troca o `json.dumps` final pelo orjson.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -1,6 +1,8 @@
 import re
-from datetime import datetime
-from typing import Iterable
+from operator import mul
+from typing import Any, Iterable
+
+from .competencia import Competencia
 
 WHATSAPP_REGEX = re.compile(r"^\+?\d{10,15}$")
 CPF_REGEX = re.compile(r"^\d{3}\.?\d{3}\.?\d{3}-?\d{2}$")
@@ -15,12 +17,7 @@ def validar_whatsapp(numero: str) -> bool:
 def normalizar_competencia(competencia: str) -> str:
     """Normaliza competência para MM/AAAA."""
 
-    competencia_limpa = competencia.strip()
-    if not re.match(r"^\d{2}/\d{4}$", competencia_limpa):
-        raise ValueError("Competência deve estar no formato MM/AAAA")
-    mes, ano = competencia_limpa.split("/")
-    datetime(year=int(ano), month=int(mes), day=1)
-    return competencia_limpa
+    return str(Competencia.parse(competencia))
 
 
 def validar_lista_competencias(competencias: Iterable[str]) -> list[str]:
@@ -29,18 +26,111 @@ def validar_lista_competencias(competencias: Iterable[str]) -> list[str]:
     return [normalizar_competencia(item) for item in competencias]
 
 
-def validar_cpf(cpf: str) -> bool:
-    """Valida CPF com dígitos verificadores."""
+# Pesos dos dígitos verificadores (um tuple por dígito, na ordem em que são conferidos)
+PESOS_CPF = ((10, 9, 8, 7, 6, 5, 4, 3, 2), (11, 10, 9, 8, 7, 6, 5, 4, 3, 2))
+PESOS_CNPJ = ((5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2), (6, 5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2))
+PESOS_NIT = ((3, 2, 9, 8, 7, 6, 5, 4, 3, 2),)
+
+# Separadores aceitos nas máscaras (000.000.000-00, 00.000.000/0000-00, 000.00000.00-0)
+_SEPARADORES = str.maketrans("", "", ".-/ ")
+_CODIGOS_SEPARADORES = tuple(map(ord, ".-/ "))
+# b"0".."9" -> valores 0..9, para somar pesos direto sobre os bytes
+_VALORES_DIGITOS = bytes.maketrans(b"0123456789", bytes(range(10)))
+# Dígito verificador módulo 11 indexado por soma % 11 (restos que dão 10 ou 11 viram 0)
+_DV_MODULO_11 = tuple(0 if 11 - resto >= 10 else 11 - resto for resto in range(11))
 
-    numeros = re.sub(r"\D", "", cpf)
-    if len(numeros) != 11 or numeros == numeros[0] * 11:
+
+def _validar_documento(documento: str, tamanho: int, pesos: tuple[tuple[int, ...], ...]) -> bool:
+    numeros = documento.translate(_SEPARADORES)
+    if len(numeros) != tamanho or not (numeros.isascii() and numeros.isdigit()):
+        return False
+    if numeros == numeros[0] * tamanho:
         return False
-    for i in range(9, 11):
-        soma = sum(int(numeros[num]) * ((i + 1) - num) for num in range(0, i))
-        digito = (soma * 10) % 11
-        if digito == 10:
-            digito = 0
-        if digito != int(numeros[i]):
+    valores = numeros.encode("ascii").translate(_VALORES_DIGITOS)
+    for pesos_digito in pesos:
+        soma = sum(map(mul, pesos_digito, valores))
+        if _DV_MODULO_11[soma % 11] != valores[len(pesos_digito)]:
             return False
     return True
 
+
+def validar_cpf(cpf: str) -> bool:
+    """Valida CPF com dígitos verificadores."""
+
+    return _validar_documento(cpf, 11, PESOS_CPF)
+
+
+def validar_cnpj(cnpj: str) -> bool:
+    """Valida CNPJ com dígitos verificadores."""
+
+    return _validar_documento(cnpj, 14, PESOS_CNPJ)
+
+
+def validar_nit(nit: str) -> bool:
+    """Valida NIT/PIS/PASEP com dígito verificador."""
+
+    return _validar_documento(nit, 11, PESOS_NIT)
+
+
+def _validar_lote(documentos: Any, tamanho: int, pesos: tuple[tuple[int, ...], ...]):
+    try:
+        import numpy as np
+    except ImportError as exc:  # pragma: no cover
+        raise RuntimeError("Validação em lote requer numpy.") from exc
+
+    entrada = np.asarray(documentos)
+    if entrada.ndim != 1:
+        entrada = entrada.reshape(-1)
+
+    if np.issubdtype(entrada.dtype, np.integer):
+        # Números sem máscara: zeros à esquerda voltam pela própria aritmética
+        potencias = 10 ** np.arange(tamanho - 1, -1, -1, dtype=np.int64)
+        numeros = entrada.astype(np.int64)
+        digitos = (numeros[:, None] // potencias) % 10
+        mascara = (numeros >= 0) & (numeros < 10**tamanho)
+    else:
+        # Cada caractere UCS-4 vira um uint32 (0 = preenchimento de strings mais curtas)
+        textos = entrada if entrada.dtype.kind == "U" else entrada.astype(str)
+        largura = max(textos.dtype.itemsize // 4, 1)
+        caracteres = textos.view(np.uint32).reshape(-1, largura)
+        e_digito = (caracteres >= 48) & (caracteres <= 57)
+        e_ignorado = np.isin(caracteres, _CODIGOS_SEPARADORES) | (caracteres == 0)
+        mascara = (e_digito | e_ignorado).all(axis=1) & (e_digito.sum(axis=1) == tamanho)
+        if largura != tamanho or not e_digito.all():
+            # Compacta os dígitos para o início de cada linha mantendo a ordem (argsort estável)
+            ordem = np.argsort(~e_digito, axis=1, kind="stable")
+            caracteres = np.take_along_axis(caracteres, ordem, axis=1)
+            if largura < tamanho:
+                caracteres = np.pad(caracteres, ((0, 0), (0, tamanho - largura)))
+            caracteres = caracteres[:, :tamanho]
+        digitos = caracteres.astype(np.int64) - 48
+
+    mascara &= (digitos != digitos[:, :1]).any(axis=1)
+    tabela_dv = np.array(_DV_MODULO_11, dtype=np.int64)
+    for pesos_digito in pesos:
+        posicao = len(pesos_digito)
+        somas = digitos[:, :posicao] @ np.array(pesos_digito, dtype=np.int64)
+        mascara &= tabela_dv[somas % 11] == digitos[:, posicao]
+    return mascara
+
+
+def validar_cpfs_lote(cpfs: Any):
+    """
+    Valida um array (ou sequência) de CPFs e retorna máscara booleana do NumPy.
+
+    Aceita strings com ou sem máscara ou inteiros (zeros à esquerda implícitos).
+    """
+
+    return _validar_lote(cpfs, 11, PESOS_CPF)
+
+
+def validar_cnpjs_lote(cnpjs: Any):
+    """Versão em lote de `validar_cnpj` (máscara booleana do NumPy)."""
+
+    return _validar_lote(cnpjs, 14, PESOS_CNPJ)
+
+
+def validar_nits_lote(nits: Any):
+    """Versão em lote de `validar_nit` (máscara booleana do NumPy)."""
+
+    return _validar_lote(nits, 11, PESOS_NIT)
@@ -0,0 +1 @@
+"""Micro-benchmarks (pytest-benchmark) dos caminhos quentes da API INSS."""
@@ -0,0 +1,75 @@
+"""
+Compara duas execuções salvas do pytest-benchmark e aponta regressões.
+
+    python -m benchmarks.comparar .benchmarks/<maquina>/0001_base.json \\
+        .benchmarks/<maquina>/0002_novo.json --limite 10
+
+Sai com código 1 quando algum benchmark ficou mais lento que `--limite` por cento
+na estatística escolhida (mediana por padrão, menos sensível a ruído).
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+ESTATISTICAS = ("min", "median", "mean", "max")
+
+
+def carregar(caminho: Path, estatistica: str) -> Dict[str, float]:
+    dados = json.loads(Path(caminho).read_text(encoding="utf-8"))
+    return {item["fullname"]: item["stats"][estatistica] for item in dados["benchmarks"]}
+
+
+def comparar(
+    base: Dict[str, float], novo: Dict[str, float], limite: float
+) -> List[Tuple[str, Optional[float], Optional[float], Optional[float], bool]]:
+    """Retorna (nome, base, novo, variação %, regrediu) para cada benchmark."""
+    linhas = []
+    for nome in sorted(set(base) | set(novo)):
+        antes, depois = base.get(nome), novo.get(nome)
+        if antes is None or depois is None:
+            linhas.append((nome, antes, depois, None, False))
+            continue
+        variacao = (depois - antes) / antes * 100 if antes else 0.0
+        linhas.append((nome, antes, depois, variacao, variacao > limite))
+    return linhas
+
+
+def _formatar_tempo(segundos: Optional[float]) -> str:
+    if segundos is None:
+        return "-"
+    if segundos >= 1e-3:
+        return f"{segundos * 1e3:.2f} ms"
+    return f"{segundos * 1e6:.2f} us"
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.comparar", description=__doc__.split("\n\n")[0])
+    parser.add_argument("base", type=Path, help="JSON da execução de referência")
+    parser.add_argument("novo", type=Path, help="JSON da execução a avaliar")
+    parser.add_argument("--limite", type=float, default=10.0, help="regressão máxima tolerada, em %% (padrão 10)")
+    parser.add_argument("--estatistica", choices=ESTATISTICAS, default="median")
+    args = parser.parse_args(argv)
+
+    linhas = comparar(carregar(args.base, args.estatistica), carregar(args.novo, args.estatistica), args.limite)
+    largura = max((len(nome) for nome, *_ in linhas), default=10)
+    print(f"{'benchmark':<{largura}}  {'base':>11}  {'novo':>11}  {'variacao':>9}")
+    for nome, antes, depois, variacao, regrediu in linhas:
+        texto_variacao = f"{variacao:+.1f}%" if variacao is not None else "novo/removido"
+        marca = "  << REGRESSAO" if regrediu else ""
+        print(f"{nome:<{largura}}  {_formatar_tempo(antes):>11}  {_formatar_tempo(depois):>11}  {texto_variacao:>9}{marca}")
+
+    regressoes = sum(1 for *_, regrediu in linhas if regrediu)
+    if regressoes:
+        print(f"\n[ERROR] {regressoes} benchmark(s) acima de {args.limite:g}% ({args.estatistica})")
+        return 1
+    print(f"\n[OK] Nenhuma regressao acima de {args.limite:g}% ({args.estatistica})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
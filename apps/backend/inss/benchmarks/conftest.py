@@ -0,0 +1,24 @@
+import pytest
+
+from app.services.inss_calculator import INSSCalculator
+from app.services.pdf_generator import GPSGenerator
+
+
+@pytest.fixture(scope="session")
+def calculadora():
+    return INSSCalculator()
+
+
+@pytest.fixture(scope="session")
+def gerador_pdf():
+    return GPSGenerator()
+
+
+@pytest.fixture
+def dados_contribuinte():
+    return {
+        "nome": "Maria da Silva",
+        "cpf": "529.982.247-25",
+        "nit": "123.45678.90-1",
+        "whatsapp": "+5511999999999",
+    }
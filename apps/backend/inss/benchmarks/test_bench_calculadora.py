@@ -0,0 +1,27 @@
+import pytest
+
+TIPOS = ["autonomo", "autonomo_simplificado", "domestico", "produtor_rural", "facultativo", "facultativo_baixa_renda"]
+
+
+@pytest.mark.parametrize("plano", ["normal", "simplificado"])
+def test_contribuinte_individual(benchmark, calculadora, plano):
+    benchmark(calculadora.calcular_contribuinte_individual, 3500.0, plano)
+
+
+@pytest.mark.parametrize("tipo", TIPOS)
+def test_calcular_por_tipo(benchmark, calculadora, tipo):
+    benchmark(calculadora.calcular_por_tipo, tipo, 3500.0, "normal")
+
+
+def test_domestico(benchmark, calculadora):
+    benchmark(calculadora.calcular_domestico, 3200.0)
+
+
+def test_produtor_rural(benchmark, calculadora):
+    benchmark(calculadora.calcular_produtor_rural, 48000.0, False)
+
+
+@pytest.mark.parametrize("quantidade", [1, 12])
+def test_complementacao(benchmark, calculadora, quantidade):
+    competencias = [f"{mes:02d}/2024" for mes in range(1, quantidade + 1)]
+    benchmark(calculadora.calcular_complementacao, competencias, 1518.0)
@@ -0,0 +1,54 @@
+import json
+
+import pytest
+from fastapi.encoders import jsonable_encoder
+
+from app.models.registros import Usuario
+from app.utils.serializacao import RespostaJSON
+
+
+def _padrao_fastapi(conteudo):
+    """Caminho padrão do FastAPI: jsonable_encoder + JSONResponse.render."""
+    return json.dumps(
+        jsonable_encoder(conteudo), ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def _orjson(conteudo):
+    return RespostaJSON(conteudo).body
+
+
+def _guia(indice):
+    return {
+        "id": f"8f7c2a4e-0000-4000-8000-{indice:012d}",
+        "usuario_id": "2b1d9c6e-1111-4000-8000-000000000001",
+        "codigo_gps": "1007",
+        "competencia": f"{indice % 12 + 1:02d}/2025",
+        "valor": 303.6,
+        "status": "pendente",
+        "pdf_url": f"https://proj.supabase.co/storage/v1/object/public/guias/guias/ab/{indice:064d}.pdf",
+        "data_vencimento": "2025-11-17",
+        "created_at": "2025-10-15T12:00:00.000000+00:00",
+    }
+
+
+PAYLOADS = {
+    "emitir": {
+        "guia": _guia(1),
+        "whatsapp": {"sid": "SM" + "0" * 32, "status": "queued", "media_url": _guia(1)["pdf_url"]},
+        "detalhes_calculo": {"base_calculo": 1518.0, "aliquota": 0.2},
+    },
+    "historico": {
+        "usuario": Usuario(id="2b1d9c6e", whatsapp="+5511999999999", nome="Maria da Conceição"),
+        "historico": [_guia(indice) for indice in range(100)],
+        "proximo_cursor": "WyIyMDI1LTEwLTE1IiwiOGY3YzJhNGUiXQ",
+    },
+}
+
+
+@pytest.mark.parametrize("serializador", [_padrao_fastapi, _orjson], ids=["fastapi", "orjson"])
+@pytest.mark.parametrize("payload", sorted(PAYLOADS))
+def test_serializar_resposta(benchmark, payload, serializador):
+    benchmark.group = f"json-{payload}"
+    corpo = benchmark(serializador, PAYLOADS[payload])
+    assert json.loads(corpo) == json.loads(_padrao_fastapi(PAYLOADS[payload]))
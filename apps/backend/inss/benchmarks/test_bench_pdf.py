@@ -0,0 +1,45 @@
+import pytest
+
+from app.services.pdf_generator import PERFIS_PDF
+
+# Guias representativas: nomes curtos/longos com acentos, valores e códigos variados
+GUIAS_REPRESENTATIVAS = [
+    ({"nome": "Ana Lima", "nit": "170.33259.50-4", "whatsapp": "+5511988887777"}, 166.98, "1163", "01/2025"),
+    (
+        {
+            "nome": "Maria da Conceição Gonçalves de Araújo Brandão",
+            "cpf": "529.982.247-25",
+            "nit": "123.45678.90-1",
+            "whatsapp": "+5521999999999",
+        },
+        1631.48,
+        "1007",
+        "10/2025",
+    ),
+    ({"nome": "João Antônio", "cpf": "111.444.777-35"}, 75.9, "1473", "12/2024"),
+]
+
+
+def test_gerar_guia(benchmark, gerador_pdf, dados_contribuinte):
+    pdf = benchmark.pedantic(
+        gerador_pdf.gerar_guia,
+        args=(dados_contribuinte, 700.0, "1007", "10/2025"),
+        rounds=20,
+        warmup_rounds=2,
+    )
+    assert pdf.startswith(b"%PDF")
+
+
+@pytest.mark.parametrize("perfil", sorted(PERFIS_PDF))
+def test_tamanho_pdf_por_perfil(benchmark, gerador_pdf, perfil):
+    """Tempo do lote de guias representativas; o tamanho em bytes fica em extra_info."""
+
+    def gerar_lote():
+        return [gerador_pdf.gerar_guia(*guia, perfil=perfil) for guia in GUIAS_REPRESENTATIVAS]
+
+    pdfs = benchmark.pedantic(gerar_lote, rounds=10, warmup_rounds=1)
+    tamanhos = [len(pdf) for pdf in pdfs]
+    benchmark.extra_info["bytes_total"] = sum(tamanhos)
+    benchmark.extra_info["bytes_maximo"] = max(tamanhos)
+    # Cabe com folga no limite de mídia do WhatsApp (poucos KB por guia)
+    assert max(tamanhos) < 4096
@@ -0,0 +1,57 @@
+import random
+
+import numpy as np
+import pytest
+
+from app.utils.constants import calcular_vencimento_padrao
+from app.utils.validators import (
+    normalizar_competencia,
+    validar_cnpj,
+    validar_cpf,
+    validar_cpfs_lote,
+    validar_nit,
+    validar_whatsapp,
+)
+
+
+@pytest.fixture(scope="module")
+def cpfs_importacao():
+    sorteio = random.Random(42)
+    return [f"{sorteio.randrange(10**11):011d}" for _ in range(50_000)]
+
+
+def test_validar_cpf_formatado(benchmark):
+    assert benchmark(validar_cpf, "529.982.247-25")
+
+
+def test_validar_cpf_invalido(benchmark):
+    assert not benchmark(validar_cpf, "529.982.247-26")
+
+
+def test_validar_cnpj(benchmark):
+    assert benchmark(validar_cnpj, "11.222.333/0001-81")
+
+
+def test_validar_nit(benchmark):
+    assert benchmark(validar_nit, "170.33259.50-4")
+
+
+def test_validar_cpf_importacao_escalar(benchmark, cpfs_importacao):
+    benchmark(lambda: [validar_cpf(cpf) for cpf in cpfs_importacao])
+
+
+def test_validar_cpf_importacao_lote(benchmark, cpfs_importacao):
+    documentos = np.array(cpfs_importacao)
+    benchmark(validar_cpfs_lote, documentos)
+
+
+def test_validar_whatsapp(benchmark):
+    assert benchmark(validar_whatsapp, "whatsapp:+5511999999999")
+
+
+def test_normalizar_competencia(benchmark):
+    assert benchmark(normalizar_competencia, " 10/2025 ") == "10/2025"
+
+
+def test_calcular_vencimento_padrao(benchmark):
+    assert benchmark(calcular_vencimento_padrao, "12/2025").month == 1
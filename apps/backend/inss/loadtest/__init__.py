@@ -0,0 +1 @@
+"""Harness de teste de carga com backends falsos (Supabase, Twilio e OpenAI)."""
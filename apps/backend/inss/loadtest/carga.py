@@ -0,0 +1,219 @@
+"""Gerador de carga em malha aberta (RPS alvo) e relatório de latência."""
+
+from __future__ import annotations
+
+import asyncio
+import base64
+import hashlib
+import hmac
+import itertools
+import math
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlencode
+
+import httpx
+
+CENARIOS = ("emitir", "complementacao", "gerar-pdf", "webhook")
+
+
+@dataclass
+class Requisicao:
+    metodo: str
+    caminho: str
+    json: Optional[dict] = None
+    formulario: Optional[Dict[str, str]] = None
+
+
+@dataclass
+class Amostra:
+    cenario: str
+    status: int
+    latencia: float
+
+
+@dataclass
+class ResumoCenario:
+    cenario: str
+    total: int
+    sucesso: int
+    erros: Dict[str, int]
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    throughput: float
+
+
+@dataclass
+class ResultadoCarga:
+    rps_alvo: float
+    duracao: float
+    amostras: List[Amostra] = field(default_factory=list)
+    atrasadas: int = 0
+
+    def resumo(self) -> List[ResumoCenario]:
+        por_cenario: Dict[str, List[Amostra]] = {}
+        for amostra in self.amostras:
+            por_cenario.setdefault(amostra.cenario, []).append(amostra)
+        por_cenario["TOTAL"] = list(self.amostras)
+        return [_resumir(nome, amostras, self.duracao) for nome, amostras in por_cenario.items() if amostras]
+
+
+def percentil(valores: List[float], p: float) -> float:
+    """Percentil por posição mais próxima (valores já ordenados)."""
+    if not valores:
+        return 0.0
+    posicao = max(0, math.ceil(p / 100 * len(valores)) - 1)
+    return valores[posicao]
+
+
+def _resumir(cenario: str, amostras: List[Amostra], duracao: float) -> ResumoCenario:
+    latencias = sorted(amostra.latencia * 1000 for amostra in amostras)
+    erros: Dict[str, int] = {}
+    for amostra in amostras:
+        if not 200 <= amostra.status < 300:
+            chave = str(amostra.status) if amostra.status else "conexao"
+            erros[chave] = erros.get(chave, 0) + 1
+    sucesso = len(amostras) - sum(erros.values())
+    return ResumoCenario(
+        cenario=cenario,
+        total=len(amostras),
+        sucesso=sucesso,
+        erros=erros,
+        p50_ms=round(percentil(latencias, 50), 1),
+        p95_ms=round(percentil(latencias, 95), 1),
+        p99_ms=round(percentil(latencias, 99), 1),
+        throughput=round(sucesso / duracao, 2) if duracao else 0.0,
+    )
+
+
+def formatar_relatorio(resultado: ResultadoCarga) -> str:
+    linhas = [
+        f"RPS alvo: {resultado.rps_alvo:g} | duracao: {resultado.duracao:.1f}s | "
+        f"disparos atrasados (>50ms): {resultado.atrasadas}",
+        f"{'cenario':<16}{'total':>7}{'ok':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'ok/s':>9}  erros",
+    ]
+    for item in resultado.resumo():
+        erros = ", ".join(f"{status}x{qtd}" for status, qtd in sorted(item.erros.items())) or "-"
+        linhas.append(
+            f"{item.cenario:<16}{item.total:>7}{item.sucesso:>7}{item.p50_ms:>10.1f}"
+            f"{item.p95_ms:>10.1f}{item.p99_ms:>10.1f}{item.throughput:>9.2f}  {erros}"
+        )
+    return "\n".join(linhas)
+
+
+def _numero(indice: int) -> str:
+    # Um número por requisição: o debounce do webhook não junta requisições distintas
+    return f"+55119{indice % 100_000_000:08d}"
+
+
+def montar_requisicao(cenario: str, indice: int) -> Requisicao:
+    numero = _numero(indice)
+    if cenario == "emitir":
+        return Requisicao(
+            "POST",
+            "/api/v1/guias/emitir",
+            json={
+                "whatsapp": numero,
+                "tipo_contribuinte": "autonomo",
+                "valor_base": 1518 + indice % 5000,
+                "plano": "normal",
+                "competencia": "10/2025",
+            },
+        )
+    if cenario == "complementacao":
+        return Requisicao(
+            "POST",
+            "/api/v1/guias/complementacao",
+            json={"whatsapp": numero, "competencias": ["08/2025", "09/2025"], "valor_base": 1518},
+        )
+    if cenario == "gerar-pdf":
+        return Requisicao(
+            "POST",
+            "/api/v1/guias/gerar-pdf",
+            json={
+                "nome_segurado": "Maria da Silva",
+                "cpf": "529.982.247-25",
+                "valor_base": 2500,
+                "tipo_contribuinte": "autonomo",
+                "plano": "normal",
+            },
+        )
+    if cenario == "webhook":
+        perguntas = (
+            "O que acontece se eu atrasar a contribuição?",
+            "Quanto pago sobre 3000 como autônomo?",
+            "Posso mudar do plano simplificado para o normal?",
+        )
+        return Requisicao(
+            "POST",
+            "/webhook/whatsapp",
+            formulario={"From": f"whatsapp:{numero}", "Body": perguntas[indice % len(perguntas)]},
+        )
+    raise ValueError(f"Cenario desconhecido: {cenario}")
+
+
+def assinar_twilio(segredo: str, url: str, formulario: Dict[str, str]) -> str:
+    dados = url + "".join(chave + valor for chave, valor in sorted(formulario.items()))
+    return base64.b64encode(hmac.new(segredo.encode(), dados.encode(), hashlib.sha1).digest()).decode()
+
+
+async def executar_carga(
+    base_url: str,
+    cenarios: List[Tuple[str, float]],
+    rps: float,
+    duracao: float,
+    segredo_webhook: Optional[str] = None,
+    timeout: float = 60.0,
+    relogio: Callable[[], float] = time.perf_counter,
+) -> ResultadoCarga:
+    """
+    Dispara requisições em malha aberta: a requisição i sai em t0 + i/rps,
+    independentemente de as anteriores terem terminado (não mascara fila).
+    """
+    resultado = ResultadoCarga(rps_alvo=rps, duracao=duracao)
+    total_pesos = sum(peso for _, peso in cenarios)
+    sequencia = list(
+        itertools.chain.from_iterable([nome] * max(1, round(peso * 10 / total_pesos)) for nome, peso in cenarios)
+    )
+    total = int(rps * duracao)
+    limites = httpx.Limits(max_connections=None, max_keepalive_connections=200)
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=timeout, limits=limites) as cliente:
+
+        async def _disparar(indice: int) -> None:
+            cenario = sequencia[indice % len(sequencia)]
+            requisicao = montar_requisicao(cenario, indice)
+            headers = {}
+            conteudo = None
+            if requisicao.formulario is not None:
+                conteudo = urlencode(requisicao.formulario)
+                headers["Content-Type"] = "application/x-www-form-urlencoded"
+                if segredo_webhook:
+                    headers["X-Twilio-Signature"] = assinar_twilio(
+                        segredo_webhook, base_url + requisicao.caminho, requisicao.formulario
+                    )
+            inicio = relogio()
+            try:
+                resposta = await cliente.request(
+                    requisicao.metodo, requisicao.caminho, json=requisicao.json, content=conteudo, headers=headers
+                )
+                status = resposta.status_code
+            except httpx.HTTPError:
+                status = 0
+            resultado.amostras.append(Amostra(cenario, status, relogio() - inicio))
+
+        inicio_carga = relogio()
+        tarefas = []
+        for indice in range(total):
+            atraso = inicio_carga + indice / rps - relogio()
+            if atraso > 0:
+                await asyncio.sleep(atraso)
+            elif atraso < -0.05:
+                resultado.atrasadas += 1
+            tarefas.append(asyncio.create_task(_disparar(indice)))
+        await asyncio.gather(*tarefas)
+        resultado.duracao = max(duracao, relogio() - inicio_carga)
+
+    return resultado
@@ -0,0 +1,277 @@
+"""Servidor HTTP falso para Supabase (PostgREST + Storage), Twilio e OpenAI."""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+
+SERVICOS = ("supabase", "storage", "twilio", "openai")
+
+RESPOSTA_LLM = (
+    "A contribuição do autônomo no plano normal é de 20% sobre o valor declarado, "
+    "usando o código 1007.\n\n"
+    "O vencimento é no dia 15 do mês seguinte à competência; se cair em dia sem "
+    "expediente bancário, o pagamento pode ser feito no próximo dia útil."
+)
+
+
+@dataclass
+class PerfilServico:
+    """Latência (ms) e taxa de erro injetadas em um dos backends falsos."""
+
+    latencia_ms: float = 0.0
+    variacao_ms: float = 0.0
+    taxa_erro: float = 0.0
+    status_erro: int = 503
+
+
+@dataclass
+class ConfigBackends:
+    perfis: Dict[str, PerfilServico] = field(default_factory=lambda: {nome: PerfilServico() for nome in SERVICOS})
+    semente: Optional[int] = None
+
+    def perfil(self, servico: str) -> PerfilServico:
+        return self.perfis.setdefault(servico, PerfilServico())
+
+
+def _servico_da_rota(caminho: str) -> Optional[str]:
+    if caminho.startswith("/rest/v1/"):
+        return "supabase"
+    if caminho.startswith("/storage/v1/"):
+        return "storage"
+    if caminho.startswith("/2010-04-01/"):
+        return "twilio"
+    if caminho.startswith("/v1/"):
+        return "openai"
+    return None
+
+
+def _filtrar(linhas: List[Dict[str, Any]], params: Dict[str, str]) -> List[Dict[str, Any]]:
+    """Aplica apenas filtros `coluna=eq.valor` e `limit`; o resto é ignorado."""
+    reservados = {"select", "order", "limit", "offset", "or", "on_conflict", "columns"}
+    for coluna, expressao in params.items():
+        if coluna in reservados or not expressao.startswith("eq."):
+            continue
+        valor = expressao[3:]
+        linhas = [linha for linha in linhas if str(linha.get(coluna)) == valor]
+    if params.get("limit", "").isdigit():
+        linhas = linhas[: int(params["limit"])]
+    return linhas
+
+
+def criar_backend_falso(config: Optional[ConfigBackends] = None) -> FastAPI:
+    """App ASGI que responde pelos quatro backends externos com latência/erros configuráveis."""
+    config = config or ConfigBackends()
+    sorteio = random.Random(config.semente)
+    tabelas: Dict[str, List[Dict[str, Any]]] = {}
+    objetos: Dict[str, bytes] = {}
+    app = FastAPI(title="Backends falsos - teste de carga")
+    app.state.config = config
+    app.state.tabelas = tabelas
+    app.state.objetos = objetos
+    app.state.contadores = {nome: 0 for nome in SERVICOS}
+
+    @app.middleware("http")
+    async def injetar_latencia_e_erros(request: Request, call_next):
+        # O cliente do Supabase monta `//rest/v1` quando a URL termina em "/"
+        request.scope["path"] = re.sub("/{2,}", "/", request.scope["path"])
+        servico = _servico_da_rota(request.scope["path"])
+        if servico is None:
+            return await call_next(request)
+        app.state.contadores[servico] = app.state.contadores.get(servico, 0) + 1
+        perfil = config.perfil(servico)
+        atraso = perfil.latencia_ms + sorteio.uniform(-perfil.variacao_ms, perfil.variacao_ms)
+        if atraso > 0:
+            await asyncio.sleep(atraso / 1000)
+        if perfil.taxa_erro and sorteio.random() < perfil.taxa_erro:
+            return JSONResponse({"message": "erro injetado", "code": perfil.status_erro}, status_code=perfil.status_erro)
+        return await call_next(request)
+
+    # ----- PostgREST -----
+
+    @app.get("/rest/v1/{tabela}")
+    async def postgrest_select(tabela: str, request: Request):
+        return _filtrar(tabelas.get(tabela, []), dict(request.query_params))
+
+    @app.post("/rest/v1/{tabela}")
+    async def postgrest_insert(tabela: str, request: Request):
+        corpo = await request.json()
+        novas = corpo if isinstance(corpo, list) else [corpo]
+        linhas = tabelas.setdefault(tabela, [])
+        conflito = request.query_params.get("on_conflict")
+        prefer = request.headers.get("prefer", "")
+        inseridas = []
+        for nova in novas:
+            registro = {"id": str(uuid.uuid4()), "created_at": datetime.now(timezone.utc).isoformat(), **nova}
+            if conflito:
+                existente = next((linha for linha in linhas if linha.get(conflito) == registro.get(conflito)), None)
+                if existente is not None:
+                    if "merge-duplicates" in prefer:
+                        existente.update(nova)
+                        inseridas.append(existente)
+                    continue
+            linhas.append(registro)
+            inseridas.append(registro)
+        if "return=minimal" in prefer:
+            return Response(status_code=201)
+        return JSONResponse(inseridas, status_code=201)
+
+    @app.post("/rest/v1/rpc/obter_ou_criar_usuario")
+    async def postgrest_obter_ou_criar_usuario(request: Request):
+        parametros = {chave[2:]: valor for chave, valor in (await request.json()).items()}
+        usuarios = tabelas.setdefault("usuarios", [])
+        usuario = next((linha for linha in usuarios if linha.get("whatsapp") == parametros["whatsapp"]), None)
+        if usuario is None:
+            usuario = {"id": str(uuid.uuid4()), "created_at": datetime.now(timezone.utc).isoformat()}
+            usuarios.append(usuario)
+        for coluna, valor in parametros.items():
+            if usuario.get(coluna) is None:
+                usuario[coluna] = valor
+        return usuario
+
+    @app.patch("/rest/v1/{tabela}")
+    async def postgrest_update(tabela: str, request: Request):
+        alteracoes = await request.json()
+        alvo = _filtrar(tabelas.get(tabela, []), dict(request.query_params))
+        for linha in alvo:
+            linha.update(alteracoes)
+        return alvo
+
+    # ----- Storage -----
+
+    @app.post("/storage/v1/object/{bucket}/{caminho:path}")
+    @app.put("/storage/v1/object/{bucket}/{caminho:path}")
+    async def storage_upload(bucket: str, caminho: str, request: Request):
+        chave = f"{bucket}/{caminho}"
+        if request.headers.get("content-type", "").startswith("multipart/form-data"):
+            arquivo = (await request.form())["file"]
+            corpo = await arquivo.read()
+        else:
+            corpo = await request.body()
+        if chave in objetos and request.method == "POST" and request.headers.get("x-upsert") != "true":
+            # Mesmo formato de erro do Storage para objeto existente sem upsert
+            return JSONResponse(
+                {"statusCode": "409", "error": "Duplicate", "message": "The resource already exists"}, status_code=400
+            )
+        objetos[chave] = corpo
+        return {"Key": chave, "Id": str(uuid.uuid4())}
+
+    @app.head("/storage/v1/object/authenticated/{bucket}/{caminho:path}")
+    @app.head("/storage/v1/object/public/{bucket}/{caminho:path}")
+    async def storage_info(bucket: str, caminho: str):
+        corpo = objetos.get(f"{bucket}/{caminho}")
+        if corpo is None:
+            return Response(status_code=404)
+        return Response(
+            headers={"content-length": str(len(corpo)), "etag": f'"{hashlib.md5(corpo).hexdigest()}"'},
+            media_type="application/pdf",
+        )
+
+    @app.get("/storage/v1/object/public/{bucket}/{caminho:path}")
+    async def storage_publico(bucket: str, caminho: str):
+        return Response(content=b"%PDF-1.4\n", media_type="application/pdf")
+
+    # ----- Twilio -----
+
+    @app.post("/2010-04-01/Accounts/{conta}/Messages.json")
+    async def twilio_mensagem(conta: str, request: Request):
+        formulario = await request.form()
+        sid = "SM" + uuid.uuid4().hex
+        return JSONResponse(
+            {
+                "sid": sid,
+                "account_sid": conta,
+                "status": "queued",
+                "to": formulario.get("To"),
+                "from": formulario.get("From"),
+                "body": formulario.get("Body"),
+                "num_media": "1" if formulario.get("MediaUrl") else "0",
+                "uri": f"/2010-04-01/Accounts/{conta}/Messages/{sid}.json",
+            },
+            status_code=201,
+        )
+
+    # ----- OpenAI -----
+
+    @app.post("/v1/chat/completions")
+    async def openai_chat(request: Request):
+        corpo = await request.json()
+        modelo = corpo.get("model", "gpt-falso")
+        criado = int(time.time())
+        if corpo.get("stream"):
+
+            async def _eventos():
+                for inicio in range(0, len(RESPOSTA_LLM), 24):
+                    pedaco = {
+                        "id": "chatcmpl-falso",
+                        "object": "chat.completion.chunk",
+                        "created": criado,
+                        "model": modelo,
+                        "choices": [
+                            {"index": 0, "delta": {"content": RESPOSTA_LLM[inicio : inicio + 24]}, "finish_reason": None}
+                        ],
+                    }
+                    yield f"data: {json.dumps(pedaco)}\n\n"
+                yield "data: [DONE]\n\n"
+
+            return StreamingResponse(_eventos(), media_type="text/event-stream")
+
+        return {
+            "id": "chatcmpl-falso",
+            "object": "chat.completion",
+            "created": criado,
+            "model": modelo,
+            "choices": [
+                {"index": 0, "message": {"role": "assistant", "content": RESPOSTA_LLM}, "finish_reason": "stop"}
+            ],
+            "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+        }
+
+    @app.get("/contadores")
+    async def contadores():
+        return app.state.contadores
+
+    return app
+
+
+class ServidorEmThread:
+    """Roda um app ASGI com uvicorn em uma thread daemon (para os backends falsos)."""
+
+    def __init__(self, app: FastAPI, host: str = "127.0.0.1", porta: int = 0) -> None:
+        self.app = app
+        self._servidor = uvicorn.Server(
+            uvicorn.Config(app, host=host, port=porta, log_level="warning", access_log=False, lifespan="off")
+        )
+        self._thread = threading.Thread(target=self._servidor.run, daemon=True)
+        self.host = host
+
+    @property
+    def url(self) -> str:
+        soquete = self._servidor.servers[0].sockets[0]
+        return f"http://{self.host}:{soquete.getsockname()[1]}"
+
+    def iniciar(self, timeout: float = 10.0) -> "ServidorEmThread":
+        self._thread.start()
+        limite = time.monotonic() + timeout
+        while not self._servidor.started:
+            if time.monotonic() > limite:
+                raise RuntimeError("Backend falso nao subiu a tempo")
+            time.sleep(0.02)
+        return self
+
+    def encerrar(self) -> None:
+        self._servidor.should_exit = True
+        self._thread.join(timeout=5)
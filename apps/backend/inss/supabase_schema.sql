@@ -25,6 +25,9 @@ CREATE TABLE IF NOT EXISTS guias_inss (
     created_at TIMESTAMP DEFAULT NOW()
 );
 
+-- Historico paginado por chave (usuario_id, created_at, id)
+CREATE INDEX IF NOT EXISTS idx_guias_usuario_created ON guias_inss(usuario_id, created_at DESC, id DESC);
+
 -- Tabela de conversas
 CREATE TABLE IF NOT EXISTS conversas (
     id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
@@ -34,3 +37,23 @@ CREATE TABLE IF NOT EXISTS conversas (
     created_at TIMESTAMP DEFAULT NOW()
 );
 
+
+-- Obter ou criar usuario em uma unica ida ao banco, sem corrida entre requisicoes
+-- simultaneas; campos ja preenchidos nao sao sobrescritos
+CREATE OR REPLACE FUNCTION obter_ou_criar_usuario(
+    p_whatsapp VARCHAR,
+    p_nome VARCHAR DEFAULT NULL,
+    p_cpf VARCHAR DEFAULT NULL,
+    p_nit VARCHAR DEFAULT NULL,
+    p_tipo_contribuinte VARCHAR DEFAULT NULL
+) RETURNS usuarios
+LANGUAGE sql AS $$
+    INSERT INTO usuarios (whatsapp, nome, cpf, nit, tipo_contribuinte)
+    VALUES (p_whatsapp, p_nome, p_cpf, p_nit, p_tipo_contribuinte)
+    ON CONFLICT (whatsapp) DO UPDATE SET
+        nome = COALESCE(usuarios.nome, EXCLUDED.nome),
+        cpf = COALESCE(usuarios.cpf, EXCLUDED.cpf),
+        nit = COALESCE(usuarios.nit, EXCLUDED.nit),
+        tipo_contribuinte = COALESCE(usuarios.tipo_contribuinte, EXCLUDED.tipo_contribuinte)
+    RETURNING *;
+$$;
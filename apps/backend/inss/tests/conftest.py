@@ -0,0 +1,165 @@
+"""Fakes compartilhados: cliente Supabase em memória e fábrica do SupabaseService."""
+
+import uuid
+
+import pytest
+
+from app.services.supabase_service import SupabaseService
+
+
+class Resultado:
+    def __init__(self, data):
+        self.data = data
+
+
+class FuncaoAusente(Exception):
+    """Erro do PostgREST para função RPC que não existe no banco."""
+
+    code = "PGRST202"
+
+
+class ConsultaFalsa:
+    """Builder do PostgREST sobre listas em memória; as chamadas ficam em `cliente.chamadas`."""
+
+    def __init__(self, cliente, tabela):
+        self.cliente = cliente
+        self.tabela = tabela
+        self.filtros = []
+        self.limite = None
+        # (operacao, linhas, coluna de conflito, ignorar duplicados)
+        self.escrita = None
+
+    def _registrar(self, *chamada):
+        self.cliente.chamadas.append(chamada)
+        return self
+
+    def select(self, colunas):
+        return self._registrar("select", colunas)
+
+    def eq(self, coluna, valor):
+        self.filtros.append(lambda linha: linha.get(coluna) == valor)
+        return self._registrar("eq", coluna, valor)
+
+    def in_(self, coluna, valores):
+        self.filtros.append(lambda linha: linha.get(coluna) in valores)
+        return self._registrar("in", coluna, valores)
+
+    def or_(self, filtro):
+        # Só registrado: os testes conferem o filtro montado, não a seleção
+        return self._registrar("or", filtro)
+
+    def order(self, coluna, desc=False):
+        return self
+
+    def limit(self, limite):
+        self.limite = limite
+        return self
+
+    def insert(self, linhas, default_to_null=True, returning=None):
+        linhas = linhas if isinstance(linhas, list) else [linhas]
+        self.escrita = ("insert", linhas, None, False)
+        return self._registrar("insert", self.tabela, len(linhas))
+
+    def upsert(self, linhas, on_conflict="id", ignore_duplicates=False, default_to_null=True, returning=None):
+        linhas = linhas if isinstance(linhas, list) else [linhas]
+        self.escrita = ("upsert", linhas, on_conflict, ignore_duplicates)
+        return self._registrar("upsert", self.tabela, len(linhas))
+
+    def execute(self):
+        if self.cliente.antes:
+            self.cliente.antes(self)
+        if self.escrita:
+            gravadas = self._gravar()
+            resultado = Resultado([] if self.cliente.sem_retorno else gravadas)
+        else:
+            resultado = Resultado(self._ler())
+        if self.cliente.depois:
+            self.cliente.depois(self)
+        return resultado
+
+    def linhas_escritas(self):
+        return self.escrita[1] if self.escrita else []
+
+    def _ler(self):
+        registros = self.cliente.tabelas.get(self.tabela, [])
+        linhas = [dict(registro) for registro in registros if all(filtro(registro) for filtro in self.filtros)]
+        return linhas[: self.limite] if self.limite is not None else linhas
+
+    def _gravar(self):
+        _, linhas, chave, ignorar_duplicados = self.escrita
+        registros = self.cliente.tabelas.setdefault(self.tabela, [])
+        gravadas = []
+        for linha in linhas:
+            existente = next((item for item in registros if chave and item.get(chave) == linha.get(chave)), None)
+            if existente is None:
+                existente = {"id": str(uuid.uuid4()), **linha}
+                registros.append(existente)
+            elif ignorar_duplicados:
+                continue  # como no PostgREST, a linha ignorada não volta no retorno
+            else:
+                existente.update(linha)
+            gravadas.append(dict(existente))
+        # Retorno em ordem diferente da entrada, como o Postgres pode fazer
+        return list(reversed(gravadas))
+
+
+class RpcFalsa:
+    def __init__(self, cliente, funcao, parametros):
+        self.cliente = cliente
+        self.funcao = funcao
+        self.parametros = parametros
+        cliente.chamadas.append(("rpc", funcao))
+
+    def execute(self):
+        if self.cliente.antes:
+            self.cliente.antes(self)
+        if self.funcao not in self.cliente.rpcs:
+            raise FuncaoAusente(f"Could not find the function public.{self.funcao}")
+        return Resultado(self.cliente.rpcs[self.funcao](self.cliente, self.parametros))
+
+
+class ClienteSupabaseFalso:
+    """
+    Cliente Supabase em memória: `tabelas` guarda as linhas por tabela, `rpcs` as
+    funções do banco e `bucket` responde ao Storage. `antes`/`depois` recebem a
+    consulta em cada `execute` e podem levantar erros para simular falhas;
+    `sem_retorno` grava sem devolver as linhas (RLS sem SELECT).
+    """
+
+    def __init__(self, tabelas=None, rpcs=None, bucket=None):
+        self.tabelas = tabelas if tabelas is not None else {}
+        self.rpcs = rpcs or {}
+        self.bucket = bucket
+        self.chamadas = []
+        self.antes = None
+        self.depois = None
+        self.sem_retorno = False
+        self.storage = self
+
+    def table(self, nome):
+        self.chamadas.append(("table", nome))
+        return ConsultaFalsa(self, nome)
+
+    def rpc(self, funcao, parametros):
+        return RpcFalsa(self, funcao, parametros)
+
+    def from_(self, bucket):
+        return self.bucket
+
+
+@pytest.fixture
+def cliente_supabase():
+    """Fábrica de `ClienteSupabaseFalso`."""
+    return ClienteSupabaseFalso
+
+
+@pytest.fixture
+def servico_supabase():
+    """Fábrica de `SupabaseService` (sem outbox, salvo indicação) ligado ao cliente falso."""
+
+    def criar(cliente, **opcoes):
+        servico = SupabaseService(**{"url": "http://localhost:54321", "key": "chave", "outbox": False, **opcoes})
+        servico._client = cliente
+        return servico
+
+    return criar
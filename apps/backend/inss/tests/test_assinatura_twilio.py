@@ -0,0 +1,32 @@
+import base64
+import hashlib
+import hmac
+
+from app.services.assinatura_twilio import ValidadorAssinaturaTwilio
+
+URL = "https://api.guiasmei.com.br/webhook/whatsapp"
+PARAMETROS = [("From", "whatsapp:+5511999999999"), ("Body", "quanto pago?"), ("To", "whatsapp:+14155238886")]
+
+
+def _assinar(segredo, url, parametros):
+    dados = url + "".join(chave + valor for chave, valor in sorted(parametros))
+    return base64.b64encode(hmac.new(segredo.encode(), dados.encode(), hashlib.sha1).digest()).decode()
+
+
+def test_assinatura_igual_ao_algoritmo_do_twilio():
+    validador = ValidadorAssinaturaTwilio("segredo")
+    assinatura = _assinar("segredo", URL, PARAMETROS)
+    assert validador.calcular(URL, PARAMETROS) == assinatura
+    # Chave pré-processada não muda entre requisições
+    assert validador.valida(URL, list(reversed(PARAMETROS)), assinatura)
+    assert validador.valida(URL, PARAMETROS, assinatura)
+
+
+def test_assinatura_invalida_e_recusada():
+    validador = ValidadorAssinaturaTwilio("segredo")
+    assinatura = _assinar("segredo", URL, PARAMETROS)
+    adulterados = PARAMETROS[:1] + [("Body", "emitir guia")] + PARAMETROS[2:]
+    assert not validador.valida(URL, adulterados, assinatura)
+    assert not validador.valida(URL + "?x=1", PARAMETROS, assinatura)
+    assert not validador.valida(URL, PARAMETROS, _assinar("outro", URL, PARAMETROS))
+    assert not validador.valida(URL, PARAMETROS, "não-ascii-ç")
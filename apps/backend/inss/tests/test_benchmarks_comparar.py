@@ -0,0 +1,26 @@
+import json
+
+from benchmarks.comparar import comparar, main
+
+
+def _salvar(caminho, medianas):
+    caminho.write_text(
+        json.dumps({"benchmarks": [{"fullname": nome, "stats": {"median": valor}} for nome, valor in medianas.items()]})
+    )
+    return caminho
+
+
+def test_comparar_aponta_regressao_acima_do_limite():
+    linhas = comparar({"cpf": 1.0, "pdf": 2.0, "antigo": 1.0}, {"cpf": 1.05, "pdf": 2.5, "novo": 1.0}, limite=10)
+    por_nome = {nome: (variacao, regrediu) for nome, _, _, variacao, regrediu in linhas}
+    assert por_nome["cpf"][1] is False
+    assert por_nome["pdf"] == (25.0, True)
+    assert por_nome["novo"] == (None, False)
+
+
+def test_cli_retorna_1_em_regressao(tmp_path, capsys):
+    base = _salvar(tmp_path / "base.json", {"pdf": 0.002})
+    novo = _salvar(tmp_path / "novo.json", {"pdf": 0.003})
+    assert main([str(base), str(novo)]) == 1
+    assert "REGRESSAO" in capsys.readouterr().out
+    assert main([str(base), str(base)]) == 0
@@ -0,0 +1,98 @@
+import asyncio
+
+import pytest
+from postgrest.exceptions import APIError
+
+from app.services.supabase_service import LoteRecusadoError
+
+
+def _escritas(cliente):
+    return [chamada for chamada in cliente.chamadas if chamada[0] in ("insert", "upsert")]
+
+
+def test_guias_em_lotes_com_ids_na_ordem_da_entrada(cliente_supabase, servico_supabase):
+    cliente = cliente_supabase()
+    guias = [{"usuario_id": "u1", "competencia": f"{mes:02d}/2025", "valor": 100.0 + mes} for mes in range(1, 13)]
+
+    salvas = asyncio.run(servico_supabase(cliente).create_records_bulk("guias_inss", guias, chunk_size=5))
+
+    assert [chamada[2] for chamada in _escritas(cliente)] == [5, 5, 2]
+    assert all(operacao == "insert" for operacao, _, _ in _escritas(cliente))
+    assert [guia["competencia"] for guia in salvas] == [guia["competencia"] for guia in guias]
+    assert len({guia["id"] for guia in salvas}) == 12
+
+
+def test_usuarios_usam_upsert_por_whatsapp(cliente_supabase, servico_supabase):
+    cliente = cliente_supabase({"usuarios": [{"id": "existente", "whatsapp": "+5511900000001", "nome": "Antigo"}]})
+    usuarios = [
+        {"whatsapp": "+5511900000001", "nome": "Ana"},
+        {"whatsapp": "+5511900000002", "nome": "Bia"},
+        {"whatsapp": "+5511900000001", "cpf": "529.982.247-25"},
+    ]
+
+    criados = asyncio.run(servico_supabase(cliente).criar_usuarios_lote(usuarios))
+
+    assert _escritas(cliente) == [("upsert", "usuarios", 2)]
+    assert criados[0]["id"] == criados[2]["id"] == "existente"
+    # Usuario existente volta como está no banco, sem sobrescrita
+    assert criados[0] == {"id": "existente", "whatsapp": "+5511900000001", "nome": "Antigo"}
+    assert criados[1]["whatsapp"] == "+5511900000002" and criados[1]["nome"] == "Bia"
+
+
+def test_upsert_de_usuarios_com_colunas_diferentes_nao_apaga_dados(cliente_supabase, servico_supabase):
+    existente = {"id": "existente", "whatsapp": "+5511900000001", "nome": "Ana", "cpf": "529.982.247-25"}
+    cliente = cliente_supabase({"usuarios": [dict(existente)]})
+    usuarios = [
+        {"whatsapp": "+5511900000001", "nome": None},
+        {"whatsapp": "+5511900000002", "nome": "Bia", "cpf": "111.444.777-35", "nit": "12345678901"},
+        {"whatsapp": "+5511900000003"},
+    ]
+
+    criados = asyncio.run(servico_supabase(cliente).criar_usuarios_lote(usuarios))
+
+    assert _escritas(cliente) == [("upsert", "usuarios", 3)]
+    assert cliente.tabelas["usuarios"][0] == existente
+    assert criados[0] == existente
+    assert criados[1]["nit"] == "12345678901" and "cpf" not in criados[2]
+
+
+def test_lote_com_falha_vai_para_registro_offline(cliente_supabase, servico_supabase):
+    cliente = cliente_supabase()
+
+    def fora_do_ar(consulta):
+        raise ConnectionError("PostgREST fora")
+
+    cliente.antes = fora_do_ar
+    salvas = asyncio.run(servico_supabase(cliente).salvar_guias_lote([{"usuario_id": "u1", "valor": 1.0}] * 3))
+    assert len(salvas) == 3 and all(guia["id"] for guia in salvas)
+
+    with pytest.raises(ValueError):
+        asyncio.run(servico_supabase(cliente).salvar_guias_lote([{"valor": 1.0}]))
+
+
+def test_lote_recusado_pelo_banco_e_reportado_sem_ir_para_o_outbox(cliente_supabase, servico_supabase):
+    cliente = cliente_supabase()
+    guias = [{"usuario_id": "u1", "valor": float(indice)} for indice in range(6)]
+    guias[4]["usuario_id"] = "inexistente"
+
+    def chave_estrangeira(consulta):
+        if any(linha.get("usuario_id") == "inexistente" for linha in consulta.linhas_escritas()):
+            raise APIError({"code": "23503", "message": "violates foreign key constraint"})
+
+    cliente.antes = chave_estrangeira
+    servico = servico_supabase(cliente)
+    offline = []
+
+    async def registrar_offline(tabela, linha):
+        offline.append(linha)
+        return linha
+
+    servico._registrar_offline = registrar_offline
+
+    with pytest.raises(LoteRecusadoError) as erro:
+        asyncio.run(servico.create_records_bulk("guias_inss", guias, chunk_size=3))
+    assert offline == []
+    [(indices, causa)] = erro.value.falhas
+    assert indices == [3, 4, 5] and causa.code == "23503"
+    assert [registro is not None for registro in erro.value.registros] == [True, True, True, False, False, False]
+    assert len(cliente.tabelas["guias_inss"]) == 3
@@ -0,0 +1,79 @@
+import asyncio
+
+import pytest
+
+from app.services.circuit_breaker import ABERTO, FECHADO, CircuitBreaker, CircuitoAbertoError
+
+
+class _Relogio:
+    def __init__(self):
+        self.agora = 0.0
+
+    def __call__(self):
+        return self.agora
+
+
+async def _falha():
+    raise ConnectionError("fora do ar")
+
+
+async def _ok():
+    return "ok"
+
+
+def test_abre_apos_limite_e_falha_rapido():
+    circuito = CircuitBreaker("teste", limite_falhas=2, tempo_reset=10, relogio=_Relogio())
+
+    for _ in range(2):
+        with pytest.raises(ConnectionError):
+            asyncio.run(circuito.chamar(_falha))
+    assert circuito.estado == ABERTO
+
+    chamadas = []
+
+    async def nao_deveria_rodar():
+        chamadas.append(1)
+
+    with pytest.raises(CircuitoAbertoError):
+        asyncio.run(circuito.chamar(nao_deveria_rodar))
+    assert chamadas == []
+
+
+def test_meio_aberto_fecha_com_sonda_bem_sucedida():
+    relogio = _Relogio()
+    circuito = CircuitBreaker("teste", limite_falhas=1, tempo_reset=10, relogio=relogio)
+    with pytest.raises(ConnectionError):
+        asyncio.run(circuito.chamar(_falha))
+
+    relogio.agora = 11
+    assert asyncio.run(circuito.chamar(_ok)) == "ok"
+    assert circuito.estado == FECHADO
+
+
+def test_meio_aberto_reabre_se_sonda_falha():
+    relogio = _Relogio()
+    circuito = CircuitBreaker("teste", limite_falhas=3, tempo_reset=10, relogio=relogio)
+    circuito.registrar_falha()
+    circuito.registrar_falha()
+    circuito.registrar_falha()
+
+    relogio.agora = 11
+    with pytest.raises(ConnectionError):
+        asyncio.run(circuito.chamar(_falha))
+    assert circuito.estado == ABERTO
+    assert not circuito.permite()
+
+
+def test_timeout_conta_como_falha_e_erro_de_negocio_nao():
+    circuito = CircuitBreaker("teste", limite_falhas=1, e_falha=lambda exc: not isinstance(exc, ValueError))
+
+    async def valor_invalido():
+        raise ValueError("4xx")
+
+    with pytest.raises(ValueError):
+        asyncio.run(circuito.chamar(valor_invalido))
+    assert circuito.estado == FECHADO
+
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(circuito.chamar(lambda: asyncio.sleep(1), timeout=0.01))
+    assert circuito.estado == ABERTO
@@ -0,0 +1,82 @@
+import pytest
+
+from app.services import pdf_generator
+from app.services.pdf_generator import GPSGenerator
+from app.utils import codigo_barras
+from app.utils.codigo_barras import PADROES_ITF, barras_itf, linha_digitavel, modulo10, montar_codigo_barras
+
+
+def _decodificar_itf(barras, largura_total):
+    """Reconstrói os dígitos a partir das barras (deslocamento, largura) geradas."""
+    modulos = [0] * largura_total
+    for deslocamento, largura in barras:
+        for posicao in range(deslocamento, deslocamento + largura):
+            modulos[posicao] = 1
+    elementos = []
+    atual, tamanho = modulos[0], 0
+    for modulo in modulos:
+        if modulo == atual:
+            tamanho += 1
+        else:
+            elementos.append(tamanho)
+            atual, tamanho = modulo, 1
+    elementos.append(tamanho)
+    dados = elementos[4:-3]
+    padroes = {padrao: str(digito) for digito, padrao in enumerate(PADROES_ITF)}
+    digitos = []
+    for inicio in range(0, len(dados), 10):
+        par = dados[inicio : inicio + 10]
+        digitos.append(padroes["".join("1" if largura == 3 else "0" for largura in par[0::2])])
+        digitos.append(padroes["".join("1" if largura == 3 else "0" for largura in par[1::2])])
+    return "".join(digitos)
+
+
+def test_codigo_barras_febraban():
+    codigo = montar_codigo_barras("1007", "10/2025", 303.60, identificador="170.33259.50-4")
+    assert len(codigo) == 44 and codigo.startswith("856")
+    assert codigo[4:15] == "00000030360"
+    assert codigo[15:19] == "0270"
+    assert codigo[19:] == "1007" + "17033259504" + "102025" + "0000"
+    assert int(codigo[3]) == modulo10(codigo[:3] + codigo[4:])
+
+
+def test_modulo10_e_linha_digitavel():
+    assert modulo10("01230067896") == 3
+    codigo = montar_codigo_barras("1163", "01/2026", 166.98)
+    linha = linha_digitavel(codigo)
+    blocos = linha.split(" ")
+    assert "".join(bloco[:11] for bloco in blocos) == codigo
+    assert all(int(bloco[-1]) == modulo10(bloco[:11]) for bloco in blocos)
+
+
+def test_itf_pre_calculado_decodifica_de_volta():
+    codigo = montar_codigo_barras("1007", "12/2025", 8157.41, identificador="52998224725")
+    barras, largura = barras_itf(codigo)
+    assert len(barras) == 2 + 22 * 5 + 2
+    assert largura == 405
+    assert _decodificar_itf(barras, largura) == codigo
+
+
+def test_identificador_maior_que_o_campo_nao_e_truncado():
+    with pytest.raises(ValueError):
+        montar_codigo_barras("1007", "10/2025", 303.60, identificador="12.345.678/0001-95")
+
+
+def _desenhos_de_barras(monkeypatch, homologado):
+    desenhos = []
+    monkeypatch.setattr(codigo_barras, "CAMPO_LIVRE_HOMOLOGADO", homologado)
+    monkeypatch.setattr(pdf_generator, "_desenhar_itf", lambda pdf, x, y, codigo: desenhos.append(codigo))
+    pdf = GPSGenerator().gerar_guia({"nome": "Maria", "nit": "170.33259.50-4"}, 303.6, "1007", "10/2025")
+    assert pdf.startswith(b"%PDF")
+    return desenhos
+
+
+def test_campo_livre_nao_homologado_nao_desenha_barras(monkeypatch):
+    assert _desenhos_de_barras(monkeypatch, False) == []
+
+
+def test_pdf_tem_barras_vetoriais_sem_imagem(monkeypatch):
+    assert len(_desenhos_de_barras(monkeypatch, True)[0]) == 44
+    monkeypatch.setattr(codigo_barras, "CAMPO_LIVRE_HOMOLOGADO", True)
+    pdf = GPSGenerator().gerar_guia({"nome": "Maria", "nit": "170.33259.50-4"}, 303.6, "1007", "10/2025")
+    assert b"/Subtype /Image" not in pdf and b"/XObject" not in pdf
@@ -0,0 +1,48 @@
+from datetime import date
+
+import pytest
+
+from app.utils.competencia import Competencia, feriados_bancarios
+from app.utils.constants import calcular_vencimento_padrao
+from app.utils.validators import normalizar_competencia
+
+
+def test_parse_unico_e_valor_hashable():
+    primeira = Competencia.parse(" 03/2025 ")
+    assert primeira is Competencia.parse(" 03/2025 ")
+    assert primeira == Competencia(2025, 3)
+    assert len({primeira, Competencia(2025, 3), Competencia(2025, 4)}) == 2
+    assert str(primeira) == "03/2025"
+    assert Competencia(2024, 12) < primeira
+    with pytest.raises(AttributeError):
+        primeira.mes = 4
+
+
+@pytest.mark.parametrize("texto", ["3/2025", "13/2025", "00/2025", "03-2025", "ab/2025", "03/２０２５"])
+def test_formato_invalido(texto):
+    with pytest.raises(ValueError, match="MM/AAAA"):
+        normalizar_competencia(texto)
+
+
+@pytest.mark.parametrize(
+    "competencia, esperado",
+    [
+        ("12/2025", date(2026, 1, 15)),  # quinta-feira
+        ("10/2025", date(2025, 11, 17)),  # 15/11 é sábado e feriado
+        ("02/2025", date(2025, 3, 17)),  # 15/03 é sábado
+        ("03/2024", date(2024, 4, 15)),  # segunda-feira
+        ("05/2022", date(2022, 6, 15)),  # quarta; Corpus Christi foi 16/06
+        ("05/2025", date(2025, 6, 16)),  # 15/06 é domingo
+    ],
+)
+def test_vencimento_prorroga_para_dia_util(competencia, esperado):
+    assert calcular_vencimento_padrao(competencia) == esperado
+    assert Competencia.parse(competencia).vencimento == esperado
+
+
+def test_feriados_moveis():
+    feriados = feriados_bancarios(2025)
+    assert date(2025, 3, 3) in feriados and date(2025, 3, 4) in feriados  # Carnaval
+    assert date(2025, 4, 18) in feriados  # Sexta-feira Santa
+    assert date(2025, 6, 19) in feriados  # Corpus Christi
+    assert date(2025, 11, 20) in feriados
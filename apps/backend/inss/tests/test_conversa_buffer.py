@@ -0,0 +1,111 @@
+import asyncio
+import json
+
+from postgrest.exceptions import APIError
+
+from app.services.circuit_breaker import CircuitBreaker
+from app.services.conversa_buffer import ConversaBuffer
+
+
+def _servico(servico_supabase, cliente):
+    servico = servico_supabase(cliente)
+    # Circuito próprio: as falhas simuladas não abrem o circuito compartilhado dos outros testes
+    servico._circuito_rest = CircuitBreaker("supabase_rest", limite_falhas=100, timeout=1.0)
+    return servico
+
+
+def _fora_do_ar(consulta):
+    raise ConnectionError("supabase fora do ar")
+
+
+def _mensagens(cliente):
+    return [linha["mensagem"] for linha in cliente.tabelas.get("conversas", [])]
+
+
+def test_flush_por_tamanho_em_um_unico_insert(cliente_supabase, servico_supabase):
+    cliente = cliente_supabase()
+
+    async def cenario():
+        buffer = ConversaBuffer(_servico(servico_supabase, cliente), tamanho_lote=3, intervalo=60)
+        for i in range(3):
+            buffer.registrar("u1", f"msg {i}", "ok")
+        await asyncio.sleep(0.05)
+        await buffer.encerrar()
+
+    asyncio.run(cenario())
+    assert [chamada for chamada in cliente.chamadas if chamada[0] == "insert"] == [("insert", "conversas", 3)]
+    assert _mensagens(cliente) == ["msg 0", "msg 1", "msg 2"]
+
+
+def test_encerrar_descarrega_pendentes(cliente_supabase, servico_supabase):
+    cliente = cliente_supabase()
+
+    async def cenario():
+        buffer = ConversaBuffer(_servico(servico_supabase, cliente), tamanho_lote=100, intervalo=60)
+        buffer.registrar("u1", "oi", "ola")
+        await buffer.encerrar()
+
+    asyncio.run(cenario())
+    assert _mensagens(cliente) == ["oi"]
+
+
+def test_spill_em_arquivo_e_reenvio(tmp_path, cliente_supabase, servico_supabase):
+    cliente = cliente_supabase()
+    cliente.antes = _fora_do_ar
+    spill = tmp_path / "conversas.jsonl"
+
+    async def cenario():
+        buffer = ConversaBuffer(
+            _servico(servico_supabase, cliente), tamanho_lote=100, intervalo=60, arquivo_spill=str(spill)
+        )
+        buffer.registrar("u1", "primeira", "r1")
+        await buffer.flush()
+        assert [json.loads(linha)["mensagem"] for linha in spill.read_text().splitlines()] == ["primeira"]
+
+        cliente.antes = None
+        buffer.registrar("u1", "segunda", "r2")
+        await buffer.encerrar()
+
+    asyncio.run(cenario())
+    assert not spill.exists()
+    assert sorted(_mensagens(cliente)) == ["primeira", "segunda"]
+
+
+def test_linha_recusada_pelo_banco_nao_trava_o_buffer(cliente_supabase, servico_supabase):
+    cliente = cliente_supabase()
+
+    def chave_estrangeira(consulta):
+        if any(linha["usuario_id"] == "inexistente" for linha in consulta.linhas_escritas()):
+            raise APIError({"code": "23503", "message": "violates foreign key constraint"})
+
+    cliente.antes = chave_estrangeira
+
+    async def cenario():
+        buffer = ConversaBuffer(_servico(servico_supabase, cliente), tamanho_lote=100, intervalo=60)
+        buffer.registrar("u1", "antes", "r")
+        buffer.registrar("inexistente", "ruim", "r")
+        buffer.registrar("u1", "depois", "r")
+        assert await buffer.flush() == 2
+        buffer.registrar("u1", "seguinte", "r")
+        assert await buffer.flush() == 1
+        return buffer
+
+    buffer = asyncio.run(cenario())
+    assert _mensagens(cliente) == ["antes", "depois", "seguinte"]
+    assert buffer.descartadas == 1
+    assert buffer._pendentes == []
+
+
+def test_encerrar_sem_spill_avisa_linhas_perdidas(capsys, cliente_supabase, servico_supabase):
+    cliente = cliente_supabase()
+    cliente.antes = _fora_do_ar
+
+    async def cenario():
+        buffer = ConversaBuffer(_servico(servico_supabase, cliente), tamanho_lote=100, intervalo=60)
+        buffer.registrar("u1", "oi", "ola")
+        await buffer.encerrar()
+        return buffer
+
+    buffer = asyncio.run(cenario())
+    assert buffer._pendentes == []
+    assert "[ERROR] 1 conversa(s) perdida(s) no encerramento" in capsys.readouterr().out
@@ -0,0 +1,46 @@
+import asyncio
+
+from app.services.debounce import DebounceMensagens
+
+
+def test_rajada_vira_uma_unica_mensagem():
+    debounce = DebounceMensagens(janela=0.05, espera_maxima=1.0)
+
+    async def cenario():
+        async def enviar(texto, atraso):
+            await asyncio.sleep(atraso)
+            return await debounce.agrupar("5511999999999", texto)
+
+        return await asyncio.gather(enviar("oi", 0), enviar("sou autônomo", 0.01), enviar("quanto pago?", 0.02))
+
+    resultados = asyncio.run(cenario())
+    assert resultados == ["oi\nsou autônomo\nquanto pago?", None, None]
+
+
+def test_espera_maxima_limita_a_rajada():
+    debounce = DebounceMensagens(janela=0.04, espera_maxima=0.1)
+
+    async def cenario():
+        lider = asyncio.create_task(debounce.agrupar("5511999999999", "0"))
+        for i in range(1, 20):
+            await asyncio.sleep(0.02)
+            if lider.done():
+                break
+            await debounce.agrupar("5511999999999", str(i))
+        return await lider, i
+
+    texto, enviadas = asyncio.run(cenario())
+    assert enviadas < 19
+    assert texto.startswith("0\n1")
+
+
+def test_numeros_diferentes_e_janela_zero_nao_agrupam():
+    async def cenario():
+        debounce = DebounceMensagens(janela=0.02)
+        juntos = await asyncio.gather(debounce.agrupar("a", "x"), debounce.agrupar("b", "y"))
+        desligado = await DebounceMensagens(janela=0).agrupar("a", "z")
+        return juntos, desligado
+
+    juntos, desligado = asyncio.run(cenario())
+    assert juntos == ["x", "y"]
+    assert desligado == "z"
@@ -0,0 +1,85 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.routes import inss
+from app.services.whatsapp_service import WhatsAppMessageResult
+from app.utils.serializacao import RespostaJSON
+
+PEDIDO = {"whatsapp": "+5511999999999", "tipo_contribuinte": "autonomo", "valor_base": 2000, "competencia": "10/2025"}
+
+
+@pytest.fixture
+def emissao(monkeypatch):
+    """Cliente da rota /emitir com Supabase e Twilio falsos; `enviadas` guarda as mensagens."""
+    enviadas = []
+
+    async def obter_ou_criar_usuario(whatsapp, dados=None):
+        return {"id": "u1", "whatsapp": whatsapp, "nome": "Ana"}
+
+    async def salvar_guia(user_id, guia_data):
+        return {"id": "g1", "usuario_id": user_id, **guia_data}
+
+    async def enviar_pdf_whatsapp(numero, pdf_bytes, mensagem):
+        enviadas.append(mensagem)
+        return WhatsAppMessageResult(sid="SM1", status="queued", media_url=None)
+
+    monkeypatch.setattr(inss.supabase_service, "obter_ou_criar_usuario", obter_ou_criar_usuario)
+    monkeypatch.setattr(inss.supabase_service, "salvar_guia", salvar_guia)
+    monkeypatch.setattr(inss.whatsapp_service, "enviar_pdf_whatsapp", enviar_pdf_whatsapp)
+    app = FastAPI(default_response_class=RespostaJSON)
+    app.include_router(inss.router)
+    return TestClient(app, raise_server_exceptions=False), enviadas
+
+
+def test_guia_sem_codigo_de_barras_nao_e_anunciada_como_pronta(emissao, monkeypatch):
+    monkeypatch.setattr(inss.codigo_barras, "CAMPO_LIVRE_HOMOLOGADO", False)
+    cliente, enviadas = emissao
+
+    resposta = cliente.post("/api/v1/guias/emitir", json=PEDIDO)
+
+    assert resposta.status_code == 200
+    assert resposta.json()["status"] == "sem_valor_para_pagamento"
+    assert "SEM VALOR PARA PAGAMENTO" in resposta.json()["aviso"]
+    [mensagem] = enviadas
+    assert "está pronta" not in mensagem and "SEM VALOR PARA PAGAMENTO" in mensagem
+
+
+def test_guia_homologada_e_emitida(emissao, monkeypatch):
+    monkeypatch.setattr(inss.codigo_barras, "CAMPO_LIVRE_HOMOLOGADO", True)
+    cliente, enviadas = emissao
+
+    resposta = cliente.post("/api/v1/guias/emitir", json=PEDIDO)
+
+    assert resposta.json()["status"] == "emitida" and resposta.json()["aviso"] is None
+    assert "está pronta" in enviadas[0]
+
+
+@pytest.mark.parametrize(
+    "tipo, esperado",
+    [("facultativo", 200), ("facultativo_baixa_renda", 200), ("complementacao", 400), ("inexistente", 400)],
+)
+def test_gerar_pdf_usa_o_calculo_por_tipo_compartilhado(emissao, tipo, esperado):
+    cliente, _ = emissao
+    pedido = {"nome_segurado": "Ana", "cpf": "529.982.247-25", "valor_base": 2000, "tipo_contribuinte": tipo}
+
+    resposta = cliente.post("/api/v1/guias/gerar-pdf", json=pedido)
+
+    assert resposta.status_code == esperado
+    if esperado == 200:
+        assert resposta.content.startswith(b"%PDF")
+
+
+def test_guia_gravada_sem_retorno_do_postgrest_usa_o_id_local(emissao, monkeypatch, cliente_supabase):
+    cliente, _ = emissao
+    banco = cliente_supabase()
+    banco.sem_retorno = True
+    monkeypatch.delattr(inss.supabase_service, "salvar_guia")  # volta ao salvar_guia real
+    monkeypatch.setattr(inss.supabase_service, "_client", banco)
+
+    resposta = cliente.post("/api/v1/guias/emitir", json=PEDIDO)
+
+    assert resposta.status_code == 200
+    [guia] = banco.tabelas["guias_inss"]
+    assert resposta.json()["guia"]["id"] == guia["id"]
+    assert resposta.json()["guia"]["competencia"] == "10/2025"
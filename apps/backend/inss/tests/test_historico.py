@@ -0,0 +1,110 @@
+import asyncio
+import base64
+import json
+import uuid
+
+import pytest
+
+from app.models.registros import GuiaHistorico, Usuario
+from app.services.supabase_service import codificar_cursor, decodificar_cursor
+
+IDS = [str(uuid.UUID(int=indice + 1)) for indice in range(5)]
+
+
+def _guias(quantidade, valor=None):
+    """Guias do usuario u1, da mais recente para a mais antiga."""
+    guias = [{"id": IDS[i], "usuario_id": "u1", "created_at": f"2025-10-0{9 - i}"} for i in range(quantidade)]
+    if valor is not None:
+        for indice, guia in enumerate(guias):
+            guia["valor"] = valor * indice
+    return guias
+
+
+def test_cursor_ida_e_volta():
+    cursor = codificar_cursor("2025-10-01T12:00:00+00:00", IDS[0])
+    assert decodificar_cursor(cursor) == ("2025-10-01T12:00:00+00:00", IDS[0])
+
+
+def _cursor_bruto(created_at, registro_id):
+    return base64.urlsafe_b64encode(json.dumps([created_at, registro_id]).encode()).decode().rstrip("=")
+
+
+@pytest.mark.parametrize(
+    "cursor",
+    [
+        "nao-e-um-cursor",
+        _cursor_bruto("2025-10-01", 'x",id.gt.0)'),
+        _cursor_bruto('2025-10-01",id.gt.0)', IDS[0]),
+        _cursor_bruto("2025-10-01", 1),
+    ],
+)
+def test_cursor_invalido(cursor):
+    with pytest.raises(ValueError):
+        decodificar_cursor(cursor)
+
+
+def test_historico_pagina_com_projecao_e_cursor(cliente_supabase, servico_supabase):
+    servico = servico_supabase(cliente_supabase({"guias_inss": _guias(5)}))
+
+    pagina = asyncio.run(servico.buscar_historico("u1", limite=2))
+
+    assert [guia["id"] for guia in pagina["guias"]] == IDS[:2]
+    assert decodificar_cursor(pagina["proximo_cursor"]) == ("2025-10-08", IDS[1])
+    chamadas = servico._client.chamadas
+    assert ("table", "guias_inss") in chamadas
+    assert ("eq", "usuario_id", "u1") in chamadas
+    assert not any(chamada[0] == "select" and chamada[1] == "*" for chamada in chamadas)
+
+    asyncio.run(servico.buscar_historico("u1", limite=2, cursor=pagina["proximo_cursor"]))
+    assert any(chamada[0] == "or" and f"id.lt.{IDS[1]}" in chamada[1] for chamada in chamadas)
+
+
+def test_historico_ultima_pagina_sem_cursor(cliente_supabase, servico_supabase):
+    servico = servico_supabase(cliente_supabase({"guias_inss": _guias(1)}))
+    pagina = asyncio.run(servico.buscar_historico("u1", limite=10))
+    assert pagina["proximo_cursor"] is None
+
+
+def test_historico_tipado(cliente_supabase, servico_supabase):
+    servico = servico_supabase(cliente_supabase({"guias_inss": _guias(3, valor=10.0)}))
+    pagina = asyncio.run(servico.buscar_historico("u1", limite=2, tipo=GuiaHistorico))
+
+    assert pagina["guias"] == [
+        GuiaHistorico(id=IDS[0], created_at="2025-10-09", valor=0.0),
+        GuiaHistorico(id=IDS[1], created_at="2025-10-08", valor=10.0),
+    ]
+    assert decodificar_cursor(pagina["proximo_cursor"]) == ("2025-10-08", IDS[1])
+    assert not hasattr(pagina["guias"][0], "__dict__")
+
+
+def test_usuario_com_projecao_e_limite(cliente_supabase, servico_supabase):
+    usuarios = [{"id": "u1", "whatsapp": "+5511999999999", "nome": "Ana", "coluna_extra": 1}]
+    servico = servico_supabase(cliente_supabase({"usuarios": usuarios}))
+
+    usuario = asyncio.run(servico.obter_usuario("+5511999999999"))
+
+    assert usuario == Usuario(id="u1", whatsapp="+5511999999999", nome="Ana")
+    assert ("select", "id,whatsapp,nome,cpf,nit,tipo_contribuinte,created_at") in servico._client.chamadas
+    assert asyncio.run(servico.obter_usuario_por_whatsapp("+5511999999999"))["nome"] == "Ana"
+
+
+def test_iterar_historico_propaga_falha_no_meio_da_exportacao(cliente_supabase, servico_supabase):
+    cliente = cliente_supabase({"guias_inss": _guias(5)})
+    servico = servico_supabase(cliente)
+    paginas = []
+
+    def cai_na_segunda_pagina(consulta):
+        paginas.append(consulta)
+        if len(paginas) > 1:
+            raise ConnectionError("PostgREST caiu no meio")
+
+    cliente.antes = cai_na_segunda_pagina
+    recebidas = []
+
+    async def exportar():
+        async for guia in servico.iterar_historico("u1", tamanho_pagina=2):
+            recebidas.append(guia)
+
+    with pytest.raises(ConnectionError):
+        asyncio.run(exportar())
+    assert [guia["id"] for guia in recebidas] == IDS[:2]
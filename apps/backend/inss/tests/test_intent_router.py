@@ -0,0 +1,169 @@
+import asyncio
+
+import pytest
+
+from app.services.inss_calculator import INSSCalculator
+from app.services.intent_router import IntentRouter, extrair_valor
+
+
+class _SupabaseFalso:
+    async def buscar_historico(self, usuario_id, limite=20, cursor=None):
+        return {
+            "guias": [{"competencia": "09/2025", "codigo_gps": "1007", "valor": 400.0, "status": "pago"}],
+            "proximo_cursor": None,
+        }
+
+
+def _router(emitir_guia=None):
+    return IntentRouter(INSSCalculator(), _SupabaseFalso(), emitir_guia=emitir_guia)
+
+
+@pytest.mark.parametrize(
+    "mensagem, esperado",
+    [
+        ("quanto pago sobre 3000?", 3000.0),
+        ("R$ 3.000,50 como autônomo", 3000.5),
+        ("ganho 2 mil por mês", 2000.0),
+        ("quanto pago em 2025 sobre 1800", 1800.0),
+        ("guia de 10/2025 sobre 2500", 2500.0),
+    ],
+)
+def test_extrair_valor(mensagem, esperado):
+    assert extrair_valor(mensagem) == esperado
+
+
+def test_extrair_valor_ignora_numero_sem_ancora_de_renda():
+    assert extrair_valor("tenho 35 anos, autonomo, ganho 3000") == 3000.0
+    assert extrair_valor("tenho 35 anos e sou autonomo") is None
+
+
+def test_calculo_respondido_sem_llm():
+    resposta = asyncio.run(
+        _router().responder("Quanto pago de INSS sobre 3000 como autônomo?", {"whatsapp": "5511999999999"})
+    )
+    assert resposta.intencao.nome == "calculo"
+    assert "1007" in resposta.texto
+    assert "R$ 600,00" in resposta.texto
+
+
+def test_vencimento_por_extenso():
+    intencao = _router().classificar("quando vence a guia de dezembro de 2025?")
+    assert intencao.nome == "vencimento"
+    assert intencao.slots["competencia"] == "12/2025"
+    texto = _router()._vencimento(intencao.slots)
+    assert "15/01/2026" in texto
+
+
+def test_historico_usa_consulta_direta():
+    resposta = asyncio.run(_router().responder("meu histórico de guias", {}, usuario={"id": "u1"}))
+    assert resposta.intencao.nome == "historico"
+    assert "09/2025" in resposta.texto
+    assert _router().classificar("quero ver minhas guias").nome == "historico"
+
+
+@pytest.mark.parametrize(
+    "mensagem",
+    [
+        "como consulto meu histórico de contribuições no CNIS?",
+        "meu histórico no INSS tem um vínculo errado",
+    ],
+)
+def test_historico_do_cnis_nao_vira_lista_de_guias(mensagem):
+    intencao = _router().classificar(mensagem)
+    assert intencao is None or intencao.nome != "historico"
+
+
+def _emissor(chamadas):
+    async def emitir(whatsapp, tipo, valor, plano, competencia):
+        chamadas.append((whatsapp, tipo, valor, plano, competencia))
+        return None
+
+    return emitir
+
+
+def test_emissao_so_acontece_depois_do_sim():
+    chamadas = []
+    router = _router(_emissor(chamadas))
+    contexto = {"whatsapp": "5511999999999"}
+
+    async def conversar():
+        pedido = await router.responder("emitir guia autônomo 10/2025, renda de R$ 2000", contexto)
+        assert pedido.intencao.nome == "emissao"
+        assert "Confirma?" in pedido.texto and "R$ 400,00" in pedido.texto
+        assert chamadas == []
+        return await router.responder("Sim", contexto)
+
+    confirmada = asyncio.run(conversar())
+    assert confirmada.intencao.nome == "confirmacao"
+    assert confirmada.texto is None
+    assert chamadas == [("5511999999999", "autonomo", 2000.0, "normal", "10/2025")]
+
+
+def test_emissao_cancelada_ou_sem_resposta_nao_emite():
+    chamadas = []
+    router = _router(_emissor(chamadas))
+    contexto = {"whatsapp": "5511999999999"}
+
+    async def conversar():
+        await router.responder("emitir guia autônomo renda 2000", contexto)
+        cancelada = await router.responder("não", contexto)
+        await router.responder("emitir guia autônomo renda 2000", contexto)
+        await router.responder("qual o teto do INSS?", contexto)
+        depois = await router.responder("sim", contexto)
+        return cancelada, depois
+
+    cancelada, depois = asyncio.run(conversar())
+    assert cancelada.intencao.nome == "cancelamento"
+    assert depois is None
+    assert chamadas == []
+
+
+def test_confirmacao_expirada_nao_emite():
+    chamadas = []
+    router = IntentRouter(INSSCalculator(), _SupabaseFalso(), emitir_guia=_emissor(chamadas), confirmacao_ttl=0)
+    contexto = {"whatsapp": "5511999999999"}
+
+    async def conversar():
+        await router.responder("emitir guia autônomo renda 2000", contexto)
+        return await router.responder("sim", contexto)
+
+    assert asyncio.run(conversar()) is None
+    assert chamadas == []
+
+
+@pytest.mark.parametrize(
+    "mensagem",
+    [
+        "nao quero emitir guia agora, autonomo 3000",
+        "nunca gerei guia do inss, autonomo ganho 3000",
+        "como gerar a guia de autonomo com renda de R$ 3000?",
+        "posso emitir a gps sendo autonomo com salario de 2000?",
+    ],
+)
+def test_negacao_e_duvida_nao_sao_emissao(mensagem):
+    intencao = _router(_emissor([])).classificar(mensagem)
+    assert intencao is None or intencao.nome != "emissao"
+
+
+def test_idade_nao_vira_valor_da_emissao():
+    intencao = _router().classificar("emitir guia: tenho 35 anos, autonomo, ganho 3000")
+    assert intencao.nome == "emissao"
+    assert intencao.slots["valor_base"] == 3000.0
+    assert _router().classificar("emitir guia: tenho 35 anos, autonomo") is None
+
+
+@pytest.mark.parametrize(
+    "mensagem",
+    [
+        "paguei a guia vencida, e agora?",
+        "qual o prazo para pedir aposentadoria?",
+        "ate quando posso pedir o auxilio doenca?",
+    ],
+)
+def test_vencimento_exige_contexto_de_guia(mensagem):
+    assert _router().classificar(mensagem) is None
+
+
+def test_pergunta_aberta_vai_para_o_llm():
+    assert _router().classificar("o que acontece se eu atrasar a contribuição?") is None
+    assert _router().classificar("quanto pago de INSS?") is None
@@ -0,0 +1,97 @@
+import asyncio
+
+import pytest
+
+from app.agents import GuiasMEIAgent
+from app.services.circuit_breaker import CircuitoAbertoError
+from app.services.limitador import LimitadorAdaptativo, LimitadorSaturadoError
+
+
+def test_aimd_sobe_devagar_e_cai_pela_metade():
+    limitador = LimitadorAdaptativo("teste", limite_inicial=4, latencia_alvo=1.0)
+
+    async def cenario():
+        async with limitador.slot():
+            pass
+        depois_do_sucesso = limitador.limite
+        with pytest.raises(RuntimeError):
+            async with limitador.slot():
+                raise RuntimeError("429")
+        return depois_do_sucesso
+
+    depois_do_sucesso = asyncio.run(cenario())
+    assert depois_do_sucesso == pytest.approx(4.25)
+    assert limitador.limite == pytest.approx(2.125)
+    assert limitador.em_uso == 0
+
+
+def test_circuito_aberto_nao_reduz_limite():
+    limitador = LimitadorAdaptativo("teste", limite_inicial=4)
+
+    async def cenario():
+        with pytest.raises(CircuitoAbertoError):
+            async with limitador.slot():
+                raise CircuitoAbertoError("openai")
+
+    asyncio.run(cenario())
+    assert limitador.limite == 4
+
+
+def test_fila_respeita_limite_e_slo_de_espera():
+    limitador = LimitadorAdaptativo("teste", limite_inicial=1, fila_maxima=1, espera_maxima=0.05)
+    simultaneas = []
+
+    async def chamada(duracao):
+        async with limitador.slot():
+            simultaneas.append(limitador.em_uso)
+            await asyncio.sleep(duracao)
+
+    async def cenario():
+        return await asyncio.gather(chamada(0.2), chamada(0), chamada(0), return_exceptions=True)
+
+    resultados = asyncio.run(cenario())
+    assert resultados[0] is None
+    assert isinstance(resultados[1], LimitadorSaturadoError) and "espera" in str(resultados[1])
+    assert isinstance(resultados[2], LimitadorSaturadoError) and "fila cheia" in str(resultados[2])
+    assert max(simultaneas) == 1
+    assert limitador.metricas()["rejeitadas"] == 2
+
+
+def test_agente_fecha_stream_sem_vazar_vaga():
+    class _LLM:
+        async def astream(self, mensagens):
+            for _ in range(10):
+                yield type("Pedaco", (), {"content": "Parágrafo completo.\n\n"})()
+
+    limitador = LimitadorAdaptativo("teste", limite_inicial=1)
+    agente = GuiasMEIAgent(user_type="autonomo", llm=_LLM(), limitador=limitador)
+
+    async def cenario():
+        stream = agente.processar_mensagem_stream("explique", {}, tamanho_minimo=5)
+        primeiro = await stream.__anext__()
+        await stream.aclose()
+        return primeiro
+
+    assert asyncio.run(cenario()) == "Parágrafo completo."
+    assert limitador.em_uso == 0
+
+
+def test_envio_lento_dos_blocos_nao_conta_como_latencia_do_llm():
+    class _LLM:
+        async def astream(self, mensagens):
+            for _ in range(3):
+                yield type("Pedaco", (), {"content": "Parágrafo completo.\n\n"})()
+
+    limitador = LimitadorAdaptativo("teste", limite_inicial=2, latencia_alvo=0.05)
+    agente = GuiasMEIAgent(user_type="autonomo", llm=_LLM(), limitador=limitador)
+    vagas_em_uso = []
+
+    async def cenario():
+        async for _ in agente.processar_mensagem_stream("explique", {}, tamanho_minimo=5):
+            await asyncio.sleep(0.05)  # envio de cada bloco ao Twilio
+            vagas_em_uso.append(limitador.em_uso)
+
+    asyncio.run(cenario())
+    # A vaga foi devolvida quando o LLM terminou, e o limite subiu em vez de cair
+    assert vagas_em_uso == [0, 0, 0]
+    assert limitador.limite == pytest.approx(2.5)
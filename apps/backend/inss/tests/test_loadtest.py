@@ -0,0 +1,29 @@
+from fastapi.testclient import TestClient
+
+from loadtest.carga import Amostra, ResultadoCarga, montar_requisicao, percentil
+from loadtest.fakes import ConfigBackends, PerfilServico, criar_backend_falso
+
+
+def test_percentis_e_resumo_por_cenario():
+    resultado = ResultadoCarga(rps_alvo=10, duracao=2.0)
+    resultado.amostras = [Amostra("emitir", 200, i / 1000) for i in range(1, 101)]
+    resultado.amostras.append(Amostra("emitir", 503, 0.5))
+    emitir = resultado.resumo()[0]
+    assert percentil(sorted(range(1, 101)), 95) == 95
+    assert emitir.total == 101 and emitir.sucesso == 100
+    assert emitir.erros == {"503": 1}
+    assert emitir.throughput == 50.0
+
+
+def test_backend_falso_postgrest_e_injecao_de_erro():
+    config = ConfigBackends(perfis={"twilio": PerfilServico(taxa_erro=1.0)})
+    cliente = TestClient(criar_backend_falso(config))
+    criado = cliente.post("/rest/v1/usuarios", json={"whatsapp": "+5511999999999"}).json()[0]
+    assert cliente.get("/rest/v1/usuarios", params={"whatsapp": "eq.+5511999999999"}).json() == [criado]
+    assert cliente.post("/2010-04-01/Accounts/AC1/Messages.json", data={"To": "x"}).status_code == 503
+    assert cliente.post("/v1/chat/completions", json={"messages": []}).json()["choices"][0]["message"]["content"]
+
+
+def test_cenarios_montam_requisicoes_validas():
+    assert montar_requisicao("emitir", 1).json["whatsapp"] != montar_requisicao("emitir", 2).json["whatsapp"]
+    assert montar_requisicao("webhook", 0).formulario["From"].startswith("whatsapp:+55")
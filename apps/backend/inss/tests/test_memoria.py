@@ -0,0 +1,56 @@
+import asyncio
+
+from app.agents import GuiasMEIAgent, MemoriaConversa, MemoriaConversas
+from app.agents.memory import estimar_tokens
+
+
+def test_janela_tem_tamanho_constante():
+    memoria = MemoriaConversa(max_turnos=4)
+    tamanhos = []
+    for i in range(50):
+        memoria.adicionar(f"pergunta {i} sobre autonomo com base de 2000 reais " * 5, "resposta detalhada " * 40)
+        resumo, turnos = memoria.janela(orcamento_tokens=600)
+        tamanhos.append(estimar_tokens(resumo) + sum(estimar_tokens(p) + estimar_tokens(r) for p, r in turnos))
+    assert max(tamanhos) <= 600
+    assert len(memoria.turnos) == 4
+
+
+def test_turnos_antigos_viram_fatos_no_resumo():
+    memoria = MemoriaConversa(max_turnos=1)
+    memoria.adicionar("sou autônomo e ganho 3000 reais, competência 10/2025", "ok")
+    memoria.adicionar("e quando vence?", "dia 15")
+    assert "tipo_contribuinte: autonomo" in memoria.resumo
+    assert "ultimo_valor_informado: 3000.00" in memoria.resumo
+    assert "ultima_competencia: 10/2025" in memoria.resumo
+
+
+def test_store_carrega_de_conversas_uma_vez_e_aplica_lru():
+    chamadas = []
+
+    async def carregar(usuario_id, limite):
+        chamadas.append(usuario_id)
+        return [{"mensagem": "oi", "resposta": "olá"}]
+
+    async def cenario():
+        store = MemoriaConversas(carregar=carregar, max_conversas=1)
+        primeira = await store.obter("5511999999999", "u1")
+        segunda = await store.obter("5511999999999", "u1")
+        await store.obter("5511888888888", "u2")
+        return primeira, segunda, store
+
+    primeira, segunda, store = asyncio.run(cenario())
+    assert primeira is segunda
+    assert list(primeira.turnos) == [("oi", "olá")]
+    assert chamadas == ["u1", "u2"]
+    assert list(store._memorias) == ["5511888888888"]
+
+
+def test_agente_inclui_memoria_no_prompt():
+    memoria = MemoriaConversa(max_turnos=3)
+    memoria.adicionar("qual o código do autônomo?", "1007")
+    agente = GuiasMEIAgent(user_type="autonomo")
+    mensagens = agente._montar_mensagens("e o valor?", {}, memoria)
+    conteudos = [m.content for m in mensagens]
+    assert "qual o código do autônomo?" in conteudos
+    assert "1007" in conteudos
+    assert conteudos[-1].endswith("e o valor?\n")
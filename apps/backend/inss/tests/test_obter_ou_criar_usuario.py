@@ -0,0 +1,60 @@
+import asyncio
+
+
+def _obter_ou_criar_usuario(cliente, parametros):
+    """Como a função SQL: cria pelo whatsapp e só preenche campos vazios."""
+    whatsapp = parametros["p_whatsapp"]
+    usuarios = cliente.tabelas.setdefault("usuarios", [])
+    usuario = next((item for item in usuarios if item["whatsapp"] == whatsapp), None)
+    if usuario is None:
+        usuario = {"id": f"id-{len(usuarios)}", "whatsapp": whatsapp}
+        usuarios.append(usuario)
+    for chave, valor in parametros.items():
+        usuario.setdefault(chave[2:], valor)
+    return dict(usuario)
+
+
+def _chamadas_rpc(cliente):
+    return sum(1 for chamada in cliente.chamadas if chamada[0] == "rpc")
+
+
+def test_requisicoes_simultaneas_compartilham_uma_chamada(cliente_supabase, servico_supabase):
+    cliente = cliente_supabase(rpcs={"obter_ou_criar_usuario": _obter_ou_criar_usuario})
+    servico = servico_supabase(cliente)
+
+    async def executar():
+        return await asyncio.gather(
+            *(servico.obter_ou_criar_usuario("+5511999990000", {"tipo_contribuinte": "autonomo"}) for _ in range(10))
+        )
+
+    usuarios = asyncio.run(executar())
+    assert _chamadas_rpc(cliente) == 1
+    assert {usuario["id"] for usuario in usuarios} == {"id-0"}
+    assert usuarios[0]["tipo_contribuinte"] == "autonomo"
+    assert servico._usuarios_em_voo == {}
+
+    # Nova chamada (fora do voo anterior) vai ao banco e não sobrescreve o tipo
+    usuario = asyncio.run(servico.obter_ou_criar_usuario("+5511999990000", {"tipo_contribuinte": "complementacao"}))
+    assert _chamadas_rpc(cliente) == 2
+    assert usuario["tipo_contribuinte"] == "autonomo"
+
+
+def test_sem_funcao_no_banco_usa_select_e_insert(cliente_supabase, servico_supabase):
+    servico = servico_supabase(cliente_supabase())
+    chamadas = []
+
+    async def obter(whatsapp):
+        chamadas.append(("obter", whatsapp))
+        return None
+
+    async def criar(dados):
+        chamadas.append(("criar", dados["whatsapp"]))
+        return {"id": "novo", **dados}
+
+    servico.obter_usuario_por_whatsapp = obter
+    servico.criar_usuario = criar
+
+    usuario = asyncio.run(servico.obter_ou_criar_usuario("+5511999990001"))
+    assert usuario["id"] == "novo"
+    assert chamadas == [("obter", "+5511999990001"), ("criar", "+5511999990001")]
+    assert servico._rpc_usuario_disponivel is False
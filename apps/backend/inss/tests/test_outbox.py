@@ -0,0 +1,130 @@
+import asyncio
+
+import pytest
+from postgrest.exceptions import APIError
+
+from app.services.outbox import OfflineOutbox, OutboxReplayer, erro_permanente
+
+
+def _chave_estrangeira(consulta):
+    if any(linha.get("usuario_id") == "inexistente" for linha in consulta.linhas_escritas()):
+        raise APIError({"code": "23503", "message": "violates foreign key constraint"})
+
+
+def _fora_do_ar(consulta):
+    raise ConnectionError("PostgREST fora")
+
+
+def test_escritas_offline_sao_reenviadas_com_ids_remapeados(tmp_path, cliente_supabase, servico_supabase):
+    outbox = OfflineOutbox(str(tmp_path / "outbox.sqlite3"))
+    servico = servico_supabase(False, outbox=outbox)
+
+    async def emitir_offline():
+        usuario = await servico.criar_usuario({"whatsapp": "5511999999999"})
+        guia = await servico.salvar_guia(usuario["id"], {"codigo_gps": "1007", "valor": 303.6})
+        return usuario, guia
+
+    usuario, guia = asyncio.run(emitir_offline())
+    assert guia["usuario_id"] == usuario["id"]
+    assert outbox.total() == 2
+
+    # O usuario ja existia no Supabase: o id offline deve ser trocado pelo definitivo
+    banco = {"usuarios": [{"id": "id-real", "whatsapp": "5511999999999"}]}
+    servico._client = cliente_supabase(banco)
+    total = asyncio.run(OutboxReplayer(outbox, servico).reenviar())
+
+    assert total == 2
+    assert outbox.total() == 0
+    assert len(banco["usuarios"]) == 1
+    assert banco["guias_inss"][0]["usuario_id"] == "id-real"
+    assert banco["guias_inss"][0]["id"] == guia["id"]
+
+
+def test_replay_mantem_outbox_enquanto_supabase_fora(tmp_path, servico_supabase):
+    outbox = OfflineOutbox(str(tmp_path / "outbox.sqlite3"))
+    outbox.registrar("guias_inss", {"id": "g1"})
+    servico = servico_supabase(False, outbox=outbox)
+    servico.tentar_reconectar = lambda: None
+
+    assert asyncio.run(OutboxReplayer(outbox, servico).reenviar()) == 0
+    assert outbox.total() == 1
+
+
+def test_erro_permanente_separa_4xx_de_falhas_transitorias():
+    assert erro_permanente(APIError({"code": "23503", "message": "fk"}))
+    assert erro_permanente(APIError({"code": "400", "message": "Bad Request"}))
+    assert not erro_permanente(APIError({"code": "PGRST000", "message": "sem conexao"}))
+    assert not erro_permanente(APIError({"code": "503", "message": "Service Unavailable"}))
+    assert not erro_permanente(APIError({"code": "57014", "message": "statement timeout"}))
+    assert not erro_permanente(ConnectionError("rede"))
+
+
+def test_create_record_relanca_erro_permanente_sem_usar_outbox(tmp_path, cliente_supabase, servico_supabase):
+    outbox = OfflineOutbox(str(tmp_path / "outbox.sqlite3"))
+    cliente = cliente_supabase()
+    cliente.antes = _chave_estrangeira
+    servico = servico_supabase(cliente, outbox=outbox)
+
+    with pytest.raises(APIError):
+        asyncio.run(servico.salvar_guia("inexistente", {"codigo_gps": "1007"}))
+    assert outbox.total() == 0
+
+    cliente.antes = _fora_do_ar
+    guia = asyncio.run(servico.salvar_guia("u1", {"codigo_gps": "1007"}))
+    assert outbox.pendentes()[0][2]["id"] == guia["id"]
+
+
+def test_replay_descarta_linha_recusada_e_continua(tmp_path, cliente_supabase, servico_supabase):
+    outbox = OfflineOutbox(str(tmp_path / "outbox.sqlite3"))
+    outbox.registrar("guias_inss", {"id": "g1", "usuario_id": "u1"})
+    outbox.registrar("guias_inss", {"id": "g2", "usuario_id": "inexistente"})
+    outbox.registrar("guias_inss", {"id": "g3", "usuario_id": "u1"})
+    cliente = cliente_supabase()
+    cliente.antes = _chave_estrangeira
+    servico = servico_supabase(cliente, outbox=outbox)
+
+    assert asyncio.run(OutboxReplayer(outbox, servico).reenviar()) == 2
+    assert [guia["id"] for guia in cliente.tabelas["guias_inss"]] == ["g1", "g3"]
+    assert outbox.total() == 0
+    assert outbox.total_mortos() == 1
+
+
+def test_insert_abandonado_e_replay_nao_duplicam_a_guia(tmp_path, cliente_supabase, servico_supabase):
+    outbox = OfflineOutbox(str(tmp_path / "outbox.sqlite3"))
+    cliente = cliente_supabase()
+    servico = servico_supabase(cliente, outbox=outbox)
+
+    def resposta_perdida(consulta):
+        raise TimeoutError("insert abandonado")  # a thread gravou a linha, mas a resposta não chegou
+
+    cliente.depois = resposta_perdida
+    guia = asyncio.run(servico.salvar_guia("u1", {"codigo_gps": "1007"}))
+    assert cliente.tabelas["guias_inss"][0]["id"] == guia["id"]
+
+    cliente.depois = None
+    assert asyncio.run(OutboxReplayer(outbox, servico).reenviar()) == 1
+    assert [linha["id"] for linha in cliente.tabelas["guias_inss"]] == [guia["id"]]
+
+
+def test_replay_remapeia_todos_os_ids_offline_da_mesma_chave(tmp_path, cliente_supabase, servico_supabase):
+    outbox = OfflineOutbox(str(tmp_path / "outbox.sqlite3"))
+    outbox.registrar("usuarios", {"id": "off-1", "whatsapp": "5511999999999"})
+    outbox.registrar("usuarios", {"id": "off-2", "whatsapp": "5511999999999"})
+    outbox.registrar("guias_inss", {"id": "g1", "usuario_id": "off-1"})
+    outbox.registrar("guias_inss", {"id": "g2", "usuario_id": "off-2"})
+    banco = {"usuarios": [{"id": "id-real", "whatsapp": "5511999999999"}]}
+    cliente = cliente_supabase(banco)
+
+    def chave_estrangeira(consulta):
+        ids = {usuario["id"] for usuario in banco["usuarios"]}
+        if consulta.tabela == "guias_inss" and any(l["usuario_id"] not in ids for l in consulta.linhas_escritas()):
+            raise APIError({"code": "23503", "message": "violates foreign key constraint"})
+
+    cliente.antes = chave_estrangeira
+    servico = servico_supabase(cliente, outbox=outbox)
+
+    assert asyncio.run(OutboxReplayer(outbox, servico).reenviar()) == 4
+    assert [guia["usuario_id"] for guia in banco["guias_inss"]] == ["id-real", "id-real"]
+    assert outbox.total_mortos() == 0
+    # Nenhum pendente referencia mais os ids offline: o mapeamento é podado
+    assert outbox.ids_definitivos() == {}
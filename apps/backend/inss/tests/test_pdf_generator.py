@@ -0,0 +1,48 @@
+import re
+
+import pytest
+
+from app.services.pdf_generator import GPSGenerator
+
+DADOS = {"nome": "Maria da Conceição", "nit": "170.33259.50-4", "whatsapp": "+5511999999999"}
+
+
+def _info(pdf: bytes) -> bytes:
+    numero = re.search(rb"/Info (\d+) 0 R", pdf).group(1)
+    return re.search(rb"\n" + numero + rb" 0 obj\n<<(.*?)>>\nendobj", pdf, re.S).group(1)
+
+
+def test_perfil_whatsapp_compacto_e_deterministico():
+    gerador = GPSGenerator()
+    compacto = gerador.gerar_guia(DADOS, 303.6, "1007", "10/2025")
+    impressao = gerador.gerar_guia(DADOS, 303.6, "1007", "10/2025", perfil="print")
+
+    assert compacto == gerador.gerar_guia(DADOS, 303.6, "1007", "10/2025")
+    assert len(compacto) < len(impressao)
+    info = _info(compacto)
+    assert b"/Title" in info
+    for campo in (b"/Producer", b"/Creator", b"/CreationDate", b"/Author"):
+        assert campo not in info
+    # Fontes standard-14 (não embutidas) e streams só com Flate
+    assert b"/FontFile" not in compacto
+    assert b"/ASCII85Decode" not in compacto
+    assert b"/FlateDecode" in compacto
+
+
+def test_perfil_print_mantem_metadados():
+    pdf = GPSGenerator(perfil="print").gerar_guia(DADOS, 303.6, "1007", "10/2025")
+    info = _info(pdf)
+    assert b"/Author" in info and b"/CreationDate" in info
+
+
+def test_perfil_desconhecido():
+    with pytest.raises(ValueError):
+        GPSGenerator(perfil="fax")
+
+
+def test_aquecer_registra_tempos():
+    gerador = GPSGenerator()
+    assert gerador.metricas()["aquecido"] is False
+    tempos = gerador.aquecer()
+    assert tempos["frio_ms"] > 0 and tempos["quente_ms"] > 0
+    assert gerador.metricas() == {"perfil": "whatsapp-compact", "aquecido": True, "aquecimento": tempos}
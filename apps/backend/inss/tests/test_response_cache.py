@@ -0,0 +1,63 @@
+import asyncio
+
+from app.agents import GuiasMEIAgent, RespostaCache
+from app.agents.cache import normalizar_mensagem
+
+
+class _Relogio:
+    def __init__(self):
+        self.agora = 0.0
+
+    def __call__(self):
+        return self.agora
+
+
+class _LLMFalso:
+    def __init__(self):
+        self.chamadas = 0
+
+    async def ainvoke(self, mensagens):
+        self.chamadas += 1
+        return type("Resposta", (), {"content": f"resposta {self.chamadas}"})()
+
+
+def test_normalizacao_ignora_acento_caixa_e_pontuacao():
+    assert normalizar_mensagem("Qual o CÓDIGO da GPS?") == normalizar_mensagem("qual o codigo da gps")
+
+
+def test_ttl_e_lru():
+    relogio = _Relogio()
+    cache = RespostaCache(ttl=10, max_entradas=2, relogio=relogio)
+    cache.guardar("mei", "1.0.0", "quando vence?", "dia 15")
+    cache.guardar("mei", "1.0.0", "qual o codigo?", "1007")
+    cache.obter("mei", "1.0.0", "Quando vence")
+    cache.guardar("mei", "1.0.0", "o que e gps?", "guia")
+
+    assert cache.obter("mei", "1.0.0", "qual o codigo?") is None
+    assert cache.obter("mei", "1.0.0", "QUANDO VENCE?") == "dia 15"
+    assert cache.obter("autonomo", "1.0.0", "quando vence?") is None
+
+    relogio.agora = 11
+    assert cache.obter("mei", "1.0.0", "quando vence?") is None
+
+
+def test_quase_duplicada_por_ngramas():
+    cache = RespostaCache(similaridade_minima=0.7)
+    cache.guardar("default", "1.0.0", "qual o código da GPS do autônomo?", "1007")
+    assert cache.obter("default", "1.0.0", "qual o codigo da gps de autonomo") == "1007"
+    assert cache.obter("default", "1.0.0", "como emitir nota fiscal?") is None
+
+
+def test_agente_so_usa_cache_para_perguntas_sem_contexto():
+    llm = _LLMFalso()
+    agente = GuiasMEIAgent(user_type="mei", llm=llm, cache=RespostaCache())
+    contexto = {"whatsapp": "5511999999999", "tipo_contribuinte": "mei"}
+
+    primeira = asyncio.run(agente.processar_mensagem("Quando vence a GPS?", contexto))
+    segunda = asyncio.run(agente.processar_mensagem("quando vence a gps", contexto))
+    assert primeira == segunda
+    assert llm.chamadas == 1
+
+    asyncio.run(agente.processar_mensagem("quanto pago sobre 3000?", contexto))
+    asyncio.run(agente.processar_mensagem("quanto pago sobre 3000?", contexto))
+    assert llm.chamadas == 3
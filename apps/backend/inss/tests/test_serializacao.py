@@ -0,0 +1,80 @@
+import json
+from datetime import date, datetime, timezone
+from decimal import Decimal
+
+import pytest
+from fastapi.encoders import jsonable_encoder
+
+from app.models.registros import GuiaHistorico
+from app.models.respostas import EnvioWhatsApp
+from app.utils.competencia import Competencia
+from app.utils.serializacao import RespostaJSON, dumps
+
+
+def test_mesmo_json_do_caminho_padrao():
+    conteudo = {
+        "guia": {"id": "g1", "valor": Decimal("303.60"), "data_vencimento": date(2025, 11, 17)},
+        "whatsapp": EnvioWhatsApp(sid="SM1", status="queued"),
+        "historico": [GuiaHistorico(id="g1", competencia="10/2025", valor=303.6)],
+        "competencia": Competencia(2025, 10),
+        "nome": "Conceição",
+    }
+    esperado = jsonable_encoder(
+        {**conteudo, "competencia": "10/2025", "historico": [jsonable_encoder(conteudo["historico"][0])]}
+    )
+    assert json.loads(RespostaJSON(conteudo).body) == esperado
+    assert "Conceição".encode() in dumps(conteudo)
+
+
+def test_datetime_em_iso_8601():
+    momento = datetime(2025, 10, 15, 12, 0, tzinfo=timezone.utc)
+    assert dumps({"created_at": momento}) == b'{"created_at":"2025-10-15T12:00:00+00:00"}'
+
+
+def test_tipo_desconhecido_falha():
+    with pytest.raises(TypeError):
+        dumps({"x": object()})
+
+
+def test_rota_de_historico_valida_pelo_response_model(monkeypatch):
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+
+    from app.models.registros import GuiaHistorico, Usuario, decodificar
+    from app.routes import users
+
+    async def obter_usuario(whatsapp):
+        return Usuario(id="u1", whatsapp=whatsapp, nome="Ana")
+
+    async def buscar_historico(usuario_id, limite, cursor, tipo=None):
+        assert tipo is GuiaHistorico
+        guias = [
+            {"id": "g1", "competencia": "10/2025", "valor": "303.60", "pdf_url": "https://cdn/g1.pdf"},
+            {"valor": 1.0},
+        ]
+        return {"guias": decodificar(tipo, guias[:limite]), "proximo_cursor": None}
+
+    async def iterar_historico(usuario_id, tipo=None):
+        for guia in decodificar(tipo, [{"id": "g1", "valor": 303.6, "coluna_extra": 1}]):
+            yield guia
+
+    monkeypatch.setattr(users.supabase_service, "obter_usuario", obter_usuario)
+    monkeypatch.setattr(users.supabase_service, "buscar_historico", buscar_historico)
+    monkeypatch.setattr(users.supabase_service, "iterar_historico", iterar_historico)
+    app = FastAPI(default_response_class=RespostaJSON)
+    app.include_router(users.router)
+    cliente = TestClient(app, raise_server_exceptions=False)
+
+    resposta = cliente.get("/api/v1/usuarios/+5511999999999/historico", params={"limite": 1})
+    assert resposta.status_code == 200
+    [guia] = resposta.json()["historico"]
+    assert guia["id"] == "g1" and guia["valor"] == 303.6 and guia["codigo_gps"] is None
+    assert guia["pdf_url"] == "https://cdn/g1.pdf"
+    assert resposta.json()["usuario"]["nome"] == "Ana"
+
+    # Guia sem id não passa pela validação do modelo
+    assert cliente.get("/api/v1/usuarios/+5511999999999/historico").status_code == 500
+
+    exportacao = cliente.get("/api/v1/usuarios/+5511999999999/historico", params={"formato": "ndjson"})
+    [linha] = exportacao.text.splitlines()
+    assert json.loads(linha) == jsonable_encoder(GuiaHistorico(id="g1", valor=303.6))
@@ -0,0 +1,62 @@
+import asyncio
+import base64
+
+import httpx
+
+from app.services.pdf_generator import GPSGenerator
+from app.services.storage_resumable import UploadResumable
+
+URL = "http://supabase.local"
+
+
+def _servidor_tus(recebido):
+    def responder(request: httpx.Request) -> httpx.Response:
+        if request.method == "POST":
+            recebido["criacao"] = dict(request.headers)
+            return httpx.Response(201, headers={"location": "/storage/v1/upload/resumable/abc"})
+        assert request.url.path == "/storage/v1/upload/resumable/abc"
+        assert request.headers["upload-offset"] == str(len(recebido["corpo"]))
+        corpo = request.read()
+        assert int(request.headers["content-length"]) == len(corpo)
+        recebido["chunks"].append(len(corpo))
+        recebido["corpo"] += corpo
+        return httpx.Response(204, headers={"upload-offset": str(len(recebido["corpo"]))})
+
+    return responder
+
+
+def test_upload_resumable_envia_chunks_em_sequencia():
+    recebido = {"corpo": b"", "chunks": []}
+    conteudo = bytes(range(256)) * 100  # 25600 bytes
+
+    async def executar():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(_servidor_tus(recebido))) as cliente:
+            upload = UploadResumable(URL, "chave", tamanho_chunk=10_000, cliente=cliente)
+            await upload.enviar("guias", "u1/guia.pdf", memoryview(conteudo))
+
+    asyncio.run(executar())
+
+    assert recebido["corpo"] == conteudo
+    assert recebido["chunks"] == [10_000, 10_000, 5_600]
+    criacao = recebido["criacao"]
+    assert criacao["upload-length"] == str(len(conteudo))
+    assert criacao["tus-resumable"] == "1.0.0"
+    metadados = dict(item.split(" ") for item in criacao["upload-metadata"].split(","))
+    assert base64.b64decode(metadados["objectName"]) == b"u1/guia.pdf"
+    assert base64.b64decode(metadados["bucketName"]) == b"guias"
+
+
+def test_gerar_guia_em_escreve_o_pdf_no_destino():
+    escritas = []
+
+    class Destino:
+        def write(self, dados):
+            escritas.append(dados)
+            return len(dados)
+
+    gerador = GPSGenerator()
+    dados = {"nome": "Maria", "nit": "170.33259.50-4"}
+    gerador.gerar_guia_em(Destino(), dados, 303.6, "1007", "10/2025")
+
+    assert b"".join(escritas).startswith(b"%PDF")
+    assert gerador.gerar_guia(dados, 303.6, "1007", "10/2025")[:4] == b"%PDF"
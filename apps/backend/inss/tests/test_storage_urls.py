@@ -0,0 +1,113 @@
+import asyncio
+import base64
+import hashlib
+import hmac
+import json
+
+import httpx
+import pytest
+
+from app.services.supabase_service import caminho_por_conteudo
+
+PDF = b"%PDF-1.3 guia"
+
+
+class _Duplicado(Exception):
+    status = "409"
+    code = "Duplicate"
+
+
+class _BucketFalso:
+    def __init__(self, chamadas, existente=False):
+        self.chamadas = chamadas
+        self.existente = existente
+
+    def upload(self, caminho, conteudo, opcoes):
+        self.chamadas.append((caminho, opcoes))
+        if self.existente:
+            raise _Duplicado("The resource already exists")
+
+    def get_public_url(self, caminho):  # pragma: no cover - não deve ser chamado
+        raise AssertionError("URL deve ser montada localmente")
+
+
+def _head_ok(request):
+    return httpx.Response(200, headers={"content-length": str(len(PDF)), "etag": f'"{hashlib.md5(PDF).hexdigest()}"'})
+
+
+@pytest.fixture
+def servico_storage(cliente_supabase, servico_supabase):
+    """Serviço com Storage falso; `servico.heads` guarda as URLs conferidas por HEAD."""
+
+    def criar(bucket, jwt_secret=None):
+        servico = servico_supabase(cliente_supabase(bucket=bucket), url="https://proj.supabase.co")
+        servico.heads = []
+
+        def head(request):
+            servico.heads.append(str(request.url))
+            return _head_ok(request)
+
+        servico._motor_upload._cliente = httpx.AsyncClient(transport=httpx.MockTransport(head))
+        servico.jwt_secret = jwt_secret
+        return servico
+
+    return criar
+
+
+def _b64decode(parte):
+    return base64.urlsafe_b64decode(parte + "=" * (-len(parte) % 4))
+
+
+def test_caminho_por_conteudo_e_deterministico():
+    caminho = caminho_por_conteudo(PDF, prefixo="guias")
+    digest = hashlib.sha256(PDF).hexdigest()
+    assert caminho == f"guias/{digest[:2]}/{digest}.pdf"
+    assert caminho_por_conteudo(memoryview(PDF), prefixo="guias") == caminho
+    assert caminho_por_conteudo(PDF + b" ", prefixo="guias") != caminho
+
+
+def test_upload_define_cache_control_e_monta_url_local(servico_storage):
+    chamadas = []
+    servico = servico_storage(_BucketFalso(chamadas))
+    url = asyncio.run(servico.upload_file("guias", "guias/ab/abc.pdf", PDF))
+
+    assert url == "https://proj.supabase.co/storage/v1/object/public/guias/guias/ab/abc.pdf"
+    _, opcoes = chamadas[0]
+    assert opcoes["cache-control"] == "31536000"
+    assert opcoes["upsert"] == "false"
+    # Upload confirmado pelo Storage: sem HEAD de conferência
+    assert servico.heads == []
+
+
+def test_upload_de_objeto_existente_reaproveita_url(servico_storage):
+    servico = servico_storage(_BucketFalso([], existente=True))
+    url = asyncio.run(servico.upload_file("guias", "guias/ab/abc.pdf", PDF))
+    assert url.endswith("/object/public/guias/guias/ab/abc.pdf")
+    # Conteúdo do objeto existente é conferido pela URL pública (sem depender de RLS)
+    assert servico.heads == ["https://proj.supabase.co/storage/v1/object/public/guias/guias/ab/abc.pdf"]
+
+    servico = servico_storage(_BucketFalso([], existente=True), jwt_secret="segredo")
+    asyncio.run(servico.upload_file("guias", "guias/ab/abc.pdf", PDF))
+    assert servico.heads == ["https://proj.supabase.co/storage/v1/object/authenticated/guias/guias/ab/abc.pdf"]
+
+    servico = servico_storage(_BucketFalso([], existente=True))
+    servico.verificar_upload = False
+    asyncio.run(servico.upload_file("guias", "guias/ab/abc.pdf", PDF))
+    assert servico.heads == []
+
+
+def test_url_assinada_local_estavel_na_janela(servico_storage):
+    servico = servico_storage(_BucketFalso([]), jwt_secret="segredo")
+    ttl = servico.url_assinada_ttl
+    inicio = 100 * ttl
+    url = servico.url_assinada("guias", "guias/ab/abc.pdf", agora=inicio + 10)
+
+    assert url == servico.url_assinada("guias", "guias/ab/abc.pdf", agora=inicio + ttl - 1)
+    assert url != servico.url_assinada("guias", "guias/ab/abc.pdf", agora=inicio + ttl)
+    assert url.startswith("https://proj.supabase.co/storage/v1/object/sign/guias/guias/ab/abc.pdf?token=")
+
+    cabecalho, carga, assinatura = url.split("token=")[1].split(".")
+    esperado = hmac.new(b"segredo", f"{cabecalho}.{carga}".encode(), hashlib.sha256).digest()
+    assert _b64decode(assinatura) == esperado
+    assert json.loads(_b64decode(carga)) == {"url": "guias/guias/ab/abc.pdf", "iat": inicio, "exp": inicio + 2 * ttl}
+    assert servico.url_midia("guias", "guias/ab/abc.pdf").startswith("https://proj.supabase.co/storage/v1/object/sign/")
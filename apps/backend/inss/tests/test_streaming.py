@@ -0,0 +1,98 @@
+import asyncio
+
+import pytest
+
+from app.agents import GuiasMEIAgent
+from app.agents.streaming import agrupar_paragrafos
+from app.services.circuit_breaker import ABERTO, MEIO_ABERTO, CircuitBreaker
+
+
+async def _tokens(texto, tamanho=7):
+    for inicio in range(0, len(texto), tamanho):
+        yield texto[inicio : inicio + tamanho]
+
+
+def _coletar(iterador):
+    async def _rodar():
+        return [bloco async for bloco in iterador]
+
+    return asyncio.run(_rodar())
+
+
+def test_paragrafos_curtos_sao_agrupados_ate_o_minimo():
+    texto = "Primeiro.\n\nSegundo.\n\n" + "Terceiro parágrafo bem mais longo." * 3
+    blocos = _coletar(agrupar_paragrafos(_tokens(texto), tamanho_minimo=15))
+    assert blocos[0] == "Primeiro.\n\nSegundo."
+    assert blocos[1].startswith("Terceiro")
+
+
+def test_bloco_sem_quebra_respeita_tamanho_maximo():
+    texto = "Uma frase comprida. " * 30
+    blocos = _coletar(agrupar_paragrafos(_tokens(texto), tamanho_minimo=10, tamanho_maximo=100))
+    assert all(len(bloco) <= 100 for bloco in blocos)
+    assert " ".join(blocos).split() == texto.split()
+
+
+class _LLMStream:
+    def __init__(self, texto):
+        self.texto = texto
+
+    async def astream(self, mensagens):
+        async for token in _tokens(self.texto):
+            yield type("Pedaco", (), {"content": token})()
+
+
+def test_agente_emite_blocos_em_streaming():
+    texto = ("A GPS vence no dia 15. " * 4) + "\n\n" + ("Pague pelo app do banco. " * 4)
+    agente = GuiasMEIAgent(user_type="autonomo", llm=_LLMStream(texto))
+    blocos = _coletar(agente.processar_mensagem_stream("explique a GPS", {}, tamanho_minimo=40))
+    assert len(blocos) == 2
+    assert blocos[0].startswith("A GPS vence")
+    assert blocos[1].startswith("Pague")
+
+
+class _LLMTravado:
+    async def astream(self, mensagens):
+        yield type("Pedaco", (), {"content": "Começo da resposta.\n\n"})()
+        await asyncio.sleep(10)
+        yield type("Pedaco", (), {"content": "nunca chega"})()
+
+
+def _circuito_meio_aberto(timeout=None):
+    relogio = [0.0]
+    circuito = CircuitBreaker(
+        "openai-teste", limite_falhas=1, tempo_reset=1, timeout=timeout, relogio=lambda: relogio[0]
+    )
+    circuito.registrar_falha()
+    relogio[0] = 5.0
+    return circuito
+
+
+class _LLMLento(_LLMStream):
+    async def astream(self, mensagens):
+        async for token in _tokens(self.texto):
+            await asyncio.sleep(0.005)
+            yield type("Pedaco", (), {"content": token})()
+
+
+def test_stream_interrompido_devolve_a_sonda_do_circuito():
+    circuito = _circuito_meio_aberto()
+    agente = GuiasMEIAgent(user_type="autonomo", llm=_LLMLento("Primeiro.\n\n" + "Segundo. " * 50), circuito=circuito)
+
+    async def desconectar():
+        fluxo = agente.processar_mensagem_stream("explique", {}, tamanho_minimo=5)
+        await fluxo.__anext__()
+        await fluxo.aclose()  # cliente foi embora no meio do stream
+
+    asyncio.run(desconectar())
+    assert circuito.estado == MEIO_ABERTO
+    assert circuito.permite()
+
+
+def test_stream_travado_respeita_timeout_do_circuito():
+    circuito = _circuito_meio_aberto(timeout=0.05)
+    agente = GuiasMEIAgent(user_type="autonomo", llm=_LLMTravado(), circuito=circuito)
+
+    with pytest.raises(asyncio.TimeoutError):
+        _coletar(agente.processar_mensagem_stream("explique", {}, tamanho_minimo=5))
+    assert circuito.estado == ABERTO
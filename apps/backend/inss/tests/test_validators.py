@@ -0,0 +1,72 @@
+import random
+import re
+
+import numpy as np
+import pytest
+
+from app.utils.validators import (
+    validar_cnpj,
+    validar_cnpjs_lote,
+    validar_cpf,
+    validar_cpfs_lote,
+    validar_nit,
+    validar_nits_lote,
+)
+
+
+def _cpf_referencia(cpf):
+    numeros = re.sub(r"\D", "", cpf)
+    if len(numeros) != 11 or numeros == numeros[0] * 11:
+        return False
+    for i in range(9, 11):
+        digito = (sum(int(numeros[n]) * (i + 1 - n) for n in range(i)) * 10) % 11 % 10
+        if digito != int(numeros[i]):
+            return False
+    return True
+
+
+@pytest.mark.parametrize(
+    "documento, esperado",
+    [
+        ("529.982.247-25", True),
+        ("52998224725", True),
+        ("529.982.247-26", False),
+        ("111.111.111-11", False),
+        ("5299822472", False),
+        ("52998224725a", False),
+        ("５２９９８２２４７２５", False),
+    ],
+)
+def test_validar_cpf(documento, esperado):
+    assert validar_cpf(documento) is esperado
+
+
+def test_cnpj_e_nit():
+    assert validar_cnpj("11.222.333/0001-81")
+    assert not validar_cnpj("11.222.333/0001-82")
+    assert not validar_cnpj("00000000000000")
+    assert validar_nit("170.33259.50-4")
+    assert not validar_nit("170.33259.50-5")
+
+
+def test_cpf_igual_a_implementacao_anterior():
+    sorteio = random.Random(7)
+    amostra = [f"{sorteio.randrange(10**11):011d}" for _ in range(3000)]
+    assert [validar_cpf(cpf) for cpf in amostra] == [_cpf_referencia(cpf) for cpf in amostra]
+
+
+def test_lote_igual_ao_escalar():
+    sorteio = random.Random(11)
+    cpfs = [f"{sorteio.randrange(10**11):011d}" for _ in range(2000)] + ["529.982.247-25", "abc", "", "111.111.111-11"]
+    cpfs += [f"{cpf[:3]}.{cpf[3:6]}.{cpf[6:9]}-{cpf[9:]}" for cpf in cpfs[:500]] + ["5299822472-5x", "529 982 247 25"]
+    cnpjs = [f"{sorteio.randrange(10**14):014d}" for _ in range(2000)] + ["11.222.333/0001-81"]
+    nits = [f"{sorteio.randrange(10**11):011d}" for _ in range(2000)] + ["170.33259.50-4"]
+
+    assert validar_cpfs_lote(np.array(cpfs)).tolist() == [validar_cpf(cpf) for cpf in cpfs]
+    assert validar_cnpjs_lote(cnpjs).tolist() == [validar_cnpj(cnpj) for cnpj in cnpjs]
+    assert validar_nits_lote(nits).tolist() == [validar_nit(nit) for nit in nits]
+
+
+def test_lote_aceita_inteiros_sem_zeros_a_esquerda():
+    mascara = validar_cpfs_lote(np.array([52998224725, 52998224726, 191, -1], dtype=np.int64))
+    assert mascara.tolist() == [True, False, validar_cpf("00000000191"), False]
@@ -0,0 +1,69 @@
+import asyncio
+
+import pytest
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.testclient import TestClient
+
+from app.routes import webhook
+from app.services.assinatura_twilio import TAMANHO_MAXIMO_CORPO, ValidadorAssinaturaTwilio
+
+
+@pytest.fixture
+def cliente(monkeypatch):
+    """Webhook com assinatura obrigatória e qualquer I/O posterior à validação registrado."""
+    chamadas = []
+
+    async def nao_deveria_rodar(*args, **kwargs):
+        chamadas.append(args)
+        raise AssertionError("Supabase/LLM acionado antes de validar a requisicao")
+
+    monkeypatch.setattr(webhook, "get_validador_assinatura", lambda: ValidadorAssinaturaTwilio("segredo"))
+    monkeypatch.setattr(webhook.debounce, "agrupar", nao_deveria_rodar)
+    monkeypatch.setattr(webhook.supabase_service, "obter_usuario_por_whatsapp", nao_deveria_rodar)
+    monkeypatch.setattr(webhook.intent_router, "responder", nao_deveria_rodar)
+    monkeypatch.setattr(webhook.chat_agent, "processar_mensagem", nao_deveria_rodar)
+
+    app = FastAPI()
+    app.include_router(webhook.router)
+    cliente = TestClient(app)
+    cliente.chamadas = chamadas
+    return cliente
+
+
+def test_assinatura_invalida_responde_403_sem_io(cliente):
+    resposta = cliente.post(
+        "/webhook/whatsapp",
+        content=b"From=whatsapp%3A%2B5511999999999&Body=oi",
+        headers={"content-type": "application/x-www-form-urlencoded", "x-twilio-signature": "invalida"},
+    )
+    assert resposta.status_code == 403
+    assert cliente.chamadas == []
+
+
+def test_corpo_chunked_grande_responde_413_sem_io(cliente):
+    def partes():
+        for _ in range(TAMANHO_MAXIMO_CORPO // 1024 + 2):
+            yield b"a" * 1024
+
+    resposta = cliente.post(
+        "/webhook/whatsapp",
+        content=partes(),
+        headers={"content-type": "application/x-www-form-urlencoded", "x-twilio-signature": "qualquer"},
+    )
+    assert resposta.status_code == 413
+    assert cliente.chamadas == []
+
+
+def test_corpo_chunked_para_de_ser_lido_ao_passar_do_limite(monkeypatch):
+    monkeypatch.setattr(webhook, "get_validador_assinatura", lambda: None)
+    lidas = []
+
+    async def receber():
+        lidas.append(1)
+        return {"type": "http.request", "body": b"a" * 1024, "more_body": len(lidas) < 1000}
+
+    escopo = {"type": "http", "method": "POST", "path": "/webhook/whatsapp", "headers": [], "query_string": b""}
+    with pytest.raises(HTTPException) as erro:
+        asyncio.run(webhook._ler_payload_assinado(Request(escopo, receber)))
+    assert erro.value.status_code == 413
+    assert len(lidas) == TAMANHO_MAXIMO_CORPO // 1024 + 1